@@ -4,25 +4,251 @@ app.py
 Main entry point for the GenAI RAG & Agent FastAPI application.
 This module defines the external API interface, handles request validation, 
 and orchestrates the agent's query process.
+
+Startup is split in two so the process binds its port quickly:
+1. Importing this module only loads FastAPI and the request schemas; the agent
+   pipeline (LangChain, the Pinecone/HuggingFace/Gemini SDKs) is imported on
+   first use.
+2. The lifespan hook starts a background warmup that imports the pipeline,
+   builds the shared clients, opens their connections and runs a dummy
+   embedding and vector search. `GET /health/ready` and the query endpoints
+   return 503 until it has finished; `GET /health/live` only reports that the
+   process is serving. With settings.startup_warmup disabled, the clients are
+   built and opened (without the dummy calls) before the app starts serving.
+
+Under overload, generation is admission-controlled (src.helper.admission):
+requests that cannot get a generation slot are answered immediately with 429
+(wait queue full) or 503 (waited too long), each with a Retry-After header,
+unless degraded mode returns the retrieved context instead.
+
+Every query runs under a latency budget (settings.request_budget_seconds);
+when a remote call cannot finish within it, the request fails with 504.
 """
 
-from fastapi import FastAPI, HTTPException
-from src.schemas import AgentQueryRequest, AgentQueryResponse
-from src.agent.agent import run_agent
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List
+from src.schemas import AgentQueryRequest, AgentQueryResponse, AgentBatchResponse
+from src.config import settings
+from src.helper.admission import Overloaded
+from src.helper.deadline import DeadlineExceeded
+from src.rag.filters import build_filter
+from src.helper.metrics import HTTP_REQUESTS, HTTP_SECONDS, render_metrics, server_timing_header, start_request_timings
 from dotenv import load_dotenv
 
 load_dotenv() # Load environment variables from .env file
 
-app = FastAPI(title="GenAI RAG & Agent API")
+logger = logging.getLogger(__name__)
+
+
+def _agent():
+    """
+    Return the agent pipeline module, importing it on first use (normally
+    during warmup) so importing app stays fast.
+    """
+    from src.agent import agent
+    return agent
+
+
+def _build_clients():
+    """
+    Import the pipeline and build the shared client registry (blocking; run in a thread).
+    """
+    from src.clients import init_clients
+
+    _agent()
+    return init_clients()
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Build, open and (if settings.startup_warmup) exercise the shared clients,
+    retrying with backoff until it succeeds, then mark the app ready.
+    """
+    from src.helper.retry import backoff_delay
+
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            clients = await asyncio.to_thread(_build_clients)
+            await clients.aopen()
+            if settings.startup_warmup:
+                await clients.warmup()
+            break
+        except Exception as exc:
+            app.state.readiness["error"] = f"{type(exc).__name__}: {exc}"
+            delay = backoff_delay(attempt, settings.warmup_retry_base_delay)
+            logger.warning(f"Warmup failed ({type(exc).__name__}: {exc}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    app.state.clients = clients
+    app.state.readiness.update(ready=True, error=None, warmup_seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"✓ Warmup finished in {app.state.readiness['warmup_seconds']}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the warmup of the shared client registry (embeddings, Pinecone,
+    Gemini) so every request reuses warm, pooled connections, and closes the
+    clients on shutdown. Without settings.startup_warmup, startup waits for
+    the clients to be built and opened instead.
+    """
+    app.state.readiness = {"ready": False, "error": None, "warmup_seconds": None}
+    warmup_task = asyncio.create_task(warm_up(app))
+    if not settings.startup_warmup:
+        await warmup_task
+    yield
+    warmup_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await warmup_task
+
+    from src.clients import aclose_clients
+    await aclose_clients()
 
-@app.post("/agent/query", response_model=AgentQueryResponse)
-def agent_query(request: AgentQueryRequest):
+
+app = FastAPI(title="GenAI RAG & Agent API", lifespan=lifespan)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """
+    Sheds a request that admission control rejected: 429 when the wait queue is
+    full, 503 when the wait timed out, with a Retry-After estimate.
+    """
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_handler(request: Request, exc: DeadlineExceeded):
+    """
+    A remote call (embedding, vector search or Gemini) did not finish within
+    the request's latency budget.
+    """
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """
+    Records request metrics and adds a Server-Timing header with the duration
+    of each pipeline stage (embed, vector_search, retrieve, context, llm, ...).
+
+    The HTTP latency is observed twice: when the response starts
+    (phase="first_byte") and when its body has been sent (phase="complete").
+    For streamed answers the two differ by the whole generation.
+    """
+    timings = start_request_timings()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        _observe_request(request, "500", started, "first_byte", "complete")
+        raise
+
+    first_byte = _observe_request(request, str(response.status_code), started, "first_byte")
+    timings.append(("total", first_byte))
+    response.headers["Server-Timing"] = server_timing_header(timings)
+
+    async def body(chunks):
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            _observe_request(request, None, started, "complete")
+
+    response.body_iterator = body(response.body_iterator)
+    return response
+
+
+def _observe_request(request: Request, status: str, started: float, *phases: str) -> float:
+    """
+    Observe the HTTP latency since `started` for each phase (and count the
+    request when `status` is given); returns the elapsed seconds.
+    """
+    elapsed = time.perf_counter() - started
+    path = getattr(request.scope.get("route"), "path", "unmatched")
+    if status is not None:
+        HTTP_REQUESTS.labels(path, request.method, status).inc()
+    for phase in phases:
+        HTTP_SECONDS.labels(path, phase).observe(elapsed)
+    return elapsed
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint: stage latency histograms, query/decision
+    counters, LLM token counts, cache hit rates and error counts.
+    """
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.get("/health/live")
+def health_live():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready(request: Request):
+    """
+    Readiness probe: 200 once warmup has built and exercised the clients,
+    503 (with the last warmup error, if any) until then.
+    """
+    readiness = request.app.state.readiness
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "error": readiness["error"]})
+    return {"status": "ready", "warmup_seconds": readiness["warmup_seconds"]}
+
+def _require_ready(request: Request) -> None:
+    """
+    Dependency of the query endpoints: 503 with a Retry-After header until
+    warmup has finished, so no request builds the clients on the event loop.
+    """
+    if not request.app.state.readiness["ready"]:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is warming up",
+            headers={"Retry-After": str(max(1, round(settings.warmup_retry_base_delay)))},
+        )
+
+
+def _metadata_filter(request: AgentQueryRequest):
+    """
+    Metadata filter for a request's optional `filters` (None searches the whole index).
+    """
+    if request.filters is None:
+        return None
+    return build_filter(**request.filters.model_dump())
+
+
+@app.post("/agent/query", response_model=AgentQueryResponse, dependencies=[Depends(_require_ready)])
+async def agent_query(request: AgentQueryRequest):
     """
     Endpoint to process user queries through the AI agent.
     
+    The handler is async end to end, so a single worker can keep many queries
+    in flight while they wait on the embedding endpoint, Pinecone and Gemini.
+
     This function:
     1. Validates that the query is not empty.
-    2. Passes the query to the agent's 'Brain' (run_agent).
+    2. Passes the query, scoped by the optional `filters`, to the agent's 'Brain' (run_agent).
     3. Returns the agent's grounded response along with metadata.
     """
 
@@ -30,6 +256,75 @@ def agent_query(request: AgentQueryRequest):
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-    response = run_agent(request.query)
+    response = await _agent().run_agent(request.query, metadata_filter=_metadata_filter(request))
 
     return response
+
+
+@app.post("/agent/query/batch", response_model=AgentBatchResponse, dependencies=[Depends(_require_ready)])
+async def agent_query_batch(requests: List[AgentQueryRequest]):
+    """
+    Endpoint to process many queries in one request (e.g., bulk evaluation jobs).
+
+    All queries are embedded with one embedding call, their vector searches run
+    in parallel and answers are generated with bounded concurrency.
+
+    Returns one result per query, in request order. A query that fails gets an
+    `error` entry instead of failing the whole batch.
+    """
+
+    if not requests:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(requests) > settings.batch_max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the limit of {settings.batch_max_queries} queries"
+        )
+
+    results = await _agent().run_agent_batch(
+        [request.query for request in requests], [_metadata_filter(request) for request in requests]
+    )
+
+    return {"results": results}
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Encode one Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/agent/query/stream", dependencies=[Depends(_require_ready)])
+async def agent_query_stream(request: AgentQueryRequest):
+    """
+    Streaming variant of /agent/query using Server-Sent Events (text/event-stream).
+
+    Events, in order:
+    1. `retrieval`: {"documents_used": [...], "agent_decision": "..."} once retrieval finishes.
+    2. `token`: {"text": "..."} for each chunk of the answer as Gemini generates it.
+    3. `done`: the full AgentQueryResponse payload.
+
+    If the pipeline fails after the stream has started, an `error` event with a
+    {"detail": "..."} payload is sent instead of `done` (plus "retry_after" in
+    seconds when the query was shed by admission control).
+    """
+
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    async def events():
+        try:
+            async for event, data in _agent().stream_agent(request.query, metadata_filter=_metadata_filter(request)):
+                yield format_sse(event, data)
+        except Overloaded as exc:
+            yield format_sse("error", {"detail": str(exc), "retry_after": exc.retry_after})
+        except Exception:
+            logger.exception("Streaming agent query failed")
+            yield format_sse("error", {"detail": "Failed to generate an answer"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
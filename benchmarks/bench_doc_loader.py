@@ -0,0 +1,68 @@
+"""
+bench_doc_loader.py
+
+Throughput benchmark for markdown loading + splitting.
+
+Generates a synthetic corpus shaped like `data/` (headings, bullet lists, code
+fences) and measures files/sec for the native loader and, when installed, the
+unstructured loader. Results are printed as JSON.
+
+How to run:
+python -m benchmarks.bench_doc_loader --files 500
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from src.config import settings
+from src.rag import doc_loader
+
+SECTION = """## {title} {i}
+- **Point**: {title} item {i} describes one aspect of the topic in a sentence or two.
+- **Detail**: Additional context so sections are a few hundred characters long.
+
+```python
+# comment that looks like a heading
+print({i})
+```
+"""
+
+
+def write_corpus(directory: str, files: int, sections: int) -> None:
+    for n in range(files):
+        body = "".join(SECTION.format(title=f"Topic {n}", i=i) for i in range(sections))
+        with open(os.path.join(directory, f"doc_{n:05d}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Document {n}\n\nOverview paragraph for document {n}.\n\n{body}")
+
+
+def run(loader: str, directory: str, files: int) -> dict:
+    settings.markdown_loader = loader
+    started = time.perf_counter()
+    chunks = sum(len(doc_loader.load_and_split_file(os.path.join(directory, name)))
+                 for name in sorted(os.listdir(directory)))
+    seconds = time.perf_counter() - started
+    return {"loader": loader, "files": files, "chunks": chunks,
+            "seconds": round(seconds, 4), "files_per_second": round(files / seconds, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Number of synthetic markdown files.")
+    parser.add_argument("--sections", type=int, default=4, help="Sections per file.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory, args.files, args.sections)
+        for loader in ("native", "unstructured"):
+            try:
+                results.append(run(loader, directory, args.files))
+            except ImportError as e:
+                results.append({"loader": loader, "skipped": f"not installed ({e.name})"})
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
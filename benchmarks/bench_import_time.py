@@ -0,0 +1,108 @@
+"""
+bench_import_time.py
+
+Import-time benchmark for the API entry point.
+
+Imports a module (default: `app`) in fresh interpreters with `python -X importtime`
+and reports the median total import time and the slowest top-level imports
+as JSON. Heavy dependencies (the Gemini, Pinecone and HuggingFace SDKs) must
+not be imported at startup; they are loaded during warmup, and any of them found
+in the import graph is reported under "heavy_imports".
+
+How to run:
+python -m benchmarks.bench_import_time
+python -m benchmarks.bench_import_time --runs 10 --max-seconds 1.0
+
+Notes:
+- With --max-seconds the command exits with status 1 when the median exceeds
+  the budget or a heavy dependency is imported, so it can gate CI.
+- Timings include interpreter-level caches (.pyc); run it twice after editing code.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+HEAVY_MODULES = (
+    "langchain_google_genai",
+    "google.genai",
+    "pinecone",
+    "langchain_pinecone",
+    "langchain_huggingface",
+    "huggingface_hub",
+    "sentence_transformers",
+    "torch",
+)
+
+
+def measure(module: str) -> Dict:
+    """
+    Import `module` in a fresh interpreter and return its -X importtime profile.
+
+    Returns {"total_seconds": float, "modules": {name: cumulative_seconds}}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    modules = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative.isdigit():
+            continue  # Header line
+        seconds = int(cumulative) / 1e6
+        modules[name] = max(modules.get(name, 0.0), seconds)
+        if name == module:
+            total = seconds
+    return {"total_seconds": total, "modules": modules}
+
+
+def run(module: str, runs: int, top: int) -> Dict:
+    profiles = [measure(module) for _ in range(runs)]
+
+    per_module: Dict[str, List[float]] = defaultdict(list)
+    for profile in profiles:
+        for name, seconds in profile["modules"].items():
+            if "." not in name:  # Top-level packages only; children are included in their cumulative time
+                per_module[name].append(seconds)
+    slowest = sorted(
+        ((name, statistics.median(times)) for name, times in per_module.items() if name != module),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+
+    imported = set().union(*(profile["modules"] for profile in profiles))
+    return {
+        "module": module,
+        "runs": runs,
+        "median_seconds": round(statistics.median(p["total_seconds"] for p in profiles), 4),
+        "max_seconds": round(max(p["total_seconds"] for p in profiles), 4),
+        "slowest_imports": [{"module": name, "seconds": round(seconds, 4)} for name, seconds in slowest],
+        "heavy_imports": sorted(name for name in HEAVY_MODULES if name in imported),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("--module", default="app", help="Module to import.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest top-level imports to list.")
+    parser.add_argument("--max-seconds", type=float, default=0.0,
+                        help="Fail (exit 1) above this median import time or on heavy imports (0 = report only).")
+    args = parser.parse_args()
+
+    measure(args.module)  # Warm-up: compile .pyc files so the first run is not an outlier
+    report = run(args.module, args.runs, args.top)
+    print(json.dumps(report, indent=2))
+
+    if args.max_seconds and (report["median_seconds"] > args.max_seconds or report["heavy_imports"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+eval_retrieval.py
+
+Retrieval evaluation over a golden question set, swept across chunking and top-k settings.
+
+For every (chunk_size, chunk_overlap) pair the corpus in data/ is re-split and
+re-indexed in memory (vectors plus BM25) with a local embedding backend, so the
+sweep runs offline. Every golden question is then retrieved at each top_k with
+the configured retrieval mode and score gating, and the report lists per
+configuration:
+- recall_at_k: Share of questions with a relevant chunk in the results.
+- mrr: Mean reciprocal rank of the first relevant chunk (0 when none is returned).
+- chunks / index_bytes: Index size (chunk text plus float32 vectors).
+- ingestion_seconds: Time to split, embed and index the corpus.
+- mean_context_tokens: Estimated prompt context size (get_retrive of the results).
+
+A chunk is relevant when it comes from the question's expected source file and
+covers its expected section (the section is on the chunk's section path or its
+heading is inside the chunk). The golden set lives in benchmarks/golden_set.json.
+
+How to run:
+python -m benchmarks.eval_retrieval --min-score 0
+python -m benchmarks.eval_retrieval --chunk-sizes 300,600,1000 --chunk-overlaps 0,100 --top-k 1,2,4 --output eval.json
+
+Notes:
+- The default embedding backend is "fake" (hashing embeddings): absolute
+  recall is lower than with a real model, but it is deterministic and needs no
+  network. Pass --embedding-backend to evaluate another backend.
+- retrieval_min_score and retrieval_max_score_gap are calibrated for the
+  production embedding model; hashing-embedding scores are lower, so disable
+  gating (--min-score 0) when evaluating the fake backend.
+- Pick the cheapest configuration (index_bytes, mean_context_tokens) whose
+  recall stays at the level you need.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+from src.config import settings
+
+GOLDEN_SET_PATH = os.path.join(os.path.dirname(__file__), "golden_set.json")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def load_golden_set(path: str = GOLDEN_SET_PATH) -> List[Dict]:
+    """
+    Load the golden set: a JSON list of {"question", "source", "section"} objects.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_relevant(doc: Document, item: Dict) -> bool:
+    """
+    Return True if `doc` answers the golden item (expected source and section).
+    """
+    if os.path.basename(doc.metadata.get("source", "")) != item["source"]:
+        return False
+    section = item.get("section")
+    if not section:
+        return True
+    if section in doc.metadata.get("section", "").split(" > "):
+        return True
+    return re.search(rf"^#+\s*{re.escape(section)}\s*$", doc.page_content, re.MULTILINE) is not None
+
+
+def first_relevant_rank(docs: List[Document], item: Dict) -> Optional[int]:
+    """
+    1-based rank of the first relevant document, or None.
+    """
+    for rank, doc in enumerate(docs, start=1):
+        if is_relevant(doc, item):
+            return rank
+    return None
+
+
+def score_results(results: List[List[Document]], golden: List[Dict]) -> Dict[str, float]:
+    """
+    Compute recall@k and MRR for retrieved documents aligned with `golden`.
+    """
+    ranks = [first_relevant_rank(docs, item) for docs, item in zip(results, golden)]
+    return {
+        "recall_at_k": round(sum(rank is not None for rank in ranks) / len(golden), 4),
+        "mrr": round(sum(1 / rank for rank in ranks if rank) / len(golden), 4),
+    }
+
+
+async def evaluate(
+    embeddings, golden: List[Dict], chunk_size: int, chunk_overlap: int, top_ks: List[int]
+) -> List[Dict]:
+    """
+    Index the corpus once for (chunk_size, chunk_overlap) and evaluate every top_k.
+    """
+    from src.fakes import build_memory_index
+    from src.helper.context_builder import estimate_tokens
+    from src.helper.utils import get_retrive
+    from src.rag import doc_loader  # noqa: F401 (imported up front so ingestion_seconds excludes import time)
+    from src.rag.retriever import create_retriever
+
+    started = time.perf_counter()
+    vector_store, bm25_index = build_memory_index(settings.data_path, embeddings, chunk_size, chunk_overlap)
+    ingestion_seconds = time.perf_counter() - started
+
+    chunks = len(bm25_index)
+    index_bytes = sum(len(text.encode("utf-8")) for text in bm25_index.texts) + chunks * settings.vector_dimension * 4
+    query_vectors = await embeddings.aembed_documents([item["question"] for item in golden])
+
+    rows = []
+    for top_k in top_ks:
+        retriever = create_retriever(
+            vector_store,
+            k=top_k,
+            mode=settings.retrieval_mode,
+            bm25_index=bm25_index,
+            fetch_k=max(settings.hybrid_fetch_k, top_k),
+            rrf_k=settings.rrf_k,
+            min_score=settings.retrieval_min_score,
+            max_score_gap=settings.retrieval_max_score_gap,
+        )
+        results = [
+            await retriever.aget_relevant_documents_by_vector(item["question"], vector)
+            for item, vector in zip(golden, query_vectors)
+        ]
+        context_tokens = [estimate_tokens(get_retrive(docs)) for docs in results]
+        rows.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "top_k": top_k,
+            **score_results(results, golden),
+            "chunks": chunks,
+            "index_bytes": index_bytes,
+            "ingestion_seconds": round(ingestion_seconds, 4),
+            "mean_context_tokens": round(sum(context_tokens) / len(context_tokens), 1),
+        })
+    return rows
+
+
+async def run(args) -> Dict:
+    from src.rag.embeddings import get_embeddings
+
+    settings.embedding_backend = args.embedding_backend
+    if args.mode:
+        settings.retrieval_mode = args.mode
+    if args.min_score is not None:
+        settings.retrieval_min_score = args.min_score
+    if args.max_score_gap is not None:
+        settings.retrieval_max_score_gap = args.max_score_gap
+    embeddings = get_embeddings(settings.embedding_model_name)
+    golden = load_golden_set(args.golden_set)
+
+    results = []
+    for chunk_size in args.chunk_sizes:
+        for chunk_overlap in args.chunk_overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            results.extend(await evaluate(embeddings, golden, chunk_size, chunk_overlap, args.top_k))
+
+    return {
+        "config": {
+            "questions": len(golden),
+            "embedding_backend": settings.embedding_backend,
+            "retrieval_mode": settings.retrieval_mode,
+            "retrieval_min_score": settings.retrieval_min_score,
+            "retrieval_max_score_gap": settings.retrieval_max_score_gap,
+            "context_token_budget": settings.context_token_budget,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[300, 600, 1000], help="Comma-separated chunk sizes.")
+    parser.add_argument("--chunk-overlaps", type=_int_list, default=[0, 100, 200],
+                        help="Comma-separated chunk overlaps (pairs with overlap >= size are skipped).")
+    parser.add_argument("--top-k", type=_int_list, default=[1, 2, 4], help="Comma-separated top_k values.")
+    parser.add_argument("--mode", default="", help="Retrieval mode (hybrid or vector; default: settings).")
+    parser.add_argument("--min-score", type=float, default=None, help="Score gate (default: settings).")
+    parser.add_argument("--max-score-gap", type=float, default=None, help="Adaptive-k score gap (default: settings).")
+    parser.add_argument("--embedding-backend", default="fake", help="Embedding backend to index and query with.")
+    parser.add_argument("--golden-set", default=GOLDEN_SET_PATH, help="Golden question set (JSON).")
+    parser.add_argument("--output", default="", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+load_test.py
+
+Offline load test for the FastAPI app.
+
+Every remote service is replaced by its stand-in from src/fakes.py through
+Settings (fake embeddings, in-memory vector store built from data/, fake LLM
+with configurable latency), so the benchmark runs anywhere, including CI. The
+app is driven in process through httpx's ASGI transport at each requested
+concurrency level, and the results are printed as JSON:
+
+{"config": {...}, "results": [{"concurrency": 8, "requests": 200, "errors": 0, "rejected": 0,
+  "requests_per_second": ..., "latency_ms": {"p50": ..., "p95": ..., "p99": ..., "mean": ..., "max": ...}}, ...]}
+
+How to run:
+python -m benchmarks.load_test --concurrency 1,8,32 --requests 200 --llm-latency 0.2
+python -m benchmarks.load_test --endpoint /agent/query/stream --output load_test.json
+python -m benchmarks.load_test --concurrency 128 --requests 1000 --llm-capacity 16 --llm-max-concurrency 16 --llm-max-queue 16
+python -m benchmarks.load_test --concurrency 8 --requests 1000 --embedding-slow-fraction 0.02 --hedge-percentile 0
+
+Notes:
+- Each request uses a distinct query (a numbered sample question) so query
+  coalescing does not collapse the load; the response cache is disabled unless
+  --response-cache is passed.
+- Latency is measured until the full response body is read (for the streaming
+  endpoint, until the `done` event).
+- Responses shed by admission control (429/503) are counted as "rejected", not
+  as errors; latency percentiles include them.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Dict, List
+import httpx
+from src.config import settings
+
+QUESTIONS = [
+    "What is RAG?",
+    "What is the difference between RAG and AI Agents?",
+    "How do I use FastAPI?",
+    "How do vector databases find similar vectors?",
+    "What are the functional components of an AI agent?",
+    "Why use FastAPI for AI applications?",
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def configure_offline(args) -> None:
+    """
+    Point Settings at the offline stand-ins before the app creates its clients.
+    """
+    settings.embedding_backend = "fake"
+    settings.vector_store_backend = "memory"
+    settings.llm_backend = "fake"
+    settings.fake_llm_latency_seconds = args.llm_latency
+    settings.fake_embedding_latency_seconds = args.embedding_latency
+    settings.fake_llm_max_concurrency = args.llm_capacity
+    settings.fake_embedding_slow_fraction = args.embedding_slow_fraction
+    if args.hedge_percentile is not None:
+        settings.hedge_percentile = args.hedge_percentile
+    if args.llm_max_concurrency is not None:
+        settings.llm_max_concurrency = args.llm_max_concurrency
+    if args.llm_max_queue is not None:
+        settings.llm_max_queue = args.llm_max_queue
+    if not args.response_cache:
+        settings.embedding_cache_size = 0
+        settings.response_cache_size = 0
+
+
+def _payload(endpoint: str, i: int):
+    query = f"{QUESTIONS[i % len(QUESTIONS)]} (request {i})"
+    if endpoint.endswith("/batch"):
+        return [{"query": query}]
+    return {"query": query}
+
+
+async def run_level(client: httpx.AsyncClient, endpoint: str, concurrency: int, requests: int) -> Dict:
+    """
+    Send `requests` requests with at most `concurrency` in flight.
+    """
+    latencies: List[float] = []
+    errors = 0
+    rejected = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, rejected
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=_payload(endpoint, i))
+                if response.status_code in (429, 503):
+                    rejected += 1
+                elif response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+    }
+
+
+async def run(args) -> Dict:
+    configure_offline(args)
+
+    # Imported after Settings are configured so the app builds the offline clients.
+    from app import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            while (await client.get("/health/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+            await client.post(args.endpoint, json=_payload(args.endpoint, -1))  # Warm-up
+            for concurrency in args.concurrency:
+                results.append(await run_level(client, args.endpoint, concurrency, args.requests))
+
+    return {
+        "config": {
+            "endpoint": args.endpoint,
+            "llm_latency_seconds": args.llm_latency,
+            "embedding_latency_seconds": args.embedding_latency,
+            "llm_capacity": args.llm_capacity,
+            "embedding_slow_fraction": args.embedding_slow_fraction,
+            "hedge_percentile": settings.hedge_percentile,
+            "response_cache": args.response_cache,
+            "retrieval_mode": settings.retrieval_mode,
+            "top_k": settings.top_k,
+            "llm_max_concurrency": settings.llm_max_concurrency,
+            "llm_max_queue": settings.llm_max_queue,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoint", default="/agent/query", help="/agent/query, /agent/query/stream or /agent/query/batch.")
+    parser.add_argument("--concurrency", type=lambda value: [int(c) for c in value.split(",")], default=[1, 8, 32],
+                        help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM latency in seconds.")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="Fake embedding latency in seconds.")
+    parser.add_argument("--embedding-slow-fraction", type=float, default=0.0,
+                        help="Share of embedding requests that stall for 1s (tail latency).")
+    parser.add_argument("--hedge-percentile", type=float, default=None,
+                        help="Hedge embeddings/vector queries after this latency percentile (0 = off; default: settings).")
+    parser.add_argument("--llm-capacity", type=int, default=0,
+                        help="Generations the fake LLM serves at once; more wait, like a saturated quota (0 = unlimited).")
+    parser.add_argument("--llm-max-concurrency", type=int, default=None,
+                        help="Generation slots (0 = no admission control; default: settings).")
+    parser.add_argument("--llm-max-queue", type=int, default=None, help="Generation wait queue (default: settings).")
+    parser.add_argument("--response-cache", action="store_true", help="Keep the embedding and response caches enabled.")
+    parser.add_argument("--output", default="", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
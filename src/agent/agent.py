@@ -8,68 +8,415 @@ should be processed before being sent to the LLM.
 Key Logic:
 - Intent Detection: Checks for comparison keywords to decide between 'comparison' and 'explanation' modes.
 - Context Filtering: Decides whether to use all retrieved documents or just the top result based on intent.
+- Response Caching: Serves semantically equivalent questions from the response cache
+  while the index version is unchanged.
+- Request Coalescing: Identical queries (after normalization) that arrive while
+  one is already running wait for it instead of running the pipeline again.
+- Batching: run_agent_batch embeds many queries in one request and answers
+  them concurrently, reporting failures per query.
+- Streaming: stream_agent yields the same response as a sequence of events
+  (retrieval, token..., done) for the Server-Sent Events endpoint.
+- Deadlines: Every query runs under a latency budget (settings.request_budget_seconds,
+  or the budget passed to run_agent/stream_agent); remote calls get what is
+  left of it (see src.helper.deadline).
+- Scoped Queries: An optional metadata filter (src.rag.filters) restricts
+  retrieval to matching chunks; it is part of the cache namespace and of the
+  coalescing key, so scoped and unscoped answers never mix.
+- Admission Control: Generation runs under the process-wide limiter; a shed
+  request raises Overloaded, or with settings.degraded_mode gets the retrieved
+  context and sources without an answer (never cached).
 """
 
-from src.generate_answer import generate_answer
-from typing import Dict
-from src.retrieve_relevant_docs import retrieve_relevant_docs
+import asyncio
+import contextlib
+import logging
+from src.generate_answer import generate_answer, stream_answer
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from src.retrieve_relevant_docs import retrieve_relevant_docs, retrieve_by_vector
 from src.tools.tools import search_docs
-from src.helper.utils import get_title
+from src.helper.admission import Overloaded
+from src.helper.deadline import request_deadline
+from src.helper.utils import get_retrive, get_title, normalize_query
+from src.config import settings
+from src.helper.metrics import record_query, stage_timer
+from src.clients import aget_clients, get_clients
+from src.rag.filters import filter_key
+from src.rag.index_version import get_index_version
+from src.rag.retriever import embed_query
 
-def run_agent(query: str) -> Dict:
+logger = logging.getLogger(__name__)
+
+# Define comparison keywords
+comparison_keywords = ["compare", "difference", "vs", "versus"]
+
+INSUFFICIENT_CONTEXT_ANSWER = "I don’t have enough information in my knowledge base."
+DEGRADED_DECISION = "degraded_context_only"
+
+
+def detect_intent(query: str) -> Tuple[str, str]:
+    """
+    Classifies the query as 'comparison' or 'explanation'.
+
+    Returns: A tuple of (intent, agent_decision).
+    """
+    query_lower = query.lower()
+    is_comparison = any(kw in query_lower for kw in comparison_keywords)
+
+    if is_comparison:
+        return "comparison", "combined_multiple_docs"
+    # Default fallback is 'explanation'
+    return "explanation", "answered_using_retrieved_context"
+
+
+def _cache_namespace(intent: str, metadata_filter: Optional[dict] = None) -> str:
+    key = filter_key(metadata_filter)
+    return f"{intent}|{key}" if key else intent
+
+
+async def _cache_key(query: str, metadata_filter: Optional[dict] = None) -> Tuple[List[float], str, str]:
+    """
+    Return the (query vector, index version, namespace) a response is cached under.
+    """
+    # On a miss the pipeline searches with this vector instead of embedding again.
+    query_vector = await embed_query(get_clients().embeddings, query)
+    intent, _ = detect_intent(query)
+    return query_vector, get_index_version(), _cache_namespace(intent, metadata_filter)
+
+
+def _budget(budget_seconds: float = None) -> float:
+    return settings.request_budget_seconds if budget_seconds is None else budget_seconds
+
+
+async def run_agent(query: str, budget_seconds: float = None, metadata_filter: Optional[dict] = None) -> Dict:
     """
     Main orchestration function for the AI agent.
-    
+
+    The query runs under a latency budget of `budget_seconds` (default:
+    settings.request_budget_seconds; 0 = none) shared by all its remote calls;
+    DeadlineExceeded is raised when it runs out.
+
+    `metadata_filter` (src.rag.filters.build_filter) restricts retrieval to
+    the matching chunks.
+
+    Concurrent calls with the same normalized query and filter are coalesced: only the
+    first runs, the rest receive its response.
+
+    Answers from the semantic response cache when a sufficiently similar query
+    was answered under the current index version; otherwise runs the pipeline
+    and caches its response.
+
+    Returns: A dictionary containing the answer, source titles, agent decision
+    and whether it was served from the cache.
+    """
+    query_flights = (await aget_clients()).query_flights
+    with request_deadline(_budget(budget_seconds)):
+        if query_flights is None:
+            response = await _run_agent(query, metadata_filter)
+        else:
+            # The flight inherits the deadline of the caller that starts it.
+            key = f"{normalize_query(query)}\x00{filter_key(metadata_filter)}"
+            response = dict(await query_flights.do(key, lambda: _run_agent(query, metadata_filter)))
+
+    record_query(detect_intent(query)[0], response["agent_decision"], response["cached"])
+    return response
+
+
+async def _run_agent(query: str, metadata_filter: Optional[dict] = None) -> Dict:
+    """
+    Cache lookup, pipeline and cache store for a single query (see run_agent).
+    """
+    cache = get_clients().response_cache
+    if cache is None:
+        return {**await _run_pipeline(query, metadata_filter), "cached": False}
+
+    query_vector, index_version, namespace = await _cache_key(query, metadata_filter)
+
+    cached_response = cache.lookup(query_vector, index_version, namespace=namespace)
+    if cached_response is not None:
+        return {**cached_response, "cached": True}
+
+    response = await _run_pipeline(query, metadata_filter, query_vector)
+    if not response.get("degraded"):
+        cache.store(query_vector, response, index_version, namespace=namespace)
+    return {**response, "cached": False}
+
+
+async def stream_agent(
+    query: str, budget_seconds: float = None, metadata_filter: Optional[dict] = None
+) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Streaming counterpart of run_agent (same latency budget and metadata filter).
+
+    Yields (event, data) pairs:
+    - ("retrieval", {documents_used, agent_decision}) as soon as documents are selected,
+    - ("token", {text}) for each chunk of the answer as the LLM generates it,
+    - ("done", full response) with the same fields as run_agent.
+
+    A cache hit is replayed as the same events, with the whole answer in one token event.
+    """
+    await aget_clients()
+    with request_deadline(_budget(budget_seconds)):
+        async for event in _stream_agent(query, metadata_filter):
+            yield event
+
+
+async def _stream_agent(query: str, metadata_filter: Optional[dict] = None) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Events of stream_agent (runs under its deadline).
+    """
+    cache = get_clients().response_cache
+    if cache is not None:
+        query_vector, index_version, namespace = await _cache_key(query, metadata_filter)
+        cached_response = cache.lookup(query_vector, index_version, namespace=namespace)
+        if cached_response is not None:
+            yield "retrieval", {
+                "documents_used": cached_response["documents_used"],
+                "agent_decision": cached_response["agent_decision"],
+            }
+            yield "token", {"text": cached_response["answer"]}
+            yield "done", {**cached_response, "cached": True}
+            record_query(detect_intent(query)[0], cached_response["agent_decision"], True)
+            return
+
+    plan = await _plan(query, metadata_filter, query_vector if cache is not None else None)
+    yield "retrieval", {"documents_used": plan["documents_used"], "agent_decision": plan["agent_decision"]}
+
+    degraded = None
+    if not plan["docs"]:
+        answer = INSUFFICIENT_CONTEXT_ANSWER
+        yield "token", {"text": answer}
+    else:
+        parts = []
+        try:
+            async with _generation_slot():
+                async for chunk in stream_answer(
+                    query=query,
+                    retrieved_docs=plan["docs"],
+                    intent=plan["intent"],
+                    agent_decision=plan["agent_decision"]
+                ):
+                    parts.append(chunk)
+                    yield "token", {"text": chunk}
+        except Overloaded:
+            # Raised while waiting for a slot, i.e. before any token was sent.
+            if not settings.degraded_mode:
+                raise
+            degraded = _degraded_response(plan)
+            yield "token", {"text": degraded["answer"]}
+        answer = "".join(parts)
+
+    if degraded is not None:
+        response = degraded
+    else:
+        response = {
+            "answer": answer,
+            "documents_used": plan["documents_used"],
+            "agent_decision": plan["agent_decision"]
+        }
+        if cache is not None:
+            cache.store(query_vector, response, index_version, namespace=namespace)
+    yield "done", {**response, "cached": False}
+    record_query(plan["intent"], response["agent_decision"], False)
+
+
+async def run_agent_batch(queries: List[str], metadata_filters: List[Optional[dict]] = None) -> List[Dict]:
+    """
+    Answers many queries at once, in order.
+
+    `metadata_filters` optionally gives each query its own metadata filter
+    (same order as `queries`; None entries search the whole index).
+
     Workflow:
-    1. Retrieves relevant documents from the vector store.
-    2. Analyzes the query to detect 'intent' (e.g., comparison vs explanation).
-    3. Selects the appropriate documents based on the detected intent.
-    4. Generates a grounded answer using the LLM.
-    
-    Returns: A dictionary containing the answer, source titles, and agent decision.
+    1. Embeds every query with a single `embed_documents` call.
+    2. Serves queries from the response cache where possible and runs the vector
+       searches for the rest in parallel.
+    3. Generates answers with at most `batch_generation_concurrency` LLM calls in flight.
+
+    A failing query does not fail the batch.
+
+    Returns: One dictionary per query: {"response": {...}} on success or {"error": "..."}.
+    """
+    clients = await aget_clients()
+    metadata_filters = metadata_filters or [None] * len(queries)
+    results: List[Dict] = [None] * len(queries)
+    pending = []
+    for i, query in enumerate(queries):
+        if query.strip():
+            pending.append(i)
+        else:
+            results[i] = {"error": "Query cannot be empty"}
+    if not pending:
+        return results
+
+    try:
+        with stage_timer("embed"):
+            vectors = await clients.embeddings.aembed_documents([normalize_query(queries[i]) for i in pending])
+    except Exception as e:
+        logger.error(f"Batch embedding failed: {e}", exc_info=True)
+        for i in pending:
+            results[i] = {"error": f"Failed to embed query ({type(e).__name__})"}
+        return results
+
+    cache = clients.response_cache
+    index_version = get_index_version()
+    generation_slots = asyncio.Semaphore(settings.batch_generation_concurrency)
+
+    async def answer(query: str, query_vector: List[float], metadata_filter: Optional[dict]) -> Dict:
+        namespace = _cache_namespace(detect_intent(query)[0], metadata_filter)
+        if cache is not None:
+            cached_response = cache.lookup(query_vector, index_version, namespace=namespace)
+            if cached_response is not None:
+                return {**cached_response, "cached": True}
+
+        plan = _select_docs(query, await retrieve_by_vector(query, query_vector, metadata_filter))
+        response = await _answer(query, plan, generation_slots)
+        if cache is not None and not response.get("degraded"):
+            cache.store(query_vector, response, index_version, namespace=namespace)
+        return {**response, "cached": False}
+
+    outcomes = await asyncio.gather(
+        *(answer(queries[i], vector, metadata_filters[i]) for i, vector in zip(pending, vectors)),
+        return_exceptions=True
+    )
+    for i, outcome in zip(pending, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Batch query {i} failed: {outcome}", exc_info=outcome)
+            results[i] = {"error": f"Failed to answer query ({type(outcome).__name__})"}
+        else:
+            results[i] = {"response": outcome}
+            record_query(detect_intent(queries[i])[0], outcome["agent_decision"], outcome["cached"])
+    return results
+
+
+def _select_docs(query: str, retrieved_docs: List) -> Dict:
     """
+    Decision logic: selects the documents to answer from based on the query intent.
 
-    retrieved_docs = retrieve_relevant_docs(query)
+    Returns: A dictionary with the intent, agent decision, selected documents
+    ("docs", empty when nothing was retrieved) and their titles.
+    """
+    intent, agent_decision = detect_intent(query)
 
     if not retrieved_docs:
         return {
-            "answer": "I don’t have enough information in my knowledge base.",
-            "documents_used": [],
-            "agent_decision": "insufficient_context"
+            "intent": intent,
+            "agent_decision": "insufficient_context",
+            "docs": [],
+            "documents_used": []
         }
-    
-    query_lower = query.lower()
-    
-    # Define comparison keywords
-    comparison_keywords = ["compare", "difference", "vs", "versus"]
-    is_comparison = any(kw in query_lower for kw in comparison_keywords)
 
-    # Decision Logic: Determine intent and select documents
-    if is_comparison:
-        intent = "comparison"
-        agent_decision = "combined_multiple_docs"
+    # Select documents based on the detected intent
+    if intent == "comparison":
         selected_titles = search_docs(query, retrieved_docs)
         docs_to_use = [
             doc for doc in retrieved_docs
             if get_title(doc) in selected_titles
         ]
     else:
-        # Default fallback is 'explanation'
-        intent = "explanation"
-        agent_decision = "answered_using_retrieved_context"
         selected_titles = [get_title(retrieved_docs[0])]
         docs_to_use = [retrieved_docs[0]]
 
+    return {
+        "intent": intent,
+        "agent_decision": agent_decision,
+        "docs": docs_to_use,
+        "documents_used": selected_titles
+    }
+
+
+async def _plan(
+    query: str, metadata_filter: Optional[dict] = None, query_vector: Optional[List[float]] = None
+) -> Dict:
+    """
+    Retrieval and decision logic for a single query (everything before generation).
+
+    Workflow:
+    1. Retrieves relevant documents from the vector store (only chunks
+       matching `metadata_filter`, if given), searching with `query_vector`
+       when the query was already embedded (response-cache lookup).
+    2. Detects the query 'intent' (e.g., comparison vs explanation) and selects
+       the appropriate documents (see _select_docs).
+
+    Returns: The plan produced by _select_docs.
+    """
+
+    if query_vector is not None:
+        retrieved_docs = await retrieve_by_vector(query, query_vector, metadata_filter)
+    else:
+        retrieved_docs = await retrieve_relevant_docs(query, metadata_filter)
+    return _select_docs(query, retrieved_docs)
+
+
+def _generation_slot():
+    """
+    Admission to generation: a slot of the shared limiter (raises Overloaded
+    when shed), or a no-op when admission control is disabled.
+    """
+    limiter = get_clients().generation_limiter
+    return limiter.slot() if limiter is not None else contextlib.nullcontext()
+
+
+def _degraded_response(plan: Dict) -> Dict:
+    """
+    Response for a query shed by admission control in degraded mode: the
+    selected context and its sources, without generation.
+    """
+    return {
+        "answer": get_retrive(plan["docs"]),
+        "documents_used": plan["documents_used"],
+        "agent_decision": DEGRADED_DECISION,
+        "degraded": True
+    }
+
+
+async def _answer(query: str, plan: Dict, generation_slots: asyncio.Semaphore = None) -> Dict:
+    """
+    Generates the grounded answer for a plan.
+
+    Parameters:
+    - generation_slots: Optional semaphore bounding concurrent LLM calls (per batch;
+      the process-wide admission limiter applies on top of it).
+
+    Returns: A dictionary containing the answer, source titles, and agent decision
+    (the degraded response if generation was shed and settings.degraded_mode is on).
+    Raises Overloaded if generation was shed and degraded mode is off.
+    """
+
+    if not plan["docs"]:
+        return {
+            "answer": INSUFFICIENT_CONTEXT_ANSWER,
+            "documents_used": [],
+            "agent_decision": plan["agent_decision"]
+        }
+
     # Generate answer using the orchestrated state
-    answer = generate_answer(
-        query=query,
-        retrieved_docs=docs_to_use,
-        intent=intent,
-        agent_decision=agent_decision
-    )
+    try:
+        async with generation_slots or contextlib.nullcontext(), _generation_slot():
+            answer = await generate_answer(
+                query=query,
+                retrieved_docs=plan["docs"],
+                intent=plan["intent"],
+                agent_decision=plan["agent_decision"]
+            )
+    except Overloaded:
+        if not settings.degraded_mode:
+            raise
+        return _degraded_response(plan)
 
     return {
         "answer": answer,
-        "documents_used": selected_titles,
-        "agent_decision": agent_decision
+        "documents_used": plan["documents_used"],
+        "agent_decision": plan["agent_decision"]
     }
+
+
+async def _run_pipeline(
+    query: str, metadata_filter: Optional[dict] = None, query_vector: Optional[List[float]] = None
+) -> Dict:
+    """
+    Retrieval, decision logic and generation for a single query.
+
+    Returns: A dictionary containing the answer, source titles, and agent decision.
+    """
+
+    return await _answer(query, await _plan(query, metadata_filter, query_vector))
@@ -0,0 +1,144 @@
+"""
+response_cache.py
+
+Semantic cache for complete agent responses.
+
+Near-identical questions ("what's RAG", "What is RAG?") embed to almost the
+same vector. This cache stores finished AgentQueryResponse payloads keyed by
+the query embedding and serves a new query from the cache when its cosine
+similarity to a cached query reaches a configurable threshold.
+
+This module provides:
+- SemanticResponseCache: Size-bounded (LRU) cache with index-version invalidation.
+
+Key considerations for developers:
+- Every entry belongs to one index version (see src.rag.index_version). When
+  the version changes (ingestion ran), all entries are dropped on the next access.
+- Vectors are stored L2-normalized in a preallocated float32 matrix, so a lookup
+  is one matrix-vector product over at most `max_size` rows.
+- The threshold should be high (default 0.95): below that, questions with
+  different meaning start to collide.
+- Entries can be partitioned by a namespace (the agent uses the detected intent),
+  so "RAG vs agents" never answers "RAG and agents" even if their vectors are close.
+"""
+
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class SemanticResponseCache:
+    """
+    Parameters:
+    - max_size (int): Maximum number of cached responses; the least recently
+      used entry is evicted when full.
+    - threshold (float): Minimum cosine similarity for a cache hit.
+    """
+
+    def __init__(self, max_size: int = 512, threshold: float = 0.95):
+        self.max_size = max_size
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._responses: List[Optional[Dict]] = [None] * max_size
+        self._namespaces = np.empty(max_size, dtype=object)
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._size = 0
+        self._clock = 0
+        self._version = ""
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, index_version: str) -> None:
+        # Caller holds the lock.
+        if index_version != self._version:
+            if self._size:
+                self.invalidations += 1
+            self._clear()
+            self._version = index_version
+
+    def _clear(self) -> None:
+        # Caller holds the lock.
+        self._responses = [None] * self.max_size
+        self._last_used[:] = 0
+        self._size = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        q = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    def lookup(self, vector: List[float], index_version: str, namespace: str = "") -> Optional[Dict]:
+        """
+        Return a copy of the cached response closest to `vector` within
+        `namespace`, or None.
+        """
+        with self._lock:
+            self._check_version(index_version)
+            if not self._size:
+                self.misses += 1
+                return None
+
+            scores = self._vectors[:self._size] @ self._normalize(vector)
+            scores[self._namespaces[:self._size] != namespace] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._clock += 1
+            self._last_used[best] = self._clock
+            self.hits += 1
+            return dict(self._responses[best])
+
+    def store(self, vector: List[float], response: Dict, index_version: str, namespace: str = "") -> None:
+        """
+        Cache `response` for the query embedded as `vector` under `namespace`.
+        """
+        with self._lock:
+            self._check_version(index_version)
+            q = self._normalize(vector)
+            if self._vectors is None or self._vectors.shape[1] != q.shape[0]:
+                self._vectors = np.zeros((self.max_size, q.shape[0]), dtype=np.float32)
+                self._clear()
+
+            if self._size < self.max_size:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+
+            self._clock += 1
+            self._vectors[slot] = q
+            self._responses[slot] = dict(response)
+            self._namespaces[slot] = namespace
+            self._last_used[slot] = self._clock
+
+    def invalidate(self) -> None:
+        """
+        Drop every cached response.
+        """
+        with self._lock:
+            if self._size:
+                self.invalidations += 1
+            self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return cache counters and the current hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
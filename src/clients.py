@@ -0,0 +1,266 @@
+"""
+clients.py
+
+Process-wide registry of the long-lived clients used by the RAG pipeline.
+
+Building the embedding client, the Pinecone index handle and the Gemini client
+is expensive: each one opens new HTTP sessions, performs TLS handshakes and (for
+Pinecone) resolves the index host through a describe-index call. This module
+creates them once, keeps their keep-alive connection pools warm, and lets every
+request borrow the same instances.
+
+This module provides:
+- ClientRegistry: Container for the embeddings, vector store, retriever and LLM.
+- init_clients() -> ClientRegistry: Builds the registry (called from the warmup step of the FastAPI lifespan).
+- get_clients() -> ClientRegistry: Returns the registry, building it on first use.
+- aget_clients() -> ClientRegistry: Async variant used by the agent's entry points;
+  builds a missing registry in a worker thread and opens its async sessions.
+- current_clients() -> Optional[ClientRegistry]: Returns the registry only if it already exists.
+- close_clients() -> None: Releases pooled connections on shutdown.
+- aclose_clients() -> None: Async variant that also closes the async index session.
+
+Notes for developers:
+- Pool sizes are configured through settings.http_pool_maxsize,
+  settings.http_pool_keepalive and settings.pinecone_pool_threads.
+- Scripts that call run_agent() directly do not need the lifespan hook;
+  aget_clients() lazily initializes and opens the registry. Building it blocks
+  (SDK imports, index handshakes), so it never runs on the event loop.
+- Remote SDKs (Pinecone, huggingface_hub, Gemini) are imported when the
+  clients are built, not when this module is imported.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+from src.config import settings
+from src.llm import get_llm
+from src.rag.embeddings import configure_http_pool, get_embeddings
+from src.rag.embedding_batcher import BatchingEmbeddings
+from src.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.agent.response_cache import SemanticResponseCache
+from src.helper.admission import AdmissionController
+from src.helper.singleflight import SingleFlight
+from src.rag.bm25 import ReloadingBM25Index, bm25_path
+from src.rag.index_version import get_index_version
+from src.rag.retriever import create_retriever
+from src.rag.vector_store import get_existing_vector_store, init_pinecone
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """
+    Holds the shared clients for the lifetime of the process.
+
+    Attributes:
+    - embeddings: Embedding client used for query vectors (wrapped in
+      BatchingEmbeddings unless settings.embedding_batch_window_ms is 0, then in
+      CachedEmbeddings unless settings.embedding_cache_size is 0).
+    - pinecone: Pinecone client owning the index connection pool (None for the local and memory backends).
+    - vector_store: Vector store bound to the configured index.
+    - retriever: Retriever built on top of the vector store (top_k and
+      retrieval_mode from settings; hybrid mode also queries the BM25 index).
+    - llm: Chat model used for answer generation.
+    - response_cache: Semantic cache of complete agent responses (None when disabled).
+    - query_flights: Coalesces identical in-flight agent queries (None when disabled).
+    - generation_limiter: Admission control around answer generation (None when
+      settings.llm_max_concurrency is 0).
+    """
+
+    def __init__(
+        self, embeddings, pinecone, vector_store, retriever, llm, response_cache=None, query_flights=None,
+        generation_limiter=None
+    ):
+        self.embeddings = embeddings
+        self.pinecone = pinecone
+        self.vector_store = vector_store
+        self.retriever = retriever
+        self.llm = llm
+        self.response_cache = response_cache
+        self.query_flights = query_flights
+        self.generation_limiter = generation_limiter
+        self._opened = False
+        self._open_lock = asyncio.Lock()
+
+    @classmethod
+    def create(cls) -> "ClientRegistry":
+        """
+        Build every client from settings with pooled keep-alive connections.
+        """
+        configure_http_pool(settings.http_pool_maxsize, settings.http_pool_keepalive)
+
+        logger.info(f"Initializing embeddings: {settings.embedding_model_name}...")
+        embeddings = get_embeddings(settings.embedding_model_name)
+        if settings.embedding_batch_window_ms > 0:
+            embeddings = BatchingEmbeddings(
+                embeddings,
+                window_seconds=settings.embedding_batch_window_ms / 1000,
+                max_batch_size=settings.embedding_batch_max_size
+            )
+        if settings.embedding_cache_size > 0:
+            cache = EmbeddingCache(
+                max_size=settings.embedding_cache_size,
+                ttl_seconds=settings.embedding_cache_ttl_seconds,
+                path=settings.embedding_cache_path,
+                max_disk_rows=settings.embedding_cache_disk_max_rows
+            )
+            embeddings = CachedEmbeddings(embeddings, settings.embedding_model_name, cache)
+
+        logger.info(f"Connecting to {settings.vector_store_backend} index: {settings.pinecone_index_name}...")
+        pc = None
+        bm25_index = None
+        if settings.vector_store_backend == "memory":
+            from src.fakes import build_memory_index
+            vector_store, bm25_index = build_memory_index(settings.data_path, embeddings)
+        else:
+            if settings.vector_store_backend == "pinecone":
+                pc = init_pinecone(settings.pinecone_api_key, pool_threads=settings.pinecone_pool_threads)
+            vector_store = get_existing_vector_store(settings.pinecone_index_name, embeddings, pc=pc)
+
+        retrieval_mode = settings.retrieval_mode
+        if retrieval_mode == "hybrid" and bm25_index is None:
+            path = bm25_path(settings.pinecone_index_name)
+            if os.path.exists(path):
+                bm25_index = ReloadingBM25Index(path, get_index_version)
+            else:
+                logger.warning(f"BM25 index not found at {path}; re-run ingestion to enable hybrid retrieval. Using vector search only.")
+                retrieval_mode = "vector"
+
+        logger.info(f"Creating {retrieval_mode} retriever (top_k={settings.top_k})...")
+        retriever = create_retriever(
+            vector_store, k=settings.top_k, mode=retrieval_mode, bm25_index=bm25_index,
+            fetch_k=settings.hybrid_fetch_k, rrf_k=settings.rrf_k,
+            min_score=settings.retrieval_min_score, max_score_gap=settings.retrieval_max_score_gap
+        )
+
+        llm = get_llm()
+
+        response_cache = None
+        if settings.response_cache_size > 0:
+            response_cache = SemanticResponseCache(
+                max_size=settings.response_cache_size,
+                threshold=settings.response_cache_threshold
+            )
+
+        query_flights = SingleFlight() if settings.query_coalescing else None
+
+        generation_limiter = None
+        if settings.llm_max_concurrency > 0:
+            generation_limiter = AdmissionController(
+                settings.llm_max_concurrency,
+                max_queue=settings.llm_max_queue,
+                max_queue_seconds=settings.llm_max_queue_seconds
+            )
+
+        return cls(embeddings, pc, vector_store, retriever, llm, response_cache, query_flights, generation_limiter)
+
+    async def aopen(self) -> None:
+        """
+        Open the vector store's async index session so async queries reuse it
+        instead of opening a new HTTP session per call (idempotent).
+        """
+        if self._opened:
+            return
+        async with self._open_lock:
+            if not self._opened:
+                if self.pinecone is not None:
+                    await self.vector_store.__aenter__()
+                self._opened = True
+
+    async def warmup(self) -> None:
+        """
+        Exercise the clients once before traffic arrives: a dummy embedding
+        (opens the embedding connection pool, loads a local model) and a vector
+        search (opens the index session). These samples show up in the stage
+        metrics like any other query.
+        """
+        vector = await self.embeddings.aembed_query("warmup")
+        await self.retriever.aget_relevant_documents_by_vector("warmup", vector)
+
+    def close(self) -> None:
+        """
+        Close pooled connections held by the clients.
+        """
+        if self.pinecone is not None:
+            self.vector_store.index.close()
+        if isinstance(self.embeddings, CachedEmbeddings):
+            self.embeddings.cache.close()
+        if "huggingface_hub" in sys.modules:
+            sys.modules["huggingface_hub"].close_session()
+
+    async def aclose(self) -> None:
+        """
+        Close the async index session, then the synchronous pools.
+        """
+        if self.pinecone is not None:
+            await self.vector_store.aclose()
+        self.close()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def init_clients() -> ClientRegistry:
+    """
+    Create the process-wide client registry (idempotent).
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry.create()
+            logger.info("✓ Client registry ready.")
+    return _registry
+
+
+def get_clients() -> ClientRegistry:
+    """
+    Return the shared client registry, creating it on first use.
+    """
+    if _registry is None:
+        return init_clients()
+    return _registry
+
+
+async def aget_clients() -> ClientRegistry:
+    """
+    Return the shared client registry with its async sessions open, building
+    it in a worker thread on first use so the event loop is never blocked.
+    """
+    registry = _registry
+    if registry is None:
+        registry = await asyncio.to_thread(init_clients)
+    await registry.aopen()
+    return registry
+
+
+def current_clients():
+    """
+    Return the shared client registry if it has been created, else None
+    (never creates it; used by the metrics collector).
+    """
+    return _registry
+
+
+def close_clients() -> None:
+    """
+    Close and drop the shared client registry.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
+
+
+async def aclose_clients() -> None:
+    """
+    Close and drop the shared client registry, including async sessions.
+    """
+    global _registry
+    registry = _registry
+    _registry = None
+    if registry is not None:
+        await registry.aclose()
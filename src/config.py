@@ -40,15 +40,96 @@ class Settings(BaseSettings):
     
     # RAG & Embeddings
     top_k: int = 4
+    retrieval_mode: str = "hybrid"  # "hybrid" (dense + BM25, reciprocal-rank fusion) or "vector" (dense only)
+    hybrid_fetch_k: int = 20  # Candidates taken from each search before fusion
+    rrf_k: int = 60  # Reciprocal-rank fusion constant
+    retrieval_min_score: float = 0.25  # Minimum cosine similarity; below it the agent skips the LLM
+    retrieval_max_score_gap: float = 0.15  # Adaptive k: cut results at a larger drop between scores (0 = off)
+    context_token_budget: int = 1500  # Approximate prompt-context limit after merging/deduplication (0 = unlimited)
     data_path: str = "data"
+    markdown_loader: str = "native"  # "native" (fast, heading-aware) or "unstructured"
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     huggingface_api_token: str = ""
+
+    # Local Embeddings (EMBEDDING_BACKEND=local; runs embedding_model_name in process)
+    local_embedding_runtime: str = "torch"  # "torch", "onnx" or "onnx-int8" (ONNX needs optimum[onnxruntime])
+    local_embedding_onnx_file: str = "onnx/model_qint8_avx512_vnni.onnx"  # Quantized export used by "onnx-int8"
+    local_embedding_threads: int = 2  # Intra-op threads for the model, leaving cores to request handling (0 = library default)
+    local_embedding_batch_size: int = 32  # Texts per forward pass
+
+    # Query Embedding Cache
+    embedding_cache_size: int = 1024  # In-memory LRU entries (0 disables the cache)
+    embedding_cache_ttl_seconds: float = 86400  # Entry lifetime in both tiers
+    embedding_cache_path: str = ""  # Optional SQLite file so the cache survives restarts
+    embedding_cache_disk_max_rows: int = 100000  # Rows kept in the SQLite file (oldest pruned first)
+
+    # Query Embedding Micro-batching
+    embedding_batch_window_ms: float = 5.0  # Concurrent query embeddings within this window share one request (0 disables)
+    embedding_batch_max_size: int = 32  # Queries that trigger an immediate send
     
     # Vector Store Settings
+    vector_store_backend: str = "pinecone"  # "pinecone" (remote), "local" (memory-mapped NumPy index) or "memory" (built from data_path at startup)
+    local_index_dir: str = "vector_index"  # Root directory for local indexes (one sub-directory per index name)
+    index_version_path: str = "vector_index/INDEX_VERSION"  # Bumped by ingestion; invalidates cached answers
     pinecone_api_key: str = ""
     pinecone_index_name: str = "genai-rag-agent"
     vector_dimension: int = 384  # Default for sentence-transformers/all-MiniLM-L6-v2
-    
+
+    # Ingestion Engine
+    chunk_size: int = 1000  # Maximum characters per chunk (see benchmarks/eval_retrieval.py to tune)
+    chunk_overlap: int = 200  # Characters shared by consecutive pieces of a long section
+    ingestion_parse_workers: int = 0  # Processes parsing/splitting files (0 = CPU count, 1 = inline)
+    ingestion_max_pending_files: int = 32  # Files parsed ahead of the embedding stage (backpressure)
+    embedding_batch_size: int = 64  # Chunks per embed_documents request
+    upsert_batch_size: int = 100  # Vectors per upsert request (Pinecone recommends <= 100)
+    ingestion_concurrency: int = 4  # Embedding/upsert batches in flight at once
+    ingestion_max_retries: int = 5  # Retries for 429/5xx/connection errors
+    ingestion_retry_base_delay: float = 1.0  # Seconds; doubled on every retry (with jitter)
+    snapshot_dtype: str = "float16"  # Embedding snapshot written by ingestion: "float16", "int8" or "" (disabled)
+
+    # Semantic Response Cache
+    response_cache_size: int = 512  # Cached agent responses (0 disables the cache)
+    response_cache_threshold: float = 0.95  # Minimum cosine similarity between queries for a cache hit
+    query_coalescing: bool = True  # Identical concurrent queries share one retrieval + generation
+
+    # Connection Pooling (shared clients created once per process)
+    http_pool_maxsize: int = 20  # Max open connections to the HuggingFace endpoint / Pinecone index
+    http_pool_keepalive: int = 10  # Idle keep-alive connections kept around for reuse
+    pinecone_pool_threads: int = 4  # Threads used by the Pinecone client for async requests
+
+    # Offline Stand-ins (benchmarks / CI without network access; see src/fakes.py)
+    embedding_backend: str = "huggingface"  # "huggingface" (remote endpoint), "local" (sentence-transformers in process) or "fake" (hashing)
+    llm_backend: str = "gemini"  # "gemini" or "fake" (canned answer after fake_llm_latency_seconds)
+    fake_embedding_latency_seconds: float = 0.0  # Simulated embedding round trip
+    fake_embedding_slow_fraction: float = 0.0  # Share of embedding requests that stall (simulated tail latency)
+    fake_embedding_slow_seconds: float = 1.0  # Extra latency of a stalled embedding request
+    fake_llm_latency_seconds: float = 0.5  # Simulated generation time
+    fake_llm_max_concurrency: int = 0  # Generations served at once, more wait (models a saturated quota; 0 = unlimited)
+
+    # Startup
+    startup_warmup: bool = True  # Build clients and run a dummy embedding + search in the background; /health/ready and queries wait for it (False: build clients before serving, no dummy calls)
+    warmup_retry_base_delay: float = 1.0  # Seconds before retrying a failed warmup; doubled on every retry (with jitter)
+
+    # Deadlines, Retries and Hedging (remote calls on the query path; see src/helper/deadline.py)
+    request_budget_seconds: float = 30.0  # Latency budget of one query; each stage gets what is left (0 = no budget)
+    embed_timeout_seconds: float = 2.0  # Per-attempt timeout of a query embedding
+    vector_search_timeout_seconds: float = 2.0  # Per-attempt timeout of a vector query
+    llm_timeout_seconds: float = 20.0  # Per-attempt timeout of a Gemini generation (whole stream when streaming)
+    remote_max_retries: int = 2  # Retries for 429/5xx/timeouts/connection errors while the budget allows
+    remote_retry_base_delay: float = 0.1  # Seconds; doubled on every retry (with jitter)
+    hedge_percentile: float = 95.0  # Duplicate an embedding/vector query still running at this latency percentile (0 disables)
+    hedge_min_samples: int = 50  # Latencies observed per stage before hedging starts
+
+    # Admission Control (bounds concurrent Gemini generations under overload)
+    llm_max_concurrency: int = 16  # Generations in flight per process (0 = unlimited, no admission control)
+    llm_max_queue: int = 64  # Requests allowed to wait for a generation slot; beyond that -> 429
+    llm_max_queue_seconds: float = 5.0  # Longest wait for a slot; beyond that -> 503
+    degraded_mode: bool = False  # When shed, answer with the retrieved context (no generation) instead of 429/503
+
+    # Batch Queries (/agent/query/batch)
+    batch_max_queries: int = 256  # Maximum queries accepted in one batch request
+    batch_generation_concurrency: int = 8  # Gemini generations in flight per batch
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -65,8 +146,6 @@ def get_settings() -> Settings:
         os.environ["HUGGINGFACE_API_TOKEN"] = s.huggingface_api_token
     return s
 
-# Global instance for easy access
+# Global instance for easy access (built at import: reading .env costs ~3 ms of the
+# ~0.6 s app import, see benchmarks.bench_import_time)
 settings = get_settings()
-
-
-
@@ -0,0 +1,220 @@
+"""
+fakes.py
+
+Offline stand-ins for the remote services (HuggingFace, Pinecone, Gemini).
+
+They let the whole API run without network access or credentials, which is
+what the load-test benchmark (benchmarks/load_test.py) and CI need. Each one is
+selected through Settings, so no code path changes:
+- EMBEDDING_BACKEND=fake      -> HashingEmbeddings
+- VECTOR_STORE_BACKEND=memory -> InMemoryVectorStore built from data/ at startup
+- LLM_BACKEND=fake            -> FakeChatModel
+
+This module provides:
+- HashingEmbeddings: Deterministic bag-of-words feature-hashing embeddings.
+- FakeChatModel: Chat model returning a canned answer after a configurable latency.
+- build_memory_index(data_path, embeddings, chunk_size, chunk_overlap) -> (InMemoryVectorStore, BM25Index):
+  Indexes the markdown corpus in process (also used by benchmarks/eval_retrieval.py).
+
+Key considerations for developers:
+- HashingEmbeddings vectors are unit length and texts sharing words get a
+  positive cosine similarity, so score gating and ranking behave plausibly.
+  Same text, same vector, on every machine.
+- Latencies are simulated with asyncio.sleep (time.sleep on sync paths), so
+  concurrency behaves like real network waits. HashingEmbeddings also caps
+  requests in flight at the HTTP pool size, like the real endpoint client, and
+  FakeChatModel can cap concurrent generations like a saturated Gemini quota.
+  A fraction of HashingEmbeddings requests can be made slow to model tail latency.
+- FakeChatModel reports usage_metadata (estimated tokens) so token metrics are exercised.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import random
+import time
+from itertools import groupby
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.vectorstores import InMemoryVectorStore
+from pydantic import PrivateAttr
+from src.config import settings
+from src.helper.context_builder import estimate_tokens
+from src.rag.bm25 import BM25Index, tokenize
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Parameters:
+    - size (int): Vector dimension.
+    - latency_seconds (float): Simulated round-trip time per embedding request.
+    - max_concurrency (int): Async requests in flight at once, like a client's
+      connection pool (0 = unlimited).
+    - slow_fraction (float): Share of async requests that take `slow_seconds`
+      longer (tail latency, e.g. a stalled connection).
+    - slow_seconds (float): Extra latency of a slow request.
+    """
+
+    def __init__(
+        self, size: int = 384, latency_seconds: float = 0.0, max_concurrency: int = 0,
+        slow_fraction: float = 0.0, slow_seconds: float = 1.0
+    ):
+        self.size = size
+        self.latency_seconds = latency_seconds
+        self.max_concurrency = max_concurrency
+        self.slow_fraction = slow_fraction
+        self.slow_seconds = slow_seconds
+        self._random = random.Random(0)  # Same tail on every run
+        self._semaphores = {}  # Event loop -> semaphore limiting async requests in flight
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in tokenize(text):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.size] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.max_concurrency:
+            loop = asyncio.get_running_loop()
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+            async with semaphore:
+                return await self._aembed(texts)
+        return await self._aembed(texts)
+
+    async def _aembed(self, texts: List[str]) -> List[List[float]]:
+        latency = self.latency_seconds
+        if self.slow_fraction and self._random.random() < self.slow_fraction:
+            latency += self.slow_seconds
+        if latency:
+            await asyncio.sleep(latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers after `latency_seconds` without calling any API.
+
+    Streaming spreads the latency over the answer's words. With
+    `max_concurrency`, async generations beyond it wait for a free slot first
+    (0 = unlimited).
+    """
+
+    latency_seconds: float = 0.5
+    max_concurrency: int = 0
+    answer: str = "Based on the provided context, this is a placeholder answer generated offline."
+    _semaphores: dict = PrivateAttr(default_factory=dict)  # Event loop -> semaphore limiting async generations
+
+    def _capacity(self):
+        if not self.max_concurrency:
+            return contextlib.nullcontext()
+        loop = asyncio.get_running_loop()
+        return self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _usage(self, messages: List[BaseMessage]) -> dict:
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        completion_tokens = estimate_tokens(self.answer)
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        message = AIMessage(content=self.answer, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages: List[BaseMessage]) -> List[ChatGenerationChunk]:
+        words = self.answer.split(" ")
+        chunks = [
+            ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            for i, word in enumerate(words)
+        ]
+        chunks[-1].message.usage_metadata = self._usage(messages)
+        return chunks
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._result(messages)
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any
+    ) -> ChatResult:
+        async with self._capacity():
+            await asyncio.sleep(self.latency_seconds)
+        return self._result(messages)
+
+    def _stream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        chunks = self._chunks(messages)
+        for chunk in chunks:
+            time.sleep(self.latency_seconds / len(chunks))
+            yield chunk
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        chunks = self._chunks(messages)
+        async with self._capacity():
+            for chunk in chunks:
+                await asyncio.sleep(self.latency_seconds / len(chunks))
+                yield chunk
+
+
+def build_memory_index(
+    data_path: str, embeddings: Embeddings, chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None
+) -> Tuple[InMemoryVectorStore, BM25Index]:
+    """
+    Load, split and index every markdown file under `data_path` in memory
+    (vectors plus the BM25 index used by hybrid retrieval).
+
+    chunk_size / chunk_overlap default to the ingestion settings.
+    """
+    # Imported here: doc_loader pulls in the splitter stack, only needed for this backend.
+    from src.rag.doc_loader import iter_markdown_chunks
+    from src.rag.manifest import assign_chunk_ids
+
+    chunk_stream = iter_markdown_chunks(
+        data_path,
+        chunk_size=settings.chunk_size if chunk_size is None else chunk_size,
+        chunk_overlap=settings.chunk_overlap if chunk_overlap is None else chunk_overlap,
+        workers=1,
+    )
+    chunks = []
+    for _, file_chunks in groupby(chunk_stream, key=lambda doc: doc.metadata.get("source")):
+        file_chunks = list(file_chunks)
+        assign_chunk_ids(file_chunks)
+        chunks.extend(file_chunks)
+
+    vector_store = InMemoryVectorStore(embeddings)
+    bm25_index = BM25Index()
+    if chunks:
+        vector_store.add_documents(chunks, ids=[doc.id for doc in chunks])
+        for doc in chunks:
+            bm25_index.add(doc.id, doc.page_content, doc.metadata)
+    return vector_store, bm25_index
@@ -6,25 +6,72 @@ using an LLM. It uses LangChain Expression Language (LCEL) to create a
 declarative chain that combines context, prompt, and model.
 
 Core Pipeline:
-RunnableParallel -> PromptTemplate -> ChatModel -> StrOutputParser
+RunnableParallel -> PromptTemplate -> ChatModel -> token usage metrics -> StrOutputParser
+
+The same chain is either awaited in full (generate_answer) or streamed chunk
+by chunk (stream_answer) for the Server-Sent Events endpoint.
+
+Generation is bounded by settings.llm_timeout_seconds and the request budget
+(src.helper.deadline); generate_answer also retries retryable errors (429/5xx)
+while the budget allows. Streams are never retried.
 """
 
-from typing import List, Dict
+import time
+from typing import AsyncIterator, List, Dict
 from src.prompt import prompt
-from src.llm import get_llm
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
+from src.clients import get_clients
+from langchain_core.runnables import RunnableGenerator, RunnableParallel, RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 from src.helper.utils import get_retrive
+from src.config import settings
+from src.helper.deadline import call_remote, iter_with_deadline
+from src.helper.metrics import observe_stage, record_token_usage, stage_timer
 
 # Shared output parser to convert LLM messages to clean strings
 str_parse = StrOutputParser()
 
-# Shared LLM instance
-llm = get_llm()
 
-def generate_answer(query: str, retrieved_docs: List[Dict], intent: str, agent_decision: str) -> str:
+def _record_usage(messages):
+    for message in messages:
+        record_token_usage(message)
+        yield message
+
+
+async def _arecord_usage(messages):
+    async for message in messages:
+        record_token_usage(message)
+        yield message
+
+
+# Pass-through step that counts prompt/completion tokens (streaming-safe)
+usage_recorder = RunnableGenerator(_record_usage, _arecord_usage)
+
+def build_rag_chain(retrieved_docs: List[Dict], intent: str, agent_decision: str):
+    """
+    Build the LCEL chain for one query; it is invoked with the query string.
+    """
+    with stage_timer("context"):
+        context = get_retrive(retrieved_docs)
+
+    parallel_chain=RunnableParallel({
+        'context': RunnableLambda(lambda x: context),
+        'query': RunnablePassthrough(),
+        'agent_decision':RunnableLambda(lambda x: agent_decision),
+        'intent': RunnableLambda(lambda x: intent)
+    })
+
+    # Shared LLM instance borrowed from the client registry
+    llm = get_clients().llm
+
+    return parallel_chain | prompt | llm | usage_recorder | str_parse
+
+
+async def generate_answer(query: str, retrieved_docs: List[Dict], intent: str, agent_decision: str) -> str:
     """
     Main entry point for generating a grounded answer.
+
+    The chain is awaited via `ainvoke`, so the Gemini call does not hold a
+    worker thread while the model is generating.
     
     Args:
         query: The user's question.
@@ -36,16 +83,27 @@ def generate_answer(query: str, retrieved_docs: List[Dict], intent: str, agent_d
         A formatted string answer from the LLM.
     """
 
-    context = get_retrive(retrieved_docs)
+    rag_chain = build_rag_chain(retrieved_docs, intent, agent_decision)
 
-    parallel_chain=RunnableParallel({
-        'context': RunnableLambda(lambda x: context),
-        'query': RunnablePassthrough(),
-        'agent_decision':RunnableLambda(lambda x: agent_decision),
-        'intent': RunnableLambda(lambda x: intent)
-    })
+    with stage_timer("llm"):
+        result=await call_remote("llm", lambda: rag_chain.ainvoke(query), settings.llm_timeout_seconds)
+    return result
 
-    rag_chain= parallel_chain | prompt | llm | str_parse
 
-    result=rag_chain.invoke(query)
-    return result
+async def stream_answer(query: str, retrieved_docs: List[Dict], intent: str, agent_decision: str) -> AsyncIterator[str]:
+    """
+    Streaming variant of generate_answer: yields answer text chunks as the LLM
+    produces them (same arguments as generate_answer).
+    """
+
+    rag_chain = build_rag_chain(retrieved_docs, intent, agent_decision)
+
+    started = time.perf_counter()
+    first_token = True
+    with stage_timer("llm"):
+        async for chunk in iter_with_deadline(rag_chain.astream(query), "llm", settings.llm_timeout_seconds):
+            if chunk:
+                if first_token:
+                    observe_stage("llm_first_token", time.perf_counter() - started)
+                    first_token = False
+                yield chunk
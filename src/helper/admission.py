@@ -0,0 +1,160 @@
+"""
+admission.py
+
+Admission control for LLM generation.
+
+Generation is the slow, rate-limited stage of every query. Without a bound,
+a Gemini slowdown lets in-flight requests pile up until clients time out and
+retry all at once. The controller admits at most `max_concurrency`
+generations, lets up to `max_queue` more wait in FIFO order for at most
+`max_queue_seconds`, and rejects everything else immediately, so latency
+stays bounded under overload and excess load is shed fast.
+
+This module provides:
+- Overloaded: Raised when a request is not admitted; carries the HTTP status
+  (429 queue full, 503 queue wait timed out) and a Retry-After estimate.
+- AdmissionController: FIFO concurrency limiter with a bounded wait queue.
+  Use `async with controller.slot(): ...`; counters via stats().
+
+Key considerations for developers:
+- Retry-After is estimated from the recent mean time a slot is held and the
+  current queue depth (clamped to 1-60 seconds), so clients back off longer
+  as the backlog grows instead of retrying together.
+- A waiter that is cancelled (client disconnected) leaves the queue; a slot
+  handed to it in the same instant is passed on to the next waiter.
+- The controller is shared by every request in the process (see
+  src.clients.ClientRegistry.generation_limiter).
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+
+class Overloaded(Exception):
+    """
+    The request was shed by admission control.
+
+    Attributes:
+    - reason (str): "queue_full" or "queue_timeout".
+    - status_code (int): 429 for "queue_full", 503 for "queue_timeout".
+    - retry_after (int): Suggested seconds before retrying.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Generation capacity exhausted ({reason}); retry after {retry_after}s")
+        self.reason = reason
+        self.status_code = 429 if reason == "queue_full" else 503
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Parameters:
+    - max_concurrency (int): Slots held at once (generations in flight).
+    - max_queue (int): Requests allowed to wait for a slot (0 = reject when all slots are busy).
+    - max_queue_seconds (float): Longest wait for a slot before rejecting.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0, max_queue_seconds: float = 5.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_seconds = max_queue_seconds
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._mean_hold_seconds = 0.0
+
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """
+        Estimated seconds until a new request would be admitted.
+        """
+        backlog = (self.queued + 1) / self.max_concurrency
+        return min(60, max(1, math.ceil(backlog * self._mean_hold_seconds)))
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected[reason] += 1
+        return Overloaded(reason, self.retry_after())
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting in the queue if needed; raise Overloaded if the
+        queue is full or the wait exceeds max_queue_seconds.
+        """
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        # No slot free (or others already waiting for one): queue up in FIFO order.
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_seconds)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                raise self._reject("queue_timeout") from None
+            # The slot was handed over as the wait ended: keep it.
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # The slot was handed over as the wait ended: pass it on
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        self.admitted += 1
+
+    def release(self, held_seconds: float = None) -> None:
+        """
+        Return a slot, handing it directly to the oldest waiter if there is one.
+        """
+        if held_seconds is not None:
+            # Exponential moving average of the service time (for Retry-After).
+            self._mean_hold_seconds += 0.1 * (held_seconds - self._mean_hold_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The slot moves to the waiter; _active is unchanged
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the block.
+        """
+        await self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return admission counters (in flight, queued, admitted, rejected by reason).
+        """
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected["queue_full"],
+            "rejected_queue_timeout": self.rejected["queue_timeout"],
+        }
@@ -0,0 +1,151 @@
+"""
+context_builder.py
+
+Builds the LLM context from retrieved chunks within a token budget.
+
+Chunks are split with overlap, so neighbouring chunks of the same file repeat
+text, and the comparison branch concatenates several documents with no size
+limit. This module shrinks the prompt without dropping information:
+1. Overlapping or adjacent chunks from the same source are merged into one
+   passage (using the `start_index` offsets recorded at ingestion, or the
+   longest suffix/prefix overlap for chunks without offsets).
+2. Sentences already present earlier in the context are removed.
+3. Passages are added best-first (retrieval order) until the token budget is
+   used; the last passage is truncated at a sentence boundary.
+
+This module provides:
+- estimate_tokens(text) -> int: Cheap token estimate (~4 characters per token).
+- merge_adjacent_chunks(docs) -> List[Document]: Step 1.
+- build_context(docs, token_budget) -> str: Steps 1-3; the context passed to the prompt.
+
+Notes for developers:
+- Token counts are estimates; Gemini's tokenizer is not available offline and
+  the budget only needs to be approximately right.
+- Passages are separated by a blank line, like the original get_retrive output.
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+from src.helper.utils import normalize_query
+
+CHARS_PER_TOKEN = 4
+MIN_TEXT_OVERLAP = 20  # Shortest suffix/prefix match treated as chunk overlap
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in `text`.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """
+    Length of the longest suffix of `left` that is a prefix of `right`.
+    """
+    for size in range(min(len(left), len(right)), MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_pair(left: Document, right: Document) -> Optional[str]:
+    """
+    Return the merged text of two chunks of one source, or None if they do not touch.
+    """
+    left_start = left.metadata.get("start_index")
+    right_start = right.metadata.get("start_index")
+    if left_start is not None and right_start is not None:
+        left_end = left_start + len(left.page_content)
+        if right_start > left_end + 2:  # Allow for the stripped blank line between chunks
+            return None
+        if right_start >= left_end:
+            return left.page_content + "\n\n" + right.page_content
+        overlap = left_end - right_start
+        return left.page_content + right.page_content[overlap:]
+
+    overlap = _text_overlap(left.page_content, right.page_content)
+    if overlap:
+        return left.page_content + right.page_content[overlap:]
+    return None
+
+
+def merge_adjacent_chunks(docs: List[Document]) -> List[Document]:
+    """
+    Merge overlapping or adjacent chunks from the same source into passages.
+
+    Passages are returned in the order of their best-ranked chunk.
+    """
+    by_source: Dict[str, List] = defaultdict(list)
+    for rank, doc in enumerate(docs):
+        by_source[doc.metadata.get("source", "Unknown")].append((rank, doc))
+
+    passages = []
+    for chunks in by_source.values():
+        chunks.sort(key=lambda item: (
+            item[1].metadata.get("start_index", item[1].metadata.get("chunk_index", item[0])),
+            item[0],
+        ))
+        rank, current = chunks[0]
+        for next_rank, doc in chunks[1:]:
+            merged = _merge_pair(current, doc)
+            if merged is None:
+                passages.append((rank, current))
+                rank, current = next_rank, doc
+                continue
+            current = Document(id=current.id, page_content=merged, metadata=dict(current.metadata))
+            rank = min(rank, next_rank)
+        passages.append((rank, current))
+
+    passages.sort(key=lambda item: item[0])
+    return [doc for _, doc in passages]
+
+
+def build_context(docs: List[Document], token_budget: int) -> str:
+    """
+    Build a deduplicated context of at most ~`token_budget` tokens (0 = unlimited).
+    """
+    seen = set()
+    parts = []
+    used = 0
+    exhausted = False
+
+    for passage in merge_adjacent_chunks(docs):
+        lines = []
+        for line in passage.page_content.splitlines():
+            kept = []
+            for sentence in _SENTENCE_END.split(line):
+                key = normalize_query(sentence)
+                if key in seen:
+                    continue
+                cost = estimate_tokens(sentence)
+                if token_budget and used + cost > token_budget:
+                    exhausted = True
+                    if not used:
+                        # Never return an empty context because the first sentence is too long.
+                        kept.append(sentence[:token_budget * CHARS_PER_TOKEN])
+                    break
+                if key:
+                    seen.add(key)
+                used += cost
+                kept.append(sentence)
+
+            # Lines whose sentences were all duplicates are dropped; blank lines are kept.
+            if kept or not line.strip():
+                lines.append(" ".join(kept))
+            if exhausted:
+                break
+
+        text = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+        if text:
+            parts.append(text)
+        if exhausted:
+            break
+
+    return "\n\n".join(parts)
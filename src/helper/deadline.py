@@ -0,0 +1,261 @@
+"""
+deadline.py
+
+Request deadlines, per-stage timeouts, retries and hedged requests for the
+remote calls on the query path (embedding endpoint, vector store, Gemini).
+
+A query gets one latency budget (settings.request_budget_seconds). Every
+remote call made on its behalf runs through call_remote(), which bounds each
+attempt by the stage timeout and by what is left of the budget, retries
+retryable failures (429/5xx, timeouts, connection errors) with jittered
+backoff while the budget allows, and can hedge: if an idempotent call has
+not returned by the stage's recent p95 latency, a second identical call is
+sent and the first result wins.
+
+This module provides:
+- DeadlineExceeded: Raised when the request budget runs out or a stage keeps
+  timing out (HTTP 504 in app.py).
+- request_deadline(budget_seconds): Context manager that sets the budget for
+  the current request (nested budgets keep the earlier deadline).
+- remaining() -> Optional[float]: Seconds left in the budget (None without one).
+- LatencyTracker: Rolling window of recent latencies with percentile lookup.
+- call_remote(stage, fn, timeout, ...) -> Any: Runs `fn()` (a coroutine
+  factory) with the deadline, retry and hedging policy.
+- iter_with_deadline(stream, stage, timeout) -> AsyncIterator: Bounds a
+  stream (e.g., LLM tokens) by the stage timeout and the budget.
+
+Key considerations for developers:
+- The deadline lives in a context variable, so it follows the request into
+  tasks it starts (coalesced flights, hedged calls).
+- Only hedge idempotent reads (query embeddings, vector queries). Hedging
+  after the p95 point sends at most ~5% extra requests by construction, and
+  hedging starts only after settings.hedge_min_samples latencies were seen.
+- Streams are never retried (tokens may already have been sent).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional
+from src.config import settings
+from src.helper.metrics import REMOTE_HEDGES, REMOTE_RETRIES, REMOTE_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    A remote call did not finish within the request budget or its stage timeout.
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during '{stage}'")
+        self.stage = stage
+
+
+@contextmanager
+def request_deadline(budget_seconds: float) -> Iterator[None]:
+    """
+    Give the current request `budget_seconds` to finish (0 or None = no budget).
+    """
+    deadline = _deadline.get()
+    if budget_seconds:
+        candidate = time.monotonic() + budget_seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left in the current request's budget (None when there is no budget).
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class LatencyTracker:
+    """
+    Keeps the last `window` latencies of a stage.
+
+    Parameters:
+    - window (int): Samples kept.
+    """
+
+    def __init__(self, window: int = 512):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Nearest-rank percentile of the window (None when empty).
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+
+
+def latency_tracker(stage: str) -> LatencyTracker:
+    """
+    Return the shared latency tracker of a stage.
+    """
+    return _trackers.setdefault(stage, LatencyTracker())
+
+
+def hedge_delay(stage: str) -> Optional[float]:
+    """
+    Seconds after which a stage's call is hedged (its recent p95), or None
+    while hedging is disabled or there are too few samples.
+    """
+    tracker = latency_tracker(stage)
+    if not settings.hedge_percentile or len(tracker) < settings.hedge_min_samples:
+        return None
+    return tracker.percentile(settings.hedge_percentile)
+
+
+def _attempt_timeout(stage: str, timeout: float) -> float:
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(stage)
+    return min(timeout, left)
+
+
+async def _cancel(tasks) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _hedged(stage: str, fn: Callable[[], Awaitable[Any]], timeout: float, hedge_after: float) -> Any:
+    """
+    One attempt: start `fn()`, start a second `fn()` after `hedge_after`
+    seconds if the first has not finished, return the first success.
+    """
+    tasks = [asyncio.ensure_future(fn())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            REMOTE_HEDGES.labels(stage).inc()
+            tasks.append(asyncio.ensure_future(fn()))
+
+        loop_deadline = time.monotonic() + timeout - hedge_after
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, loop_deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        await _cancel([task for task in tasks if not task.done()])
+
+
+async def call_remote(
+    stage: str,
+    fn: Callable[[], Awaitable[Any]],
+    timeout: float,
+    max_retries: int = None,
+    base_delay: float = None,
+    hedge: bool = False,
+) -> Any:
+    """
+    Await `fn()` under the request deadline, with per-attempt timeouts,
+    retries and optional hedging.
+
+    Parameters:
+    - stage (str): Stage name for metrics and latency tracking (e.g., "embed").
+    - fn (callable): Returns a new awaitable for each attempt.
+    - timeout (float): Per-attempt timeout in seconds (capped by the remaining budget).
+    - max_retries (int): Retries of retryable errors (default: settings.remote_max_retries).
+    - base_delay (float): Backoff base delay (default: settings.remote_retry_base_delay).
+    - hedge (bool): Send a second call after the stage's recent p95 latency.
+
+    Raises DeadlineExceeded when the budget runs out or the last attempt timed
+    out, otherwise the last error.
+    """
+    max_retries = settings.remote_max_retries if max_retries is None else max_retries
+    base_delay = settings.remote_retry_base_delay if base_delay is None else base_delay
+    tracker = latency_tracker(stage)
+
+    for attempt in range(max_retries + 1):
+        attempt_timeout = _attempt_timeout(stage, timeout)
+        hedge_after = hedge_delay(stage) if hedge else None
+        started = time.monotonic()
+        try:
+            if hedge_after is not None and hedge_after < attempt_timeout:
+                result = await _hedged(stage, fn, attempt_timeout, hedge_after)
+            else:
+                result = await asyncio.wait_for(fn(), attempt_timeout)
+            tracker.observe(time.monotonic() - started)
+            return result
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Imported here: src.helper.retry pulls in httpx, which app.py (importing
+            # this module for DeadlineExceeded) must not pay for at startup.
+            from src.helper.retry import backoff_delay, is_retryable
+
+            timed_out = isinstance(e, asyncio.TimeoutError)  # Not a builtin TimeoutError before Python 3.11
+            if timed_out:
+                REMOTE_TIMEOUTS.labels(stage).inc()
+            left = remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(stage) from e
+            if attempt == max_retries or not (timed_out or is_retryable(e)):
+                if timed_out:
+                    raise DeadlineExceeded(stage) from e
+                raise
+            delay = backoff_delay(attempt, base_delay)
+            if left is not None and delay >= left:
+                raise DeadlineExceeded(stage) from e
+            REMOTE_RETRIES.labels(stage).inc()
+            logger.warning(f"Retryable error in {stage} ({type(e).__name__}: {e}); retrying in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+
+
+async def iter_with_deadline(stream: AsyncIterator, stage: str, timeout: float) -> AsyncIterator:
+    """
+    Yield from `stream`, failing if the whole stream takes longer than `timeout`
+    or outlives the request budget.
+    """
+    stream_deadline = time.monotonic() + _attempt_timeout(stage, timeout)
+    iterator = stream.__aiter__()
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), max(0.0, stream_deadline - time.monotonic()))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError as e:
+                REMOTE_TIMEOUTS.labels(stage).inc()
+                raise DeadlineExceeded(stage) from e
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
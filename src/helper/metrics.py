@@ -0,0 +1,226 @@
+"""
+metrics.py
+
+Prometheus metrics and per-request stage timings for the agent pipeline.
+
+This module provides:
+- stage_timer(stage): Context manager that records a stage's duration in the
+  `rag_stage_duration_seconds` histogram, counts its errors, and adds it to the
+  current request's Server-Timing entries.
+- observe_stage(stage, seconds): Same, for durations measured by the caller.
+- start_request_timings() / server_timing_header(timings): Per-request timing
+  collection used by the HTTP middleware in app.py.
+- record_query(intent, agent_decision, cached): Counts answered queries.
+- record_token_usage(message): Counts prompt/completion tokens from an AIMessage.
+- render_metrics() -> (bytes, content_type): The /metrics payload.
+
+Metric names:
+- rag_stage_duration_seconds{stage}: embed, vector_search, lexical_search,
+  retrieve, context, llm, llm_first_token (histogram).
+- rag_stage_errors_total{stage}: Exceptions raised inside a stage.
+- rag_agent_queries_total{intent, agent_decision, cached}: Answered queries.
+- rag_llm_tokens_total{kind}: Prompt and completion tokens reported by Gemini.
+- rag_http_requests_total{path, method, status}: HTTP requests handled.
+- rag_http_request_duration_seconds{path, phase}: HTTP latency until the
+  response starts (phase="first_byte", the time to first byte of a stream) and
+  until its body has been sent (phase="complete").
+- rag_cache_*: Embedding cache, response cache and query-coalescing counters.
+- rag_embedding_batches_total / rag_embedding_batched_queries_total: Query
+  micro-batching (queries / batches = mean batch size).
+- rag_remote_retries_total{stage} / rag_remote_hedges_total{stage} / rag_remote_timeouts_total{stage}:
+  Retries, hedged (duplicate) calls and timed-out attempts of remote calls (see src.helper.deadline).
+- rag_generation_in_flight / rag_generation_queued / rag_generation_admission_total{result}:
+  Admission control around generation (admitted, queue_full, queue_timeout).
+
+Key considerations for developers:
+- Recording a sample is a lock plus an addition. Cache statistics are not
+  tracked on the hot path at all: they are read from the caches' own stats()
+  only when /metrics is scraped.
+- Stage timings are collected through a context variable, so they follow the
+  request into tasks it starts (e.g., retrieval started with create_task).
+- Streaming responses send headers before generation runs, so their
+  Server-Timing header only covers stages finished before the first byte.
+  Their stage histograms and the phase="complete" HTTP latency are recorded
+  when the stream ends.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Latency buckets from 1 ms (cache hits, BM25) to 30 s (slow Gemini completions).
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "Duration of each agent pipeline stage.", ["stage"], buckets=_LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter("rag_stage_errors_total", "Exceptions raised inside a pipeline stage.", ["stage"])
+AGENT_QUERIES = Counter(
+    "rag_agent_queries_total", "Answered agent queries.", ["intent", "agent_decision", "cached"]
+)
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens reported by the model.", ["kind"])
+REMOTE_RETRIES = Counter("rag_remote_retries_total", "Retried remote calls.", ["stage"])
+REMOTE_HEDGES = Counter("rag_remote_hedges_total", "Hedged (duplicate) remote calls sent.", ["stage"])
+REMOTE_TIMEOUTS = Counter("rag_remote_timeouts_total", "Remote call attempts that timed out.", ["stage"])
+HTTP_REQUESTS = Counter("rag_http_requests_total", "HTTP requests handled.", ["path", "method", "status"])
+HTTP_SECONDS = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency until the response starts (first_byte) or its body is sent (complete).",
+    ["path", "phase"], buckets=_LATENCY_BUCKETS
+)
+
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def observe_stage(stage: str, elapsed: float) -> None:
+    """
+    Record a stage duration measured by the caller (in seconds).
+    """
+    STAGE_SECONDS.labels(stage).observe(elapsed)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, elapsed))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Time a pipeline stage (see the module docstring for the recorded metrics).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    """
+    Start collecting stage timings for the current request and return the list they go to.
+    """
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """
+    Format stage timings as a Server-Timing header value (durations in ms,
+    summed per stage, e.g. for batch requests).
+    """
+    totals: Dict[str, float] = defaultdict(float)
+    for stage, elapsed in timings:
+        totals[stage] += elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+
+def record_query(intent: str, agent_decision: str, cached: bool) -> None:
+    """
+    Count one answered query.
+    """
+    AGENT_QUERIES.labels(intent, agent_decision, str(bool(cached)).lower()).inc()
+
+
+def record_token_usage(message) -> None:
+    """
+    Count prompt/completion tokens from an AIMessage (or streamed chunk) if the
+    model reported usage.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        LLM_TOKENS.labels("prompt").inc(usage.get("input_tokens", 0))
+        LLM_TOKENS.labels("completion").inc(usage.get("output_tokens", 0))
+
+
+class _CacheCollector:
+    """
+    Exposes cache, coalescing, embedding-batching and admission statistics at scrape time.
+    """
+
+    def describe(self):
+        # Nothing to pre-declare; avoids a collect() (and a src.clients import) at registration.
+        return []
+
+    def collect(self):
+        from src.clients import current_clients
+        from src.rag.embedding_batcher import BatchingEmbeddings
+
+        clients = current_clients()
+        if clients is None:
+            return
+
+        caches = {}
+        embedding_cache = getattr(clients.embeddings, "cache", None)
+        if embedding_cache is not None:
+            caches["embedding"] = embedding_cache.stats()
+        if clients.response_cache is not None:
+            caches["response"] = clients.response_cache.stats()
+
+        lookups = CounterMetricFamily("rag_cache_lookups", "Cache lookups by result.", labels=["cache", "result"])
+        hit_rate = GaugeMetricFamily("rag_cache_hit_rate", "Cache hit rate since startup.", labels=["cache"])
+        size = GaugeMetricFamily("rag_cache_entries", "Entries currently cached.", labels=["cache"])
+        for name, stats in caches.items():
+            lookups.add_metric([name, "hit"], stats["hits"])
+            lookups.add_metric([name, "miss"], stats["misses"])
+            hit_rate.add_metric([name], stats["hit_rate"])
+            size.add_metric([name], stats["size"])
+        yield lookups
+        yield hit_rate
+        yield size
+
+        batcher = clients.embeddings
+        while batcher is not None and not isinstance(batcher, BatchingEmbeddings):
+            batcher = getattr(batcher, "embeddings", None)  # Unwrap CachedEmbeddings
+        if batcher is not None:
+            batching = batcher.stats()
+            batches = CounterMetricFamily(
+                "rag_embedding_batches", "Query-embedding requests sent by the micro-batcher."
+            )
+            batches.add_metric([], batching["batches"])
+            batched = CounterMetricFamily("rag_embedding_batched_queries", "Query embeddings sent through the micro-batcher.")
+            batched.add_metric([], batching["queries"])
+            yield batches
+            yield batched
+
+        if clients.query_flights is not None:
+            flights = clients.query_flights.stats()
+            coalesced = CounterMetricFamily(
+                "rag_query_coalescing", "Agent queries executed vs. served by an identical in-flight query.",
+                labels=["result"]
+            )
+            coalesced.add_metric(["executed"], flights["executed"])
+            coalesced.add_metric(["coalesced"], flights["coalesced"])
+            yield coalesced
+
+        if clients.generation_limiter is not None:
+            admission = clients.generation_limiter.stats()
+            in_flight = GaugeMetricFamily("rag_generation_in_flight", "Generations currently holding a slot.")
+            in_flight.add_metric([], admission["in_flight"])
+            queued = GaugeMetricFamily("rag_generation_queued", "Requests waiting for a generation slot.")
+            queued.add_metric([], admission["queued"])
+            decisions = CounterMetricFamily(
+                "rag_generation_admission", "Admission decisions for generation.", labels=["result"]
+            )
+            decisions.add_metric(["admitted"], admission["admitted"])
+            decisions.add_metric(["queue_full"], admission["rejected_queue_full"])
+            decisions.add_metric(["queue_timeout"], admission["rejected_queue_timeout"])
+            yield in_flight
+            yield queued
+            yield decisions
+
+
+REGISTRY.register(_CacheCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Return the Prometheus text exposition of all metrics and its content type.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
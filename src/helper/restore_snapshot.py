@@ -0,0 +1,115 @@
+"""
+restore_snapshot.py
+
+Script to load a vector store from an embedding snapshot without re-embedding.
+
+This is a setup script that:
+1. Opens the snapshot written by ingestion (src.rag.snapshot) and checks that
+   it was embedded with the configured model.
+2. Creates the target vector store (settings.vector_store_backend or --backend)
+   and optionally clears it.
+3. Upserts the snapshot vectors in concurrent, retried batches.
+4. Writes the manifest and BM25 index for the restored corpus and bumps the
+   index version, so a later store_index run is incremental from here.
+
+Usage:
+python -m src.helper.restore_snapshot
+python -m src.helper.restore_snapshot --backend local --clear
+python -m src.helper.restore_snapshot --snapshot backups/genai-rag-agent.snapshot --backend pinecone
+
+Notes for developers:
+- No embedding endpoint is called; restoring is bounded by upsert throughput.
+- Snapshot vectors are quantized (float16/int8): restored vectors differ from
+  the originals by far less than ranking can notice, but they are not bit-identical.
+- --force restores a snapshot from another embedding model anyway (e.g., to
+  inspect it); queries embedded with the configured model will not match it.
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.config import settings
+from src.helper.retry import call_with_retries
+from src.rag.bm25 import BM25Index, bm25_path
+from src.rag.embeddings import get_embeddings
+from src.rag.index_version import bump_index_version
+from src.rag.ingestion import finish_upserts, upsert_embeddings
+from src.rag.manifest import IndexManifest, manifest_path
+from src.rag.snapshot import EmbeddingSnapshot, snapshot_path
+from src.rag.vector_store import create_vector_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def restore(path: str, clear: bool = False, force: bool = False) -> int:
+    """
+    Upsert every chunk of the snapshot at `path` into the configured vector store.
+
+    Returns:
+    - int: Number of chunks restored.
+    """
+    snapshot = EmbeddingSnapshot(path)
+    if snapshot.embedding_model != settings.embedding_model_name and not force:
+        raise ValueError(
+            f"Snapshot was embedded with '{snapshot.embedding_model}', but the configured model is "
+            f"'{settings.embedding_model_name}' (pass --force to restore anyway)."
+        )
+
+    # Never called: an empty chunk list only creates/opens the index.
+    embeddings = get_embeddings(settings.embedding_model_name)
+    vector_store = create_vector_store([], embeddings, settings.pinecone_index_name)
+    if clear:
+        vector_store.delete(delete_all=True)
+
+    def upsert(batch):
+        documents, vectors = batch
+        call_with_retries(
+            upsert_embeddings, vector_store, documents, vectors.tolist(),
+            max_retries=settings.ingestion_max_retries, base_delay=settings.ingestion_retry_base_delay
+        )
+
+    with ThreadPoolExecutor(max_workers=settings.ingestion_concurrency) as pool:
+        list(pool.map(upsert, snapshot.batches(settings.upsert_batch_size)))
+    finish_upserts(vector_store)
+
+    manifest = IndexManifest(manifest_path(settings.pinecone_index_name))
+    manifest.replace_entries(
+        {doc_id: metadata.get("source", "Unknown") for doc_id, metadata in zip(snapshot.ids, snapshot.metadatas)},
+        {metadata.get("source", "Unknown"): metadata.get("updated_at") for metadata in snapshot.metadatas},
+    )
+    manifest.save()
+
+    lexical_index = BM25Index()
+    for doc_id, text, metadata in zip(snapshot.ids, snapshot.texts, snapshot.metadatas):
+        lexical_index.add(doc_id, text, metadata)
+    lexical_index.save(bm25_path(settings.pinecone_index_name))
+
+    bump_index_version()
+    return len(snapshot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore the vector store from an embedding snapshot.")
+    parser.add_argument("--snapshot", default="", help="Snapshot file (default: the index's snapshot in local_index_dir).")
+    parser.add_argument("--backend", default="", help="Vector store backend to restore into (local or pinecone; default: settings).")
+    parser.add_argument("--clear", action="store_true", help="Delete all vectors in the target index first.")
+    parser.add_argument("--force", action="store_true", help="Restore even if the snapshot's embedding model differs.")
+    args = parser.parse_args()
+
+    if args.backend:
+        settings.vector_store_backend = args.backend
+    path = args.snapshot or snapshot_path(settings.pinecone_index_name)
+
+    logger.info(f"--- Snapshot Restore Started ({path} -> {settings.vector_store_backend}) ---")
+    started = time.perf_counter()
+    try:
+        count = restore(path, clear=args.clear, force=args.force)
+        logger.info(f"✓ Restored {count} chunks in {time.perf_counter() - started:.1f}s without re-embedding.")
+    except Exception as e:
+        logger.error(f"Failed to restore snapshot: {e}", exc_info=True)
+
+if __name__ == "__main__":
+    main()
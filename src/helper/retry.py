@@ -0,0 +1,73 @@
+"""
+retry.py
+
+Retry helpers for calls to remote services (HuggingFace, Pinecone, Gemini).
+
+This module provides:
+- is_retryable(exc) -> bool: True for rate limits (429), server errors (5xx),
+  timeouts and connection failures; False for client errors such as 400/401.
+- call_with_retries(fn, *args, max_retries, base_delay, **kwargs): Calls `fn`,
+  retrying retryable failures with exponential backoff and full jitter.
+
+Notes for developers:
+- Status codes are read from the exception (`status_code` / `status`) or its
+  `response`, which covers httpx, huggingface_hub and Pinecone errors.
+- Non-retryable errors are raised immediately; the last error is raised once
+  retries are exhausted.
+"""
+
+import logging
+import random
+import time
+from typing import Any, Callable, Optional
+import httpx
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError, httpx.TransportError, urllib3.exceptions.HTTPError)
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    """
+    Return the HTTP status code carried by an exception, if any.
+    """
+    for attr in ("status_code", "status"):
+        code = getattr(exc, attr, None)
+        if isinstance(code, int):
+            return code
+    code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Decide whether a failed remote call is worth retrying.
+    """
+    code = status_code_of(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES or code >= 500
+    return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float = 30.0) -> float:
+    """
+    Exponential backoff with full jitter for the given (0-based) attempt.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(fn: Callable, *args: Any, max_retries: int = 5, base_delay: float = 1.0, **kwargs: Any) -> Any:
+    """
+    Call `fn(*args, **kwargs)`, retrying retryable errors up to `max_retries` times.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay)
+            logger.warning(f"Retryable error from {getattr(fn, '__name__', fn)} ({e}); retrying in {delay:.2f}s...")
+            time.sleep(delay)
@@ -0,0 +1,63 @@
+"""
+singleflight.py
+
+Request coalescing for identical in-flight work.
+
+When many identical requests arrive at once (a trending question), only the
+first one does the work; the others wait for it and receive the same result.
+Nothing is kept after the call finishes, so coalescing never serves stale data.
+
+This module provides:
+- SingleFlight: Per-key deduplication of concurrent coroutine calls, with
+  executed/coalesced counters exposed via stats().
+
+Key considerations for developers:
+- The work runs in its own task. If the caller that started it is cancelled
+  (e.g., the client disconnected), the callers waiting on it still get the result.
+- Exceptions propagate to every caller of the same flight; the next call after
+  a failure starts a fresh execution.
+- Keys should be canonical (see src.helper.utils.normalize_query).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the result of `fn()`, sharing one execution among concurrent
+        callers with the same `key`.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        # shield: cancelling one waiter must not cancel the shared execution.
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return execution counters and the share of requests that were coalesced.
+        """
+        calls = self.executed + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / calls if calls else 0.0,
+        }
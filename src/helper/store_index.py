@@ -4,20 +4,50 @@ store_index.py
 Script to build and populate the Pinecone vector store with embedded document chunks.
 
 This is a setup/initialization script that:
-1. Loads markdown documents from a configured data directory.
-2. Splits documents into smaller, semantically meaningful chunks.
-3. Initializes a HuggingFace embedding model.
-4. Creates a Pinecone vector store and populates it with embedded chunks.
+1. Loads the local manifest of already-indexed chunks.
+2. Initializes a HuggingFace embedding model.
+3. Streams markdown documents from the data directory through a process pool
+   that parses and splits them, assigning each chunk a deterministic ID
+   (source path + position + content hash + filterable metadata).
+4. Embeds and upserts only new or changed chunks as they arrive (in concurrent,
+   retried, checkpointed batches), then deletes chunks that were removed.
+   Unchanged chunks of a file whose updated_at changed (e.g. a touched file)
+   only get that metadata field rewritten.
+5. Writes the BM25 lexical index of the whole corpus beside the vectors
+   (used by hybrid retrieval).
+6. Writes a compact embedding snapshot of the whole corpus (src.rag.snapshot),
+   so the index can be restored or moved to another backend without re-embedding
+   (python -m src.helper.restore_snapshot).
+
+The stages form a generator pipeline (load -> split -> embed -> upsert), so
+the first vectors are upserted as soon as the first files are parsed and only
+the batches in flight are embedded at once. What stays in memory for the
+whole run, and why:
+- the chunk ID -> source map of the corpus (to find stale chunks to delete);
+- the BM25 index of the corpus, i.e. every chunk's text, metadata and
+  postings, because the BM25 file and the snapshot header are single JSON
+  documents written at the end;
+- the IDs of this run's vectors. The vectors themselves are spilled to a
+  staging file (src.rag.snapshot.VectorStage) and streamed into the snapshot
+  one row at a time, so memory grows with the corpus text, not its vectors.
 
 Execution flow:
 - This script should be run once during project setup or when the knowledge base changes.
+- Runs are incremental and idempotent: re-running without changes makes no
+  embedding calls, and a one-line doc fix re-embeds only the affected chunks.
+- If a run is interrupted, the next run resumes from the last committed batch.
+- Pass --rebuild to wipe the index and re-ingest everything (e.g., for an index
+  populated before deterministic IDs existed, which may hold duplicates).
 - It is not meant to be imported as a library; it performs side effects (index creation).
 - All configuration (paths, model names, API keys) is read from src.config.settings.
 
 Dependencies:
-- src.rag.doc_loader: Loads and splits documents.
+- src.rag.doc_loader: Streams loaded and split documents.
 - src.rag.embeddings: Initializes the embedding model.
 - src.rag.vector_store: Creates the Pinecone vector store.
+- src.rag.manifest: Deterministic chunk IDs and the indexed-chunk manifest.
+- src.rag.bm25: Builds the inverted BM25 index.
+- src.rag.snapshot: Writes the embedding snapshot.
 - src.config: Provides configuration settings (data_path, embedding_model_name, pinecone_index_name, etc.).
 
 Notes for developers:
@@ -27,52 +57,225 @@ Notes for developers:
 - Network connectivity to HuggingFace and Pinecone is required.
 """
 
+import argparse
 import logging
+import os
+import time
+from itertools import chain, groupby
+from typing import Mapping
 from src.config import settings
-from src.rag.doc_loader import load_markdown_files, split_documents
+from src.rag.doc_loader import iter_markdown_chunks
 from src.rag.embeddings import get_embeddings
 from src.rag.vector_store import create_vector_store
+from src.rag.index_version import bump_index_version, get_index_version
+from src.rag.manifest import IndexManifest, assign_chunk_ids, manifest_path
+from src.rag.ingestion import IngestionCheckpoint, checkpoint_path, fetch_embeddings, finish_upserts, update_metadata
+from src.rag.bm25 import BM25Index, bm25_path
+from src.rag.snapshot import EmbeddingSnapshot, VectorStage, snapshot_path, write_snapshot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def main():
+def snapshot_is_current(path: str, lexical_index: BM25Index) -> bool:
+    """
+    True if the snapshot at `path` holds exactly the corpus chunks, embedded
+    with the configured model and written with the configured dtype.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        snapshot = EmbeddingSnapshot(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return False
+    return (
+        snapshot.embedding_model == settings.embedding_model_name
+        and snapshot.dtype == settings.snapshot_dtype
+        and snapshot.ids == lexical_index.ids
+    )
+
+
+def save_snapshot(path: str, lexical_index: BM25Index, new_vectors: Mapping, vector_store, index_version: str) -> dict:
+    """
+    Write the corpus snapshot in lexical-index (corpus) order.
+
+    Vectors come from this run's upserts (`new_vectors`, usually a
+    VectorStage), then from the previous snapshot
+    (same model only), then are read back from the vector store, so unchanged
+    chunks are never re-embedded. Rows are streamed into the new file one at a
+    time; only the vectors fetched from the store are held in memory.
+    """
+    previous, previous_rows = None, {}
+    if os.path.exists(path):
+        try:
+            previous = EmbeddingSnapshot(path)
+            if previous.embedding_model == settings.embedding_model_name:
+                previous_rows = previous.rows_by_id()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+
+    missing = [doc_id for doc_id in lexical_index.ids if doc_id not in new_vectors and doc_id not in previous_rows]
+    fetched = fetch_embeddings(vector_store, missing) if missing else {}
+    missing = [doc_id for doc_id in missing if doc_id not in fetched]
+    if missing:
+        raise RuntimeError(f"{len(missing)} chunks have no stored vector (e.g., {missing[0]}); run with --rebuild.")
+
+    def vector_of(doc_id):
+        if doc_id in new_vectors:
+            return new_vectors[doc_id]
+        if doc_id in fetched:
+            return fetched[doc_id]
+        row = previous_rows[doc_id]
+        return previous.vectors(row, row + 1)[0]
+
+    ids = lexical_index.ids
+    dimension = len(vector_of(ids[0])) if ids else 0
+    # The previous snapshot stays mapped while the new one is written beside it and swapped in.
+    return write_snapshot(
+        path, ids, lexical_index.texts, lexical_index.metadatas, (vector_of(doc_id) for doc_id in ids),
+        dtype=settings.snapshot_dtype, embedding_model=settings.embedding_model_name,
+        index_version=index_version, dimension=dimension
+    )
+
+
+def main(rebuild: bool = False):
     logger.info("--- Vector Store Ingestion Started ---")
-    
+    started = time.perf_counter()
+    new_vectors = None
+
     try:
         # ============================================================================
-        # Step 1: Load markdown documents from the configured data directory.
+        # Step 1: Load the manifest of already-indexed chunks and the checkpoint.
         # ============================================================================
-        logger.info(f"1. Loading markdown files from: {settings.data_path}")
-        extracted_data = load_markdown_files(settings.data_path)
-        logger.info(f"✓ Loaded {len(extracted_data)} markdown documents.")
+        manifest = IndexManifest.load(manifest_path(settings.pinecone_index_name))
+        if rebuild:
+            manifest = IndexManifest(manifest.path)
+        # Chunks committed by an interrupted previous run are skipped.
+        checkpoint = IngestionCheckpoint(checkpoint_path(settings.pinecone_index_name))
+        if rebuild:
+            checkpoint.clear()
+        logger.info(f"1. Manifest holds {len(manifest)} indexed chunks ({len(checkpoint)} committed by an interrupted run).")
 
         # ============================================================================
-        # Step 2: Split documents into smaller, manageable chunks.
+        # Step 2: Initialize the HuggingFace embedding model.
         # ============================================================================
-        logger.info("2. Splitting documents into chunks...")
-        text_chunks = split_documents(extracted_data)
-        logger.info(f"✓ Created {len(text_chunks)} text chunks.")
+        logger.info(f"2. Initializing embedding model: {settings.embedding_model_name}...")
+        embeddings = get_embeddings(settings.embedding_model_name)
+        logger.info("✓ Embedding model initialized.")
 
         # ============================================================================
-        # Step 3: Initialize the HuggingFace embedding model.
+        # Step 3: Stream load -> split -> ID assignment, keeping only new/changed chunks.
         # ============================================================================
-        logger.info(f"3. Initializing embedding model: {settings.embedding_model_name}...")
-        embeddings = get_embeddings(settings.embedding_model_name)
-        logger.info("✓ Embedding model initialized.")
+        logger.info(f"3. Streaming markdown files from: {settings.data_path}")
+        seen = {}  # chunk ID -> source for every chunk in the current corpus
+        updated_at = {}  # source -> updated_at of every file in the current corpus
+        retimed = {}  # updated_at -> IDs of unchanged chunks whose stored updated_at is outdated
+        lexical_index = BM25Index()  # Rebuilt from every chunk, including unchanged ones
+        counts = {"files": 0, "new": 0}
+
+        def new_chunks():
+            chunk_stream = iter_markdown_chunks(
+                settings.data_path,
+                chunk_size=settings.chunk_size,
+                chunk_overlap=settings.chunk_overlap,
+                workers=settings.ingestion_parse_workers,
+                max_pending=settings.ingestion_max_pending_files
+            )
+            for source, file_chunks in groupby(chunk_stream, key=lambda doc: doc.metadata.get("source", "Unknown")):
+                file_chunks = list(file_chunks)
+                assign_chunk_ids(file_chunks)
+                counts["files"] += 1
+                file_updated_at = file_chunks[0].metadata.get("updated_at")
+                updated_at[source] = file_updated_at
+                outdated = manifest.updated_at_of(source) != file_updated_at
+                for chunk in file_chunks:
+                    seen[chunk.id] = source
+                    lexical_index.add(chunk.id, chunk.page_content, chunk.metadata)
+                    if chunk.id not in manifest:
+                        counts["new"] += 1
+                        yield chunk
+                    elif outdated and not rebuild:
+                        retimed.setdefault(file_updated_at, []).append(chunk.id)
+
+        stream = new_chunks()
+        first = next(stream, None)
+
+        snapshot_file = snapshot_path(settings.pinecone_index_name)
+        if first is None and not rebuild and not manifest.diff(seen)[1] and not retimed:
+            lexical_index.save(bm25_path(settings.pinecone_index_name))
+            if settings.snapshot_dtype and not snapshot_is_current(snapshot_file, lexical_index):
+                vector_store = create_vector_store([], embeddings, settings.pinecone_index_name)
+                header = save_snapshot(snapshot_file, lexical_index, {}, vector_store, get_index_version())
+                logger.info(f"✓ Embedding snapshot refreshed ({header['count']} chunks, {header['dtype']}).")
+            logger.info(f"✓ Index is up to date ({len(seen)} chunks in {counts['files']} files). Nothing to do.")
+            return
+
+        # ============================================================================
+        # Step 4: Upsert new/changed chunks as they stream in, then delete stale ones.
+        # ============================================================================
+        logger.info(f"4. Creating/Updating {settings.vector_store_backend} index: {settings.pinecone_index_name}...")
+        if rebuild:
+            vector_store = create_vector_store([], embeddings, settings.pinecone_index_name)
+            vector_store.delete(delete_all=True)
+            logger.info("✓ Cleared existing vectors for rebuild.")
+
+        # Vectors upserted by this run, staged on disk for the snapshot.
+        new_vectors = VectorStage(snapshot_file + ".staging") if settings.snapshot_dtype else {}
+
+        def collect_vectors(batch, vectors):
+            new_vectors.add([doc.id for doc in batch], vectors)
+
+        text_chunks = chain([first], stream) if first is not None else []
+        vector_store = create_vector_store(
+            text_chunks, embeddings, settings.pinecone_index_name, checkpoint=checkpoint,
+            vector_sink=collect_vectors if settings.snapshot_dtype else None
+        )
+
+        _, stale_ids = manifest.diff(seen)
+        if stale_ids:
+            vector_store.delete(ids=sorted(stale_ids))
+        for file_updated_at, ids in retimed.items():
+            update_metadata(vector_store, ids, {"updated_at": file_updated_at})
+        finish_upserts(vector_store)
+        logger.info(
+            f"✓ {counts['files']} files, {len(seen)} chunks: upserted {counts['new']}, "
+            f"deleted {len(stale_ids)}, unchanged {len(seen) - counts['new']} "
+            f"({sum(len(ids) for ids in retimed.values())} with a new updated_at)."
+        )
+
+        manifest.replace_entries(seen, updated_at)
+        manifest.save()
+        checkpoint.clear()
+
+        # ============================================================================
+        # Step 5: Persist the BM25 index of the full corpus beside the vectors.
+        # ============================================================================
+        lexical_index.save(bm25_path(settings.pinecone_index_name))
+        logger.info(f"5. ✓ BM25 index saved ({len(lexical_index)} chunks, {len(lexical_index.postings)} terms).")
+
+        # Invalidate cached answers built from the previous index contents.
+        index_version = bump_index_version()
+        logger.info(f"✓ Index version bumped to: {index_version}")
 
         # ============================================================================
-        # Step 4: Create the Pinecone vector store and populate it.
+        # Step 6: Write the embedding snapshot of the full corpus.
         # ============================================================================
-        logger.info(f"4. Creating/Updating Pinecone index: {settings.pinecone_index_name}...")
-        create_vector_store(text_chunks, embeddings, settings.pinecone_index_name)
-        logger.info(f"✓ Vector store populated successfully in index: {settings.pinecone_index_name}")
+        if settings.snapshot_dtype:
+            header = save_snapshot(snapshot_file, lexical_index, new_vectors, vector_store, index_version)
+            size_mb = os.path.getsize(snapshot_file) / 1e6
+            logger.info(f"6. ✓ Embedding snapshot saved ({header['count']} chunks, {header['dtype']}, {size_mb:.1f} MB).")
 
-        logger.info("✓ Index setup complete! Knowledge base is ready.")
+        logger.info(f"✓ Index setup complete in {time.perf_counter() - started:.1f}s! Knowledge base is ready.")
 
     except Exception as e:
         logger.error(f"Failed to ingest knowledge base: {e}", exc_info=True)
+    finally:
+        if isinstance(new_vectors, VectorStage):
+            new_vectors.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Incrementally ingest the knowledge base into the vector store.")
+    parser.add_argument("--rebuild", action="store_true", help="Delete all vectors and re-ingest every chunk.")
+    args = parser.parse_args()
+    main(rebuild=args.rebuild)
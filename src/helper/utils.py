@@ -6,27 +6,57 @@ pipeline. It focuses on administrative tasks like formatting retrieved data
 and extracting clean metadata for user-facing outputs.
 
 Functions:
-- get_retrive: Transforms raw LangChain Document objects into a single context string.
-- _get_title: Extracts a human-readable title from document metadata.
+- get_retrive: Transforms raw LangChain Document objects into a single context string
+  (merged, deduplicated and token-budgeted; see src.helper.context_builder).
+- get_title: Returns the document title stored in metadata at ingestion.
+- normalize_query: Canonical form of a user query, used as a cache key.
 """
 
+import unicodedata
+from src.rag.filters import document_title
 
 
-def get_retrive(retrieved_docs):
+def get_retrive(retrieved_docs, token_budget=None):
     """
     Build a context text from retrieved documents.
 
+    Overlapping chunks from the same source are merged, repeated sentences are
+    dropped and the result is limited to roughly `token_budget` tokens.
+
     Parameters:
-    - retrieved_docs (iterable): Iterable of objects with a `.page_content` attribute.
+    - retrieved_docs (iterable): Documents in retrieval order (best first).
+    - token_budget (int): Approximate token limit (default: settings.context_token_budget; 0 = unlimited).
 
     Returns:
-    - str: Concatenated document contents separated by two newlines.
+    - str: Passages separated by two newlines.
     """
-    context_text = "\n\n".join(doc.page_content for doc in retrieved_docs)
+    # Imported here: context_builder depends on normalize_query from this module.
+    from src.config import settings
+    from src.helper.context_builder import build_context
+
+    if token_budget is None:
+        token_budget = settings.context_token_budget
+    context_text = build_context(list(retrieved_docs), token_budget)
     return context_text
 
 
 def get_title(doc) -> str:
-    """Helper to safely extract document title."""
-    source = doc.metadata.get("source", "Unknown")
-    return source.split("\\")[-1].split("/")[-1].replace(".md", "")
+    """
+    Return the document title precomputed at ingestion (metadata["title"]);
+    chunks indexed before titles were stored fall back to parsing metadata["source"].
+    """
+    title = doc.metadata.get("title")
+    if title:
+        return title
+    return document_title(doc.metadata.get("source", "Unknown"))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Return the canonical form of a query: NFKC-normalized, case-folded and
+    with whitespace collapsed to single spaces.
+
+    "  What is   RAG?" and "what is rag?" normalize to the same string. The
+    default embedding model is uncased, so this does not change its vectors.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
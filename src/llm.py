@@ -5,7 +5,8 @@ Utilities to initialize and configure a Google Generative AI (Gemini) language m
 
 This module provides:
 - get_llm() -> ChatGoogleGenerativeAI: Creates and returns a configured LLM instance
-  for text generation tasks in RAG pipelines and agents.
+  for text generation tasks in RAG pipelines and agents (an offline FakeChatModel
+  when settings.llm_backend == "fake").
 
 Key considerations for developers:
 - The LLM client requires valid Google API credentials (gemini_api_key).
@@ -17,10 +18,10 @@ Key considerations for developers:
 Notes:
 - Store API key securely in environment variables; do not hardcode in source.
 - Different models may have different token limits and capabilities.
-- For production use, consider implementing retry logic and error handling at call sites.
+- The client's own retries are disabled: call sites retry through src.helper.deadline,
+  which respects the request's latency budget (the SDK would retry past it).
 """
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from .config import settings
 
 def get_llm():
@@ -38,9 +39,20 @@ def get_llm():
     - The model_name in settings should correspond to a supported Gemini model (e.g., "gemini-2.5-flash").
     - This function does not perform any network calls; it only initializes the client.
     """
+    if settings.llm_backend == "fake":
+        from .fakes import FakeChatModel
+        return FakeChatModel(
+            latency_seconds=settings.fake_llm_latency_seconds, max_concurrency=settings.fake_llm_max_concurrency
+        )
+
+    # Imported here: the Gemini SDK takes most of a second to import, paid during warmup instead of at startup.
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     llm = ChatGoogleGenerativeAI(
         model=settings.model_name, 
         api_key=settings.gemini_api_key, 
-        temperature=settings.temperature
+        temperature=settings.temperature,
+        timeout=settings.llm_timeout_seconds,
+        max_retries=0  # Retried by src.helper.deadline.call_remote, within the request budget
     )
     return llm
@@ -0,0 +1,228 @@
+"""
+bm25.py
+
+Inverted BM25 index for lexical (exact-term) retrieval.
+
+Dense embeddings are weak on exact terms such as API names and acronyms
+("HNSW", "aembed_query"). This index complements the vector store: it is built
+during ingestion from the same chunks, persisted beside the vectors, and
+queried in the hybrid retriever (see src.rag.retriever).
+
+This module provides:
+- tokenize(text) -> List[str]: Lower-cased alphanumeric tokens without stopwords.
+- BM25Index: Postings-based index with add/search/save/load.
+- ReloadingBM25Index: Index file that reloads when the index version changes.
+- bm25_path(index_name) -> str: Default index file location for an index.
+
+Key considerations for developers:
+- Postings store raw term frequencies on disk; per-posting BM25 weights
+  (idf x saturated tf with length normalization) are precomputed once at load,
+  so a query only sums the weights of its terms' postings.
+- The index stores chunk text and metadata, so lexical hits can be returned as
+  Documents without a round-trip to the vector store.
+- search() accepts the same metadata filters as the vector stores
+  (src.rag.filters); the positions matching a filter are cached per filter.
+- It is rebuilt from the full corpus on every ingestion run (tokenizing is
+  cheap compared to embedding), so it never drifts from the manifest. Serving
+  processes use ReloadingBM25Index so they pick up the rebuilt file, the same
+  way LocalVectorStore reloads on a new index version.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+from langchain_core.documents import Document
+from src.config import settings
+from src.rag.filters import FILTER_CACHE_SIZE, filter_key, matches_filter
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in into is it its of on or "
+    "that the their them then there these this to was what when where which who why "
+    "will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-cased alphanumeric tokens, dropping stopwords.
+
+    Underscores and punctuation separate tokens, so "rag_overview" and
+    "top-k" yield ["rag", "overview"] and ["top", "k"].
+    """
+    return [token for token in _TOKEN.findall(text.casefold()) if token not in STOPWORDS]
+
+
+def bm25_path(index_name: str) -> str:
+    """
+    Return the default BM25 index file for an index on the configured backend.
+    """
+    return os.path.join(settings.local_index_dir, f"{settings.vector_store_backend}-{index_name}.bm25.json")
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index (term -> [(document, term frequency)]).
+
+    Parameters:
+    - k1 (float): Term-frequency saturation.
+    - b (float): Document-length normalization.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._weights: Optional[Dict[str, List[Tuple[int, float]]]] = None
+        self._filter_positions: Dict[str, FrozenSet[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, doc_id: str, text: str, metadata: dict = None) -> None:
+        """
+        Index one chunk.
+        """
+        position = len(self.ids)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings[term].append((position, tf))
+
+        self.ids.append(doc_id)
+        self.texts.append(text)
+        self.metadatas.append(dict(metadata or {}))
+        self.doc_lengths.append(sum(counts.values()))
+        self._weights = None
+        self._filter_positions = {}
+
+    def _compute_weights(self) -> Dict[str, List[Tuple[int, float]]]:
+        n_docs = len(self.ids)
+        avg_length = sum(self.doc_lengths) / n_docs if n_docs else 0.0
+        weights = {}
+        for term, postings in self.postings.items():
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            weights[term] = [
+                (
+                    position,
+                    idf * tf * (self.k1 + 1)
+                    / (tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / (avg_length or 1))),
+                )
+                for position, tf in postings
+            ]
+        return weights
+
+    def _document(self, position: int) -> Document:
+        return Document(id=self.ids[position], page_content=self.texts[position], metadata=dict(self.metadatas[position]))
+
+    def _positions_matching(self, metadata_filter: dict) -> FrozenSet[int]:
+        key = filter_key(metadata_filter)
+        positions = self._filter_positions.get(key)
+        if positions is None:
+            positions = frozenset(
+                position for position, metadata in enumerate(self.metadatas) if matches_filter(metadata, metadata_filter)
+            )
+            if len(self._filter_positions) >= FILTER_CACHE_SIZE:
+                self._filter_positions.pop(next(iter(self._filter_positions)))
+            self._filter_positions[key] = positions
+        return positions
+
+    def search(self, query: str, k: int = 4, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """
+        Return the top-k (Document, BM25 score) pairs for `query`, best first,
+        among the chunks matching the metadata `filter` (all chunks if None).
+        """
+        if self._weights is None:
+            self._weights = self._compute_weights()
+
+        allowed = self._positions_matching(filter) if filter else None
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            for position, weight in self._weights.get(term, ()):
+                if allowed is None or position in allowed:
+                    scores[position] += weight
+
+        top = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+        return [(self._document(position), score) for position, score in top]
+
+    def save(self, path: str) -> None:
+        """
+        Atomically write the index to `path` as JSON.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "ids": self.ids,
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings,
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """
+        Load an index written by save() and precompute its posting weights.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.ids = data["ids"]
+        index.texts = data["texts"]
+        index.metadatas = data["metadatas"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = defaultdict(list, {
+            term: [tuple(posting) for posting in postings] for term, postings in data["postings"].items()
+        })
+        index._weights = index._compute_weights()
+        return index
+
+
+class ReloadingBM25Index:
+    """
+    A BM25 index file that is re-read when the index version changes.
+
+    Parameters:
+    - path (str): Index file written by BM25Index.save().
+    - index_version (callable): Function returning the current index version
+      (e.g. src.rag.index_version.get_index_version); checked on every search.
+    """
+
+    def __init__(self, path: str, index_version: Callable[[], str]):
+        self.path = path
+        self._index_version = index_version
+        self._loaded_version = index_version()
+        self.index = BM25Index.load(path)
+
+    def _refresh(self) -> None:
+        """Reload when the index version reported by `index_version` has changed."""
+        version = self._index_version()
+        if version != self._loaded_version:
+            self._loaded_version = version
+            self.index = BM25Index.load(self.path)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self.index)
+
+    def search(self, query: str, k: int = 4, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """Search the current index; see BM25Index.search()."""
+        self._refresh()
+        return self.index.search(query, k=k, filter=filter)
@@ -5,19 +5,116 @@ Utilities to load markdown files from a directory into LangChain Document object
 and to split those documents into smaller chunks suitable for embedding or indexing.
 
 This module provides:
-- load_markdown_files(data: str) -> list: Loads all .md files under `data` using
-  UnstructuredMarkdownLoader via DirectoryLoader.
+- load_markdown_files(data: str) -> list: Loads all .md files under `data` with the
+  native loader (default) or UnstructuredMarkdownLoader via DirectoryLoader.
+- load_markdown_file(path: str) -> Document: Native loader; reads the raw markdown text.
 - split_documents(documents, chunk_size=1000, chunk_overlap=200) -> list:
-  Splits a list of Documents into smaller chunks using RecursiveCharacterTextSplitter.
+  Splits a list of Documents into heading-aware chunks (see split_markdown).
+- split_markdown(document, chunk_size=1000, chunk_overlap=200) -> list:
+  Splits one markdown Document on heading boundaries, packs consecutive small
+  sections up to chunk_size, and falls back to RecursiveCharacterTextSplitter
+  (with chunk_overlap) for sections longer than chunk_size.
+- iter_markdown_chunks(data, ...) -> Iterator[Document]: Streaming variant of
+  load + split. Files are parsed and split in a process pool with a bounded
+  number of files in flight, and chunks are yielded as soon as each file is done.
 
 Notes for other developers:
 - The functions return LangChain Document objects (not plain strings).
 - chunk_size and chunk_overlap are character counts; adjust based on your model/tokenizer.
 - DirectoryLoader.glob currently set to "*.md" — change if you need other file types.
+- settings.markdown_loader selects "native" (default) or "unstructured". The native
+  loader keeps heading markers, which split_markdown uses to record the section
+  path (e.g. "RAG Overview > The RAG Lifecycle") in chunk metadata["section"]; it
+  also avoids importing the unstructured stack, which is slow to import and parse.
+- Chunks carry metadata["start_index"], the character offset of the chunk in its source.
+- Chunks also carry normalized metadata for filtered retrieval (see src.rag.filters):
+  "title" (file stem), "headings" (every heading on the path of every section
+  in the chunk, so a packed chunk matches each of its sub-sections), "tags" and
+  "updated_at" (Unix seconds). Tags and the update date can be set in an
+  optional front matter block at the top of a file, which is not indexed:
+      ---
+      tags: rag, retrieval
+      updated: 2024-05-01
+      ---
+  Without it, tags are empty and updated_at is the file's modification time.
+- iter_markdown_chunks is what ingestion uses: peak memory is bounded by
+  `max_pending` files rather than the corpus size, and the consumer's pace
+  (embedding/upsert) throttles how far parsing runs ahead (backpressure).
 """
 
-from langchain_community.document_loaders import UnstructuredMarkdownLoader,DirectoryLoader
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from src.config import settings
+from src.rag.filters import document_title
+
+# ATX headings ("## Title ##") and code fences (``` / ~~~), per CommonMark.
+_HEADING = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.DOTALL | re.MULTILINE)
+
+
+def _split_front_matter(text: str) -> Tuple[Dict[str, str], str]:
+    """
+    Return the `key: value` pairs of a leading front matter block and the text after it.
+    """
+    match = _FRONT_MATTER.match(text)
+    if match is None:
+        return {}, text
+    fields = {}
+    for line in match.group(1).splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            fields[key.strip().lower()] = value.strip()
+    return fields, text[match.end():]
+
+
+def _parse_tags(value: str) -> List[str]:
+    # Accepts "a, b" and "[a, b]" (optionally quoted).
+    items = (item.strip().strip("'\"").strip() for item in value.strip().strip("[]").split(","))
+    return sorted({item.lower() for item in items if item})
+
+
+def _parse_updated(value: str) -> int:
+    parsed = datetime.fromisoformat(value.strip().strip("'\""))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def document_metadata(path: str, front_matter: Dict[str, str] = None) -> Dict:
+    """
+    Normalized metadata of a source file: source, title, tags and updated_at
+    (front matter values take precedence over the file's modification time).
+    """
+    front_matter = front_matter or {}
+    updated_at = int(os.path.getmtime(path))
+    if front_matter.get("updated"):
+        try:
+            updated_at = _parse_updated(front_matter["updated"])
+        except ValueError:
+            pass  # Keep the modification time for dates we cannot parse
+    return {
+        "source": path,
+        "title": document_title(path),
+        "tags": _parse_tags(front_matter.get("tags", "")),
+        "updated_at": updated_at,
+    }
+
+
+def load_markdown_file(path: str) -> Document:
+    """
+    Native loader: read a markdown file into a Document (front matter moves to metadata).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        front_matter, text = _split_front_matter(f.read())
+    return Document(page_content=text, metadata=document_metadata(path, front_matter))
 
 
 def load_markdown_files(data:str):
@@ -26,16 +123,180 @@ def load_markdown_files(data:str):
     - loader_cls: injectable loader class (improves testability and OCP).
     - glob: file pattern to load.
     """
+    if settings.markdown_loader == "native":
+        return [load_markdown_file(str(path)) for path in sorted(Path(data).glob("*.md"))]
+
+    from langchain_community.document_loaders import UnstructuredMarkdownLoader,DirectoryLoader
     loader=DirectoryLoader(data, glob="*.md", loader_cls=UnstructuredMarkdownLoader)
     documents=loader.load()
+    for document in documents:
+        document.metadata.update(document_metadata(document.metadata["source"]))
     return documents
 
 
+def _markdown_sections(text: str) -> List[Tuple[int, int, List[str]]]:
+    """
+    Return (start, end, heading_path) for every heading-delimited section of `text`.
+
+    Headings inside fenced code blocks are ignored. Text before the first
+    heading forms a section with an empty path.
+    """
+    sections = []
+    headings: List[Tuple[int, str]] = []  # (level, title) stack of the current section
+    section_start = 0
+    offset = 0
+    fence = None
+
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        fence_match = _FENCE.match(stripped)
+
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+        elif fence_match:
+            fence = fence_match.group(1)
+        else:
+            heading = _HEADING.match(stripped)
+            if heading:
+                if text[section_start:offset].strip():
+                    sections.append((section_start, offset, [title for _, title in headings]))
+                level = len(heading.group(1))
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, heading.group(2).strip()))
+                section_start = offset
+
+        offset += len(line)
+
+    if text[section_start:].strip():
+        sections.append((section_start, len(text), [title for _, title in headings]))
+    return sections
+
+
+def _all_headings(paths: List[List[str]]) -> List[str]:
+    """Union of the headings on `paths`, in first-seen order."""
+    return list(dict.fromkeys(heading for path in paths for heading in path))
+
+
+def _common_path(paths: List[List[str]]) -> List[str]:
+    common = paths[0]
+    for path in paths[1:]:
+        i = 0
+        while i < min(len(common), len(path)) and common[i] == path[i]:
+            i += 1
+        common = common[:i]
+    return common or paths[0]
+
+
+def split_markdown(document: Document, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[Document]:
+    """
+    Split one markdown Document on heading boundaries.
+
+    - Consecutive sections are packed into one chunk while it stays within
+      chunk_size; the chunk's section path is the sections' common ancestor,
+      and its "headings" lists the headings of all of them.
+    - A section longer than chunk_size is split with RecursiveCharacterTextSplitter
+      (honouring chunk_overlap) and every piece keeps that section's path.
+    """
+    text = document.page_content
+    splitter = None
+    chunks = []
+
+    def emit(start: int, end: int, path: List[str], headings: List[str]) -> None:
+        segment = text[start:end]
+        content = segment.strip()
+        if not content:
+            return
+        metadata = {
+            **document.metadata,
+            "section": " > ".join(path),
+            "headings": headings,
+            "start_index": start + len(segment) - len(segment.lstrip()),
+        }
+        chunks.append(Document(page_content=content, metadata=metadata))
+
+    packed = None  # (start, end, [paths]) of the chunk being packed
+    for start, end, path in _markdown_sections(text):
+        if packed is not None and end - packed[0] <= chunk_size:
+            packed = (packed[0], end, packed[2] + [path])
+            continue
+        if packed is not None:
+            emit(packed[0], packed[1], _common_path(packed[2]), _all_headings(packed[2]))
+            packed = None
+
+        if end - start <= chunk_size:
+            packed = (start, end, [path])
+            continue
+
+        if splitter is None:
+            splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+        for piece in splitter.create_documents([text[start:end]]):
+            piece_start = start + piece.metadata["start_index"]
+            emit(piece_start, piece_start + len(piece.page_content), path, list(path))
+
+    if packed is not None:
+        emit(packed[0], packed[1], _common_path(packed[2]), _all_headings(packed[2]))
+    return chunks
+
+
 def split_documents(documents, chunk_size=1000, chunk_overlap=200):
     """
     Split documents into chunks.
     - splitter: optional injected splitter instance (supports custom splitting strategies).
     """
-    text_splitter=RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if settings.markdown_loader == "native":
+        return [chunk for document in documents for chunk in split_markdown(document, chunk_size, chunk_overlap)]
+
+    text_splitter=RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
     text_chunks = text_splitter.split_documents(documents)
     return text_chunks
+
+
+def load_and_split_file(path: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List:
+    """
+    Parse and split a single markdown file (the CPU-bound unit of work).
+
+    Defined at module level so it can run in a worker process.
+    """
+    if settings.markdown_loader == "native":
+        return split_markdown(load_markdown_file(path), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    from langchain_community.document_loaders import UnstructuredMarkdownLoader
+    documents = UnstructuredMarkdownLoader(path).load()
+    for document in documents:
+        document.metadata.update(document_metadata(path))
+    return split_documents(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def iter_markdown_chunks(data: str, chunk_size: int = 1000, chunk_overlap: int = 200, glob: str = "*.md",
+                         workers: int = 0, max_pending: int = 32) -> Iterator:
+    """
+    Stream chunks for every markdown file under `data`, one file at a time.
+
+    Parameters:
+    - data (str): Directory to load from (same glob semantics as load_markdown_files).
+    - chunk_size / chunk_overlap (int): Passed to the text splitter.
+    - workers (int): Parser processes; 0 uses os.cpu_count(), 1 parses inline.
+    - max_pending (int): Maximum files parsed ahead of the consumer.
+
+    Yields:
+    - Document: Chunks in file order; all chunks of one file are yielded together.
+    """
+    paths = sorted(str(path) for path in Path(data).glob(glob))
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1:
+        for path in paths:
+            yield from load_and_split_file(path, chunk_size, chunk_overlap)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            if len(pending) >= max_pending:
+                # Backpressure: only submit another file once the oldest is consumed.
+                yield from pending.popleft().result()
+            pending.append(pool.submit(load_and_split_file, path, chunk_size, chunk_overlap))
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,107 @@
+"""
+embedding_batcher.py
+
+Dynamic micro-batching of query embeddings across concurrent requests.
+
+Each request embeds a single query, but the embedding endpoint (and a local
+model) handles one request with many inputs far more efficiently than many
+requests with one input. BatchingEmbeddings sits between the retriever / agent
+and the embeddings client: aembed_query() calls that arrive within a short
+window are sent together as one aembed_documents() call, and every caller gets
+its own vector back.
+
+This module provides:
+- BatchingEmbeddings: LangChain Embeddings wrapper that micro-batches aembed_query.
+  Exposes batch counters via stats().
+
+Key considerations for developers:
+- A batch is sent when the window (settings.embedding_batch_window_ms) elapses
+  after its first query, or as soon as it holds settings.embedding_batch_max_size
+  queries, so a query waits at most one window before its embedding request starts.
+- It wraps the raw client *inside* CachedEmbeddings, so cache hits never wait
+  for a window; only misses are batched.
+- Identical texts in one batch are embedded once.
+- A failed batch raises its exception in every caller of that batch.
+- Only the async query path is batched; sync calls and embed_documents (ingestion,
+  /agent/query/batch) already carry many texts and pass straight through.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+from langchain_core.embeddings import Embeddings
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Parameters:
+    - embeddings (Embeddings): Underlying client (e.g., HuggingFaceEndpointEmbeddings).
+    - window_seconds (float): How long the first query of a batch waits for others.
+    - max_batch_size (int): Queries that trigger an immediate send.
+    """
+
+    def __init__(self, embeddings: Embeddings, window_seconds: float = 0.005, max_batch_size: int = 32):
+        self.embeddings = embeddings
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.queries = 0
+
+    async def aembed_query(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._embed_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.queries += len(batch)
+        try:
+            vectors = await self.embeddings.aembed_documents(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text: Dict[str, List[float]] = dict(zip(texts, vectors))
+        for text, future in batch:
+            if not future.done():  # The caller may have been cancelled
+                future.set_result(by_text[text])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return batch counters (batches sent, queries batched, mean batch size).
+        """
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+        }
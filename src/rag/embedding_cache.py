@@ -0,0 +1,260 @@
+"""
+embedding_cache.py
+
+Query-embedding cache that keeps repeated questions off the remote embedding endpoint.
+
+This module provides:
+- EmbeddingCache: Bounded in-memory LRU with TTL and an optional SQLite tier
+  that survives restarts. Exposes hit/miss/eviction counters via stats().
+- CachedEmbeddings: LangChain Embeddings wrapper that serves embed_query /
+  aembed_query from an EmbeddingCache and delegates everything else. lookup()
+  and remember() expose the cache to callers that make the remote call
+  themselves (see src.rag.retriever.embed_query).
+
+Key considerations for developers:
+- Queries are normalized (see src.helper.utils.normalize_query) before hashing
+  and before embedding, so the cached vector is exactly the vector of the key text.
+- Keys are sha256(model_name + normalized text); switching models never serves
+  stale vectors from the persistent tier.
+- Document embeddings (ingestion) are not cached; they pass straight through.
+- All operations are thread-safe; the cache is shared by every request.
+- Disk writes never run on the caller's thread: put() updates the memory tier
+  and queues the SQLite write on a single writer thread, which also prunes
+  expired rows and caps the table at `max_disk_rows` (oldest first). The file
+  runs in WAL mode, so reads on the caller's thread do not wait for a commit.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from src.helper.utils import normalize_query
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL_SECONDS = 600  # Expired rows are deleted at most this often by the writer
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """
+    Build the cache key for an already-normalized text.
+    """
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache: an in-memory LRU with TTL, backed by an optional SQLite file.
+
+    Parameters:
+    - max_size (int): Maximum number of in-memory entries before LRU eviction.
+    - ttl_seconds (float): Entry lifetime; expired entries are treated as misses.
+    - path (str): Optional SQLite file for the persistent tier ("" disables it).
+    - max_disk_rows (int): Rows kept in the SQLite file; the oldest are pruned first.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 86400, path: str = "", max_disk_rows: int = 100_000):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_rows = max_disk_rows
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writer_db = None
+        self._writer = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if path:
+            # One connection for reads on the caller's thread, one owned by the writer thread.
+            self._writer_db = sqlite3.connect(path, check_same_thread=False)
+            self._writer_db.execute("PRAGMA journal_mode=WAL")
+            self._writer_db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB, created_at REAL)"
+            )
+            self._writer_db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+            self._prune()
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache")
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Return the cached vector for `key`, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, created_at = entry
+                if time.time() - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and time.time() - row[1] <= self.ttl_seconds:
+                    vector = array("f", row[0]).tolist()
+                    self._remember(key, vector, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """
+        Store a vector in memory and queue its disk write (when the persistent
+        tier is enabled); returns without touching the disk.
+        """
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, vector, created_at)
+            if self._writer is not None:
+                self._writer.submit(self._write, key, array("f", vector).tobytes(), created_at)
+
+    def _write(self, key: str, blob: bytes, created_at: float) -> None:
+        # Runs on the writer thread.
+        try:
+            self._writer_db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, blob, created_at),
+            )
+            self._disk_rows += 1
+            if self._disk_rows > self.max_disk_rows or time.monotonic() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                self._prune()
+            else:
+                self._writer_db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _prune(self) -> None:
+        # Runs on the writer thread (or in __init__, before it exists).
+        self._writer_db.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._writer_db.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY created_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_rows,),
+        )
+        self._writer_db.commit()
+        (self._disk_rows,) = self._writer_db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        self._pruned_at = time.monotonic()
+
+    def _remember(self, key: str, vector: List[float], created_at: float) -> None:
+        # Caller holds the lock.
+        self._entries[key] = (vector, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drop every entry from both tiers (counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._writer is not None:
+                self._writer.submit(self._clear_disk).result()
+
+    def _clear_disk(self) -> None:
+        # Runs on the writer thread, after every write queued before it.
+        self._writer_db.execute("DELETE FROM embeddings")
+        self._writer_db.commit()
+        self._disk_rows = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return cache counters and the current hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """
+        Flush queued disk writes and close the persistent tier, if any.
+        """
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._writer_db.close()
+                self._db = self._writer_db = None
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches query vectors.
+
+    Parameters:
+    - embeddings (Embeddings): Underlying client (e.g., HuggingFaceEndpointEmbeddings).
+    - model_name (str): Model identifier, part of every cache key.
+    - cache (EmbeddingCache): Cache instance shared across requests.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_query(self, text: str) -> List[float]:
+        normalized = normalize_query(text)
+        key = cache_key(self.model_name, normalized)
+
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalized)
+            self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self.lookup(text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(normalize_query(text))
+            self.remember(text, vector)
+        return vector
+
+    def lookup(self, text: str) -> Optional[List[float]]:
+        """
+        Return the cached vector of a query, or None on a miss (counted as one).
+        """
+        return self.cache.get(cache_key(self.model_name, normalize_query(text)))
+
+    def remember(self, text: str, vector: List[float]) -> None:
+        """
+        Cache the vector of a query embedded by the caller (as
+        `self.embeddings.aembed_query(normalize_query(text))`).
+        """
+        self.cache.put(cache_key(self.model_name, normalize_query(text)), vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
@@ -4,30 +4,99 @@ embeddings.py
 Small wrapper to create a HuggingFace embeddings client.
 
 Provides:
-- get_embeddings(model_name: str) -> HuggingFaceEndpointEmbeddings
+- get_embeddings(model_name: str) -> HuggingFaceEndpointEmbeddings, or per
+  settings.embedding_backend the in-process LocalEmbeddings ("local") or the
+  offline HashingEmbeddings ("fake")
+- configure_http_pool(max_connections, max_keepalive) -> None: Sizes the shared
+  keep-alive connection pool used by every HuggingFace client in the process.
 
 Notes:
 - model_name should match the HuggingFace endpoint/model identifier expected by
   HuggingFaceEndpointEmbeddings.
 - This module returns the embeddings client object (it does not compute vectors).
+- huggingface_hub / langchain_huggingface are imported on first use, keeping
+  them out of app import time.
 """
 
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
+import httpx
 from src.config import settings
 
+
+def configure_http_pool(max_connections: int, max_keepalive: int) -> None:
+    """
+    Configure the connection pool used by huggingface_hub for inference calls.
+
+    huggingface_hub shares one httpx.Client across the whole process; this
+    replaces its factory so that shared client (and each async client) keeps
+    up to `max_keepalive` idle connections open for reuse.
+
+    Parameters:
+    - max_connections (int): Upper bound on concurrently open connections.
+    - max_keepalive (int): Number of idle connections kept alive between requests.
+
+    Notes:
+    - The event hooks mirror huggingface_hub's default factories so auth headers
+      and error handling are unchanged.
+    - Call this before the first embedding request; the existing shared client is closed.
+    """
+    from huggingface_hub import set_async_client_factory, set_client_factory
+    from huggingface_hub.utils._http import (
+        async_hf_request_event_hook, async_hf_response_event_hook, hf_request_event_hook
+    )
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+
+    set_client_factory(lambda: httpx.Client(
+        event_hooks={"request": [hf_request_event_hook]},
+        follow_redirects=True,
+        timeout=None,
+        limits=limits,
+    ))
+    set_async_client_factory(lambda: httpx.AsyncClient(
+        event_hooks={"request": [async_hf_request_event_hook], "response": [async_hf_response_event_hook]},
+        follow_redirects=True,
+        timeout=None,
+        limits=limits,
+    ))
+
+
 def get_embeddings(model_name:str):
     """
-    Initialize and return a HuggingFaceEndpointEmbeddings instance.
+    Initialize and return the embeddings client for settings.embedding_backend.
 
     Parameters:
     - model_name (str): Model or endpoint identifier to use for embeddings.
 
     Returns:
-    - HuggingFaceEndpointEmbeddings: Client instance ready to produce embeddings.
+    - HuggingFaceEndpointEmbeddings: Client instance ready to produce embeddings
+      (LocalEmbeddings for "local", HashingEmbeddings for "fake").
 
     Example:
         emb_client = get_embeddings("all-MiniLM-L6-v2")
         vectors = emb_client.embed_documents(["example text"])
     """
+    if settings.embedding_backend == "local":
+        from src.rag.local_embeddings import LocalEmbeddings
+        return LocalEmbeddings(
+            model_name,
+            dimension=settings.vector_dimension,
+            runtime=settings.local_embedding_runtime,
+            batch_size=settings.local_embedding_batch_size,
+            threads=settings.local_embedding_threads,
+            onnx_file=settings.local_embedding_onnx_file,
+        )
+
+    if settings.embedding_backend == "fake":
+        from src.fakes import HashingEmbeddings
+        return HashingEmbeddings(
+            size=settings.vector_dimension,
+            latency_seconds=settings.fake_embedding_latency_seconds,
+            max_concurrency=settings.http_pool_maxsize,
+            slow_fraction=settings.fake_embedding_slow_fraction,
+            slow_seconds=settings.fake_embedding_slow_seconds,
+        )
+
+    from langchain_huggingface import HuggingFaceEndpointEmbeddings
+
     embeddings=HuggingFaceEndpointEmbeddings(model=model_name, huggingfacehub_api_token=settings.huggingface_api_token)
-    return embeddings
\ No newline at end of file
+    return embeddings
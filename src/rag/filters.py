@@ -0,0 +1,152 @@
+"""
+filters.py
+
+Metadata filters for scoped retrieval.
+
+Ingestion stores normalized metadata on every chunk (see src.rag.doc_loader):
+"title" (file stem), "headings" (section path as a list), "tags" and
+"updated_at" (Unix seconds). A query can be restricted to a subset of the
+corpus with a filter over these fields, which is pushed down into the vector
+search instead of post-filtering the top-k.
+
+This module provides:
+- build_filter(sources, sections, tags, updated_after) -> Optional[dict]: Builds a
+  filter in Pinecone's metadata filter syntax (None when nothing is restricted).
+- matches_filter(metadata, metadata_filter) -> bool: Evaluates such a filter
+  in-process (LocalVectorStore, InMemoryVectorStore, BM25Index).
+- filter_key(metadata_filter) -> str: Canonical string form (cache keys).
+- document_title(source) -> str: Title of a source path ("data/rag_overview.md" -> "rag_overview").
+- FILTERABLE_FIELDS: The metadata fields filters can use.
+
+Key considerations for developers:
+- The same dict is sent to Pinecone as-is, so only operators both sides
+  support are used: $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and, $or.
+- Like Pinecone, a condition on a list-valued field ("headings", "tags")
+  matches when any element satisfies it; a missing field never matches
+  (except for $ne/$nin).
+- title, headings and tags are hashed into the chunk ID, so changing a
+  file's tags re-indexes its chunks. updated_at is not: when only it changes
+  (a new `updated:` date, or a touched file without one), ingestion rewrites
+  that field on the stored chunks without re-embedding them (see
+  src.rag.manifest). Every chunk of a file carries the same updated_at.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+_COMPARISONS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+}
+_NEGATIONS = ("$ne", "$nin")
+
+FILTERABLE_FIELDS = ("title", "headings", "tags", "updated_at")
+
+FILTER_CACHE_SIZE = 256  # Distinct filters whose matching rows an index keeps
+
+
+def document_title(source: str) -> str:
+    """
+    Return the title of a source path: its file name without the .md extension
+    (Windows and Unix separators both work).
+    """
+    name = source.split("\\")[-1].split("/")[-1]
+    return name[:-3] if name.endswith(".md") else name
+
+
+def _timestamp(value: Union[datetime, int, float]) -> int:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def build_filter(
+    sources: Optional[List[str]] = None,
+    sections: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None,
+    updated_after: Union[datetime, int, float, None] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a metadata filter; conditions are combined with AND, the values of
+    one condition with OR.
+
+    Parameters:
+    - sources (List[str]): Document titles or file names ("rag_overview", "data/rag_overview.md").
+    - sections (List[str]): Heading names; a chunk matches if it lies under any of them.
+    - tags (List[str]): Tags; a chunk matches if it has any of them.
+    - updated_after (datetime or Unix seconds): Only documents modified at or after this time.
+
+    Returns:
+    - dict: The filter, or None if no condition was given.
+    """
+    conditions = []
+    if sources:
+        conditions.append({"title": {"$in": sorted({document_title(source) for source in sources})}})
+    if sections:
+        conditions.append({"headings": {"$in": sorted(set(sections))}})
+    if tags:
+        conditions.append({"tags": {"$in": sorted(set(tags))}})
+    if updated_after is not None:
+        conditions.append({"updated_at": {"$gte": _timestamp(updated_after)}})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    for operator, operand in condition.items():
+        compare = _COMPARISONS.get(operator)
+        if compare is None:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        try:
+            if value is None:
+                matched = operator in _NEGATIONS
+            elif isinstance(value, list):
+                combine = all if operator in _NEGATIONS else any
+                matched = combine(compare(item, operand) for item in value)
+            else:
+                matched = compare(value, operand)
+        except TypeError:  # e.g. comparing a string field with a number
+            matched = False
+        if not matched:
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Return True if `metadata` satisfies `metadata_filter` (always True for None).
+    """
+    if not metadata_filter:
+        return True
+    for field, condition in metadata_filter.items():
+        if field == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif field == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif not _matches_condition(metadata.get(field), condition):
+            return False
+    return True
+
+
+def filter_key(metadata_filter: Optional[Dict[str, Any]]) -> str:
+    """
+    Return a canonical string for a filter ("" for None), equal for equal filters.
+    """
+    if not metadata_filter:
+        return ""
+    return json.dumps(metadata_filter, sort_keys=True, separators=(",", ":"))
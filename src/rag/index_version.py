@@ -0,0 +1,59 @@
+"""
+index_version.py
+
+Tracks a version token for the knowledge-base index.
+
+Ingestion bumps the version every time it writes to the vector store; caches
+that depend on index contents (e.g., the semantic response cache) compare the
+version an entry was written under with the current one and drop stale entries.
+
+This module provides:
+- get_index_version() -> str: Current version ("" if ingestion never ran here).
+- bump_index_version() -> str: Writes and returns a new version.
+
+Notes for developers:
+- The version lives in a small file at settings.index_version_path, so every
+  worker process on the host sees a bump without restarting.
+- Reads are cached on the file's inode and mtime (bumps replace the file, so
+  the inode changes even on filesystems with coarse timestamps); a lookup
+  costs one os.stat call.
+"""
+
+import os
+import uuid
+from src.config import settings
+
+_cached = {"stamp": None, "version": ""}
+
+
+def get_index_version() -> str:
+    """
+    Return the current index version, re-reading the file only when it was replaced.
+    """
+    try:
+        stat = os.stat(settings.index_version_path)
+    except FileNotFoundError:
+        return ""
+
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    if stamp != _cached["stamp"]:
+        with open(settings.index_version_path, "r", encoding="utf-8") as f:
+            _cached["version"] = f.read().strip()
+        _cached["stamp"] = stamp
+    return _cached["version"]
+
+
+def bump_index_version() -> str:
+    """
+    Write a new random version token and return it.
+    """
+    version = uuid.uuid4().hex
+    directory = os.path.dirname(settings.index_version_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = settings.index_version_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, settings.index_version_path)
+    return version
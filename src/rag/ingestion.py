@@ -0,0 +1,315 @@
+"""
+ingestion.py
+
+Batched, concurrent and resumable embedding + upsert engine.
+
+PineconeVectorStore.from_documents embeds and upserts everything in one opaque
+call: no control over batch sizes, no parallelism, no retries and no way to
+resume after a failure. This engine replaces it for ingestion:
+
+1. Chunks are embedded in batches of `batch_size` with at most
+   `max_concurrency` batches in flight.
+2. Each embedded batch is upserted in sub-batches of `upsert_batch_size`
+   (sized for Pinecone's request limits); batches upsert in parallel.
+3. Rate limits (429) and server errors (5xx) are retried with exponential
+   backoff and jitter (see src.helper.retry).
+4. After each batch is committed, its chunk IDs are appended to a checkpoint
+   file, so an interrupted run resumes where it stopped.
+
+This module provides:
+- IngestionEngine: Runs the pipeline above for a vector store.
+- IngestionCheckpoint: The on-disk record of committed chunk IDs.
+- IngestionStats: Counts and throughput (chunks per second) of a run.
+- checkpoint_path(index_name) -> str: Default checkpoint location for an index.
+- upsert_embeddings(vector_store, chunks, vectors): Writes precomputed vectors to either backend.
+- update_metadata(vector_store, ids, fields): Sets metadata fields of stored chunks without re-embedding.
+- finish_upserts(vector_store): Compacts the upserts of a run (local backend; no-op for Pinecone).
+- fetch_embeddings(vector_store, ids) -> Dict[str, List[float]]: Reads stored vectors back.
+
+Notes for developers:
+- Chunks must carry deterministic IDs (src.rag.manifest.assign_chunk_ids) for
+  resuming to be meaningful; re-upserting a committed chunk is harmless.
+- The caller clears the checkpoint once the run is fully recorded (e.g., after
+  the manifest is saved).
+"""
+
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+from src.config import settings
+from src.helper.retry import call_with_retries
+from src.rag.local_vector_store import LocalVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoint_path(index_name: str) -> str:
+    """
+    Return the default checkpoint file for an index on the configured backend.
+    """
+    return os.path.join(settings.local_index_dir, f"{settings.vector_store_backend}-{index_name}.checkpoint")
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_embeddings(vector_store, chunks: List, vectors: List[List[float]]) -> None:
+    """
+    Upsert precomputed vectors for `chunks` without re-embedding them.
+
+    Pinecone records store the chunk text under the "text" metadata key, which
+    is where PineconeVectorStore reads it back from at query time.
+    """
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.add_embeddings(
+            [doc.page_content for doc in chunks],
+            vectors,
+            metadatas=[doc.metadata for doc in chunks],
+            ids=[doc.id for doc in chunks],
+        )
+        return
+
+    vector_store.index.upsert(vectors=[
+        {"id": doc.id, "values": vector, "metadata": {**doc.metadata, "text": doc.page_content}}
+        for doc, vector in zip(chunks, vectors)
+    ])
+
+
+def update_metadata(vector_store, ids: List[str], fields: dict) -> None:
+    """
+    Set `fields` in the stored metadata of `ids` on either backend (vectors and
+    texts are left as they are).
+    """
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.update_metadata(ids, fields)
+        return
+
+    for doc_id in ids:
+        call_with_retries(
+            vector_store.index.update, id=doc_id, set_metadata=fields,
+            max_retries=settings.ingestion_max_retries, base_delay=settings.ingestion_retry_base_delay
+        )
+
+
+def finish_upserts(vector_store) -> None:
+    """
+    Call once after a run's upserts and deletes: the local store folds its
+    append-only pending log into the memory-mapped index (Pinecone needs nothing).
+    """
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.compact()
+
+
+def fetch_embeddings(vector_store, ids: List[str], batch_size: int = 100) -> Dict[str, List[float]]:
+    """
+    Read stored vectors back from either backend (unknown ids are skipped).
+    """
+    if isinstance(vector_store, LocalVectorStore):
+        return vector_store.get_vectors(ids)
+
+    vectors = {}
+    for start in range(0, len(ids), batch_size):
+        response = vector_store.index.fetch(ids=ids[start:start + batch_size])
+        vectors.update({doc_id: list(record.values) for doc_id, record in response.vectors.items()})
+    return vectors
+
+
+@dataclass
+class IngestionStats:
+    """
+    Summary of one ingestion run.
+    """
+    chunks: int = 0  # Chunks embedded and upserted in this run
+    resumed: int = 0  # Chunks skipped because a previous run already committed them
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+class IngestionCheckpoint:
+    """
+    Set of chunk IDs that were embedded and upserted, persisted after every batch.
+
+    The file is an append-only log with one chunk ID per line, so recording a
+    batch costs O(batch size) regardless of how large the run is.
+
+    Parameters:
+    - path (str): File backing the checkpoint ("" keeps it in memory only).
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.committed: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.committed = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.committed
+
+    def __len__(self) -> int:
+        return len(self.committed)
+
+    def add(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Record committed chunk IDs and append them to the checkpoint file.
+        """
+        chunk_ids = list(chunk_ids)
+        self.committed.update(chunk_ids)
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{chunk_id}\n" for chunk_id in chunk_ids))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        """
+        Forget all committed IDs and delete the checkpoint file.
+        """
+        self.committed = set()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class IngestionEngine:
+    """
+    Embeds and upserts chunks into a vector store in concurrent, retried batches.
+
+    Parameters:
+    - vector_store: Target store (PineconeVectorStore or LocalVectorStore).
+    - embeddings: Embedding client used for `embed_documents`.
+    - checkpoint (IngestionCheckpoint): Committed-ID record used to resume.
+    - batch_size (int): Chunks per embedding request.
+    - upsert_batch_size (int): Vectors per upsert request.
+    - max_concurrency (int): Maximum number of batches in flight.
+    - max_retries (int): Retries per remote call for retryable errors.
+    - retry_base_delay (float): Base delay in seconds for exponential backoff.
+    - vector_sink (callable): Optional `sink(chunks, vectors)` called from the
+      worker threads after each batch is upserted (e.g., to snapshot the vectors).
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        embeddings,
+        checkpoint: IngestionCheckpoint = None,
+        batch_size: int = None,
+        upsert_batch_size: int = None,
+        max_concurrency: int = None,
+        max_retries: int = None,
+        retry_base_delay: float = None,
+        vector_sink: Optional[Callable[[List, List[List[float]]], None]] = None,
+    ):
+        self.vector_store = vector_store
+        self.embeddings = embeddings
+        self.checkpoint = checkpoint if checkpoint is not None else IngestionCheckpoint()
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.upsert_batch_size = upsert_batch_size or settings.upsert_batch_size
+        self.max_concurrency = max_concurrency or settings.ingestion_concurrency
+        self.max_retries = settings.ingestion_max_retries if max_retries is None else max_retries
+        self.retry_base_delay = settings.ingestion_retry_base_delay if retry_base_delay is None else retry_base_delay
+        self.vector_sink = vector_sink
+
+    def _process_batch(self, batch: List) -> List[str]:
+        """
+        Embed one batch and upsert it; returns the committed chunk IDs.
+        """
+        texts = [doc.page_content for doc in batch]
+        vectors = call_with_retries(
+            self.embeddings.embed_documents, texts,
+            max_retries=self.max_retries, base_delay=self.retry_base_delay
+        )
+
+        for start in range(0, len(batch), self.upsert_batch_size):
+            end = start + self.upsert_batch_size
+            call_with_retries(
+                upsert_embeddings, self.vector_store, batch[start:end], vectors[start:end],
+                max_retries=self.max_retries, base_delay=self.retry_base_delay
+            )
+        if self.vector_sink is not None:
+            self.vector_sink(batch, vectors)
+        return [doc.id for doc in batch]
+
+    def run(self, chunks: Iterable) -> IngestionStats:
+        """
+        Embed and upsert `chunks`, skipping IDs already in the checkpoint.
+
+        Raises the first batch error after recording every batch that did commit.
+        """
+        stats = IngestionStats()
+        started = time.perf_counter()
+
+        def pending_chunks():
+            # Pulled lazily: a streaming source only produces chunks as batches free up.
+            for doc in chunks:
+                if doc.id is None:
+                    doc.id = uuid.uuid4().hex
+                if doc.id in self.checkpoint:
+                    stats.resumed += 1
+                    continue
+                yield doc
+
+        def commit(done) -> None:
+            errors = []
+            for future in done:
+                try:
+                    committed = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                self.checkpoint.add(committed)
+                stats.chunks += len(committed)
+                stats.batches += 1
+            elapsed = time.perf_counter() - started
+            logger.info(f"  … {stats.chunks} chunks committed ({stats.chunks / elapsed:.1f} chunks/s)")
+            if errors:
+                raise errors[0]
+
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        in_flight = set()
+        try:
+            for batch in _batched(pending_chunks(), self.batch_size):
+                if len(in_flight) >= self.max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    commit(done)
+                in_flight.add(pool.submit(self._process_batch, batch))
+
+            done, in_flight = wait(in_flight)
+            commit(done)
+        except BaseException:
+            # Let running batches finish so they can still be checkpointed.
+            done, _ = wait(in_flight)
+            try:
+                commit(done)
+            except Exception:
+                pass
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        stats.seconds = time.perf_counter() - started
+        logger.info(
+            f"✓ Ingested {stats.chunks} chunks in {stats.batches} batches "
+            f"({stats.chunks_per_second:.1f} chunks/s, {stats.resumed} resumed from checkpoint)."
+        )
+        return stats
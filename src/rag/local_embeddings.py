@@ -0,0 +1,128 @@
+"""
+local_embeddings.py
+
+In-process CPU embeddings with sentence-transformers (EMBEDDING_BACKEND=local).
+
+The remote HuggingFace endpoint adds a network round trip to every query and
+ties ingestion to its rate limits. This backend runs the same model
+(sentence-transformers/all-MiniLM-L6-v2) inside the API process instead.
+
+This module provides:
+- LocalEmbeddings: LangChain Embeddings backed by a SentenceTransformer loaded once.
+
+Key considerations for developers:
+- Vectors are L2-normalized, like the endpoint's output for this model, and the
+  model's dimension is checked against settings.vector_dimension at load, so
+  existing Pinecone/local indexes keep working.
+- runtime "torch" uses PyTorch; "onnx" and "onnx-int8" use ONNX Runtime
+  (requires `optimum[onnxruntime]`), the latter with the model's int8-quantized
+  ONNX export (settings.local_embedding_onnx_file).
+- Intra-op threads are capped (settings.local_embedding_threads) and every
+  encode call runs on one dedicated thread, so embedding never uses more than
+  that many cores and never blocks the event loop; concurrent requests queue
+  for the model instead of oversubscribing the CPU.
+- Inputs are encoded in batches of `batch_size`; ingestion sends whole
+  batches (settings.embedding_batch_size) per call.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ("torch", "onnx", "onnx-int8")
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Parameters:
+    - model_name (str): sentence-transformers model id or local path.
+    - dimension (int): Expected vector dimension (ValueError on mismatch).
+    - runtime (str): "torch", "onnx" or "onnx-int8".
+    - batch_size (int): Texts per forward pass.
+    - threads (int): Intra-op threads for the model (0 = library default).
+    - onnx_file (str): Quantized ONNX file inside the model repo (runtime "onnx-int8").
+    - device (str): Torch device; "cpu" unless a GPU is deliberately configured.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dimension: int = 384,
+        runtime: str = "torch",
+        batch_size: int = 32,
+        threads: int = 2,
+        onnx_file: str = "onnx/model_qint8_avx512_vnni.onnx",
+        device: str = "cpu",
+    ):
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown local embedding runtime '{runtime}' (expected one of {', '.join(RUNTIMES)})")
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embeddings")
+        self._model = self._load(model_name, runtime, threads, onnx_file, device)
+
+        model_dimension = self._model.get_sentence_embedding_dimension()
+        if model_dimension != dimension:
+            raise ValueError(
+                f"Local embedding model '{model_name}' produces {model_dimension}-dimensional vectors, "
+                f"but the index expects {dimension} (settings.vector_dimension)."
+            )
+        logger.info(f"✓ Loaded local embedding model {model_name} ({runtime}, {threads or 'default'} threads).")
+
+    @staticmethod
+    def _load(model_name: str, runtime: str, threads: int, onnx_file: str, device: str):
+        # Imported here: sentence-transformers pulls in torch (seconds of import time),
+        # only needed when this backend is selected.
+        from sentence_transformers import SentenceTransformer
+
+        if runtime == "torch":
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            return SentenceTransformer(model_name, device=device)
+
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+            session_options.inter_op_num_threads = 1
+        model_kwargs = {"session_options": session_options, "provider": "CPUExecutionProvider"}
+        if runtime == "onnx-int8":
+            model_kwargs["file_name"] = onnx_file
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            vectors = self._model.encode(
+                texts,
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._encode, list(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
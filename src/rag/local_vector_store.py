@@ -0,0 +1,450 @@
+"""
+local_vector_store.py
+
+In-process vector store backed by a memory-mapped NumPy matrix.
+
+This module provides:
+- LocalVectorStore: A LangChain VectorStore that keeps chunk vectors in a
+  float32 `.npy` file (opened with mmap) and chunk texts/metadata in a JSON
+  sidecar file, and answers queries with a vectorized cosine top-k.
+
+On-disk layout (one directory per index):
+- vectors.npy: float32 matrix of shape (n_chunks, dimension), rows L2-normalized.
+- metadata.json: {"dimension", "ids", "texts", "metadatas"} in row order.
+- pending.jsonl: Writes not yet compacted into the two files above, one JSON
+  line per batch: upserts ({"ids", "texts", "metadatas", "vectors"}) and
+  metadata updates ({"ids", "set_metadata"}).
+
+Key considerations for developers:
+- Rows are normalized at write time, so cosine similarity is a single
+  matrix-vector product followed by argpartition for the top-k.
+- The matrix is opened read-only with mmap, so several uvicorn workers serving
+  the same index share one copy of it through the OS page cache.
+- Upserts append one line per batch to pending.jsonl (fsynced), so ingesting
+  N chunks in batches costs O(N) I/O instead of rewriting the index per batch.
+  compact() (called once at the end of an ingestion run) and delete() rebuild
+  both files and swap them in with os.replace. Opening the store replays the
+  pending log, so an interrupted run loses no committed batch.
+- Processes that already mapped the old file keep reading it until they
+  reload; pass `index_version` (e.g. src.rag.index_version.get_index_version)
+  and the store reloads itself when the version changes.
+  Writes from several threads of one process are serialized with a lock.
+- Searches accept a metadata filter (src.rag.filters syntax). The rows that
+  match a filter are computed once per filter and index version and cached,
+  so a scoped query only multiplies the candidate rows.
+- Scores are cosine similarities in [-1, 1], the same scale Pinecone returns
+  for an index created with metric="cosine".
+"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from src.rag.filters import FILTER_CACHE_SIZE, filter_key, matches_filter
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+PENDING_FILE = "pending.jsonl"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows are left as zeros)."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Memory-mapped NumPy vector store implementing the LangChain VectorStore API.
+
+    Parameters:
+    - index_dir (str): Directory holding vectors.npy, metadata.json and pending.jsonl.
+    - embedding (Embeddings): Embedding client used for queries and new texts.
+    - index_version (callable): Optional function returning the current index
+      version; searches reload the files from disk when it changes.
+    """
+
+    def __init__(self, index_dir: str, embedding: Embeddings, index_version: Optional[Callable[[], str]] = None):
+        self.index_dir = index_dir
+        self._embedding = embedding
+        self._index_version = index_version
+        self._write_lock = threading.Lock()
+        self._loaded_version = index_version() if index_version is not None else None
+        self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.index_dir, VECTORS_FILE)
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.index_dir, METADATA_FILE)
+
+    @property
+    def pending_path(self) -> str:
+        return os.path.join(self.index_dir, PENDING_FILE)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def exists(cls, index_dir: str) -> bool:
+        """Return True if an index has been written to `index_dir`."""
+        return any(os.path.exists(os.path.join(index_dir, name)) for name in (METADATA_FILE, PENDING_FILE))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        """(Re)open the memory-mapped matrix and its metadata sidecar, then replay the pending log."""
+        self._filter_rows: Dict[str, np.ndarray] = {}
+        self._pending_rows: Dict[int, np.ndarray] = {}
+        if not os.path.exists(self.metadata_path):
+            self._dimension = None
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self._ids, self._texts, self._metadatas = [], [], []
+            self._id_to_row = {}
+        else:
+            with open(self.metadata_path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+
+            self._dimension = sidecar["dimension"]
+            self._ids = sidecar["ids"]
+            self._texts = sidecar["texts"]
+            self._metadatas = sidecar["metadatas"]
+
+            if self._ids:
+                self._vectors = np.load(self.vectors_path, mmap_mode="r")
+            else:
+                self._vectors = np.empty((0, self._dimension), dtype=np.float32)
+
+            if self._vectors.shape[0] != len(self._ids):
+                raise ValueError(
+                    f"Local index at {self.index_dir} is inconsistent: "
+                    f"{self._vectors.shape[0]} vectors for {len(self._ids)} ids."
+                )
+            self._id_to_row = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+        if os.path.exists(self.pending_path):
+            with open(self.pending_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        batch = json.loads(line)
+                    except ValueError:
+                        continue  # A batch torn by a crash; it was never checkpointed
+                    if "set_metadata" in batch:
+                        self._apply_metadata(batch["ids"], batch["set_metadata"])
+                        continue
+                    vectors = np.asarray(batch["vectors"], dtype=np.float32)
+                    self._check_dimension(vectors)
+                    self._apply(batch["ids"], batch["texts"], batch["metadatas"], vectors)
+
+    def _matrix(self) -> np.ndarray:
+        """The vector matrix including rows upserted since the files were last written."""
+        if self._pending_rows:
+            matrix = np.empty((len(self._ids), self._dimension), dtype=np.float32)
+            base = self._vectors.reshape(-1, self._dimension)
+            matrix[:len(base)] = base
+            for row, vector in self._pending_rows.items():
+                matrix[row] = vector
+            self._vectors = matrix
+            self._pending_rows = {}
+        return self._vectors
+
+    def _save(self, vectors: np.ndarray, ids: List[str], texts: List[str], metadatas: List[dict]) -> None:
+        """Atomically replace the on-disk index, drop the pending log and reopen it."""
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        np.save(tmp_vectors, np.ascontiguousarray(vectors, dtype=np.float32))
+
+        tmp_metadata = self.metadata_path + ".tmp"
+        with open(tmp_metadata, "w", encoding="utf-8") as f:
+            json.dump(
+                {"dimension": self._dimension, "ids": ids, "texts": texts, "metadatas": metadatas},
+                f,
+                ensure_ascii=False,
+            )
+
+        # Drop our own mapping first so the old file can be replaced on every platform.
+        self._vectors = None
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_metadata, self.metadata_path)
+        # Replaying the log over the new files would be harmless (upserts are idempotent).
+        if os.path.exists(self.pending_path):
+            os.remove(self.pending_path)
+        self._load()
+
+    def compact(self) -> None:
+        """Fold the pending log into vectors.npy/metadata.json (no-op without pending upserts)."""
+        with self._write_lock:
+            if os.path.exists(self.pending_path):
+                self._save(self._matrix(), self._ids, self._texts, self._metadatas)
+
+    def reload(self) -> None:
+        """Re-read the index from disk (e.g. after another process ran ingestion)."""
+        with self._write_lock:
+            self._load()
+
+    def _refresh(self) -> None:
+        """Reload when the index version reported by `index_version` has changed."""
+        if self._index_version is None:
+            return
+        version = self._index_version()
+        if version != self._loaded_version:
+            self._loaded_version = version
+            self.reload()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Embed texts and upsert them into the index."""
+        texts = list(texts)
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas=metadatas, ids=ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Upsert precomputed vectors. Existing ids are overwritten in place.
+
+        Returns:
+        - List[str]: The ids of the upserted rows.
+        """
+        if not texts:
+            return []
+
+        with self._write_lock:
+            return self._upsert(texts, embeddings, metadatas, ids)
+
+    def _check_dimension(self, vectors: np.ndarray) -> None:
+        if self._dimension is None:
+            self._dimension = int(vectors.shape[1])
+            self._vectors = self._vectors.reshape(0, self._dimension)
+        elif vectors.shape[1] != self._dimension:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dimension}."
+            )
+
+    def _apply(self, ids: List[str], texts: List[str], metadatas: List[dict], vectors: np.ndarray) -> None:
+        """Upsert rows in memory; their vectors are merged into the matrix on the next read."""
+        for i, doc_id in enumerate(ids):
+            row = self._id_to_row.get(doc_id)
+            if row is None:
+                row = self._id_to_row[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+                self._texts.append(texts[i])
+                self._metadatas.append(metadatas[i])
+            else:
+                self._texts[row] = texts[i]
+                self._metadatas[row] = metadatas[i]
+            self._pending_rows[row] = vectors[i]
+        self._filter_rows = {}
+
+    def _apply_metadata(self, ids: List[str], fields: dict) -> None:
+        """Set metadata fields of existing rows in memory (unknown ids are ignored)."""
+        for doc_id in ids:
+            row = self._id_to_row.get(doc_id)
+            if row is not None:
+                self._metadatas[row] = {**self._metadatas[row], **fields}
+        self._filter_rows = {}
+
+    def update_metadata(self, ids: List[str], fields: dict) -> None:
+        """Set `fields` in the metadata of the given rows without touching their vectors."""
+        if not ids:
+            return
+        with self._write_lock:
+            self._append_pending({"ids": list(ids), "set_metadata": fields})
+            self._apply_metadata(ids, fields)
+
+    def _upsert(self, texts, embeddings, metadatas, ids) -> List[str]:
+        # Caller holds the write lock.
+        new_vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        self._check_dimension(new_vectors)
+
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+
+        self._append_pending(
+            {"ids": ids, "texts": list(texts), "metadatas": metadatas, "vectors": new_vectors.tolist()}
+        )
+        self._apply(ids, list(texts), metadatas, new_vectors)
+        return ids
+
+    def _append_pending(self, batch: dict) -> None:
+        # Caller holds the write lock.
+        os.makedirs(self.index_dir, exist_ok=True)
+        line = json.dumps(batch, ensure_ascii=False).encode("utf-8") + b"\n"
+        with open(self.pending_path, "ab+") as f:
+            # Start on a fresh line if a crash left a torn batch behind.
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, **kwargs: Any) -> Optional[bool]:
+        """Delete rows by id (unknown ids are ignored), or every row with delete_all=True."""
+        with self._write_lock:
+            if delete_all:
+                ids = list(self._ids)
+            if not ids:
+                return False
+            return self._delete(ids)
+
+    def _delete(self, ids: List[str]) -> bool:
+        # Caller holds the write lock.
+        doomed = {self._id_to_row[doc_id] for doc_id in ids if doc_id in self._id_to_row}
+        if not doomed:
+            return False
+
+        keep = [row for row in range(len(self._ids)) if row not in doomed]
+        vectors = np.asarray(self._matrix())[keep]
+        self._save(
+            vectors,
+            [self._ids[row] for row in keep],
+            [self._texts[row] for row in keep],
+            [self._metadatas[row] for row in keep],
+        )
+        return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def get_by_ids(self, ids: List[str], /) -> List[Document]:
+        return [self._document(self._id_to_row[doc_id]) for doc_id in ids if doc_id in self._id_to_row]
+
+    def get_vectors(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Return the stored (normalized) vectors of the given ids; unknown ids are skipped."""
+        vectors = self._matrix()
+        return {doc_id: vectors[self._id_to_row[doc_id]].tolist() for doc_id in ids if doc_id in self._id_to_row}
+
+    def _rows_matching(self, metadata_filter: dict) -> np.ndarray:
+        """Row numbers whose metadata matches `metadata_filter` (cached per filter)."""
+        key = filter_key(metadata_filter)
+        rows = self._filter_rows.get(key)
+        if rows is None:
+            rows = np.array(
+                [row for row, metadata in enumerate(self._metadatas) if matches_filter(metadata, metadata_filter)],
+                dtype=np.int64,
+            )
+            if len(self._filter_rows) >= FILTER_CACHE_SIZE:
+                self._filter_rows.pop(next(iter(self._filter_rows)))
+            self._filter_rows[key] = rows
+        return rows
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """
+        Vectorized cosine top-k: one matrix-vector product plus argpartition.
+
+        With a metadata `filter`, only the matching rows are scored.
+        """
+        self._refresh()
+        if len(self._ids) == 0 or k <= 0:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        vectors = self._matrix()
+        if filter:
+            rows = self._rows_matching(filter)
+            scores = vectors[rows] @ query
+        else:
+            rows = None
+            scores = vectors @ query
+
+        n = len(scores)
+        k = min(k, n)
+        if k == 0:
+            return []
+        if k < n:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (self._document(int(row if rows is None else rows[row])), float(scores[row])) for row in top
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        # Only the embedding call does I/O; the search itself is in-process.
+        embedding = await self._embedding.aembed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k=k, **kwargs)]
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(embedding, k=k, **kwargs)
+
+    async def asimilarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        # Same mapping Pinecone uses: cosine in [-1, 1] -> relevance in [0, 1].
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        index_dir: str = "",
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        """Create (or upsert into) the index at `index_dir` from raw texts."""
+        if not index_dir:
+            raise ValueError("index_dir must be provided for LocalVectorStore.")
+        store = cls(index_dir, embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        store.compact()
+        return store
@@ -0,0 +1,187 @@
+"""
+manifest.py
+
+Deterministic chunk IDs and a local manifest of what is already indexed.
+
+Re-running ingestion used to re-embed the whole corpus and upsert it under
+random IDs, so every run duplicated vectors and never removed stale ones. With
+deterministic IDs the same chunk always maps to the same vector ID, and the
+manifest records which IDs the index currently holds, so a run only has to:
+- embed and upsert chunks whose ID is not in the manifest (new or changed), and
+- delete IDs that are in the manifest but no longer produced (removed chunks).
+
+This module provides:
+- chunk_id(source, position, text, metadata_hash="") -> str: Stable ID for one chunk.
+- metadata_hash(metadata) -> str: Hash of a chunk's structural metadata (ID_METADATA_FIELDS).
+- assign_chunk_ids(chunks) -> List[str]: Sets `doc.id` and `metadata["chunk_index"]` on each chunk.
+- IndexManifest: Load/diff/save the set of indexed chunk IDs (and each source's updated_at).
+- manifest_path(index_name) -> str: Default manifest location for an index.
+
+Notes for developers:
+- The ID hashes the source path, the chunk's position within its source, the
+  chunk text and its structural metadata (title, headings, tags), so editing a
+  chunk or its file's tags produces a new ID and the old one is deleted.
+  Without that, the vector store would keep stale metadata while the rebuilt
+  BM25 index had the new one.
+- updated_at is left out of the ID: it usually comes from the file's
+  modification time, which a checkout, a copy or `touch` changes without
+  changing the content. The manifest records each source's updated_at
+  instead, and ingestion rewrites only that metadata field on the stored
+  records when it changes (no re-embedding).
+- Source paths are normalized to forward slashes so IDs match across Windows/Unix.
+- The manifest is only written after upserts and deletes succeed; a failed run
+  is simply retried.
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from src.config import settings
+
+
+def _normalize_source(source: str) -> str:
+    return source.replace("\\", "/")
+
+
+ID_METADATA_FIELDS = ("title", "headings", "tags")  # Metadata hashed into chunk IDs
+
+
+def content_hash(text: str) -> str:
+    """
+    Return the sha256 hex digest of a chunk's text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def metadata_hash(metadata: dict) -> str:
+    """
+    Return the sha256 hex digest of a chunk's structural metadata ("" if it has none).
+    """
+    fields = {name: metadata[name] for name in ID_METADATA_FIELDS if name in metadata}
+    if not fields:
+        return ""
+    return content_hash(json.dumps(fields, sort_keys=True, ensure_ascii=False))
+
+
+def chunk_id(source: str, position: int, text: str, metadata_hash: str = "") -> str:
+    """
+    Return the deterministic vector ID for a chunk.
+
+    Parameters:
+    - source (str): Source file path of the chunk.
+    - position (int): Index of the chunk within its source document.
+    - text (str): Chunk content.
+    - metadata_hash (str): Hash of the chunk's structural metadata (see metadata_hash).
+    """
+    key = f"{_normalize_source(source)}\x00{position}\x00{content_hash(text)}"
+    if metadata_hash:
+        key += f"\x00{metadata_hash}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def assign_chunk_ids(chunks: Iterable) -> List[str]:
+    """
+    Assign deterministic IDs to chunks in place and return them in order.
+
+    Chunks are numbered per source in the order they appear, which matches the
+    order produced by the text splitter.
+    """
+    positions: Dict[str, int] = defaultdict(int)
+    ids = []
+    for doc in chunks:
+        source = doc.metadata.get("source", "Unknown")
+        position = positions[source]
+        positions[source] += 1
+
+        doc.id = chunk_id(source, position, doc.page_content, metadata_hash(doc.metadata))
+        doc.metadata["chunk_index"] = position
+        ids.append(doc.id)
+    return ids
+
+
+def manifest_path(index_name: str) -> str:
+    """
+    Return the default manifest file for an index on the configured backend.
+    """
+    return os.path.join(settings.local_index_dir, f"{settings.vector_store_backend}-{index_name}.manifest.json")
+
+
+class IndexManifest:
+    """
+    Set of chunk IDs currently stored in an index, with their source paths.
+
+    Parameters:
+    - path (str): JSON file the manifest is read from and written to.
+    - chunks (Dict[str, str]): Mapping of chunk ID -> source path.
+    - updated_at (Dict[str, int]): Mapping of source path -> updated_at stored on its chunks.
+    """
+
+    def __init__(self, path: str, chunks: Dict[str, str] = None, updated_at: Dict[str, int] = None):
+        self.path = path
+        self.chunks = dict(chunks or {})
+        self.updated_at = dict(updated_at or {})
+
+    @classmethod
+    def load(cls, path: str) -> "IndexManifest":
+        """
+        Load the manifest at `path` (an empty manifest if the file does not exist).
+        """
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path, data.get("chunks", {}), data.get("updated_at", {}))
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.chunks
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def diff(self, chunk_ids: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """
+        Compare the current corpus with the manifest.
+
+        Returns:
+        - (new_ids, stale_ids): IDs to embed and upsert, and IDs to delete.
+        """
+        current = set(chunk_ids)
+        indexed = set(self.chunks)
+        return current - indexed, indexed - current
+
+    def replace(self, chunks: Iterable) -> None:
+        """
+        Replace the manifest contents with the given chunks (Documents with IDs).
+        """
+        self.chunks = {doc.id: _normalize_source(doc.metadata.get("source", "Unknown")) for doc in chunks}
+
+    def replace_entries(self, entries: Dict[str, str], updated_at: Dict[str, int] = None) -> None:
+        """
+        Replace the manifest contents with a chunk ID -> source mapping
+        (used by streaming ingestion, which never holds all chunks at once)
+        and, if given, a source -> updated_at mapping.
+        """
+        self.chunks = {chunk_id: _normalize_source(source) for chunk_id, source in entries.items()}
+        if updated_at is not None:
+            self.updated_at = {_normalize_source(source): value for source, value in updated_at.items()}
+
+    def updated_at_of(self, source: str):
+        """
+        Return the updated_at recorded for `source` (None if unknown).
+        """
+        return self.updated_at.get(_normalize_source(source))
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest to disk.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"chunks": self.chunks, "updated_at": self.updated_at}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
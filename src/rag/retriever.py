@@ -4,8 +4,16 @@ retriever.py
 Utilities to create and configure retriever objects from vector stores.
 
 This module provides:
-- create_retriever(vector_store, k=4) -> Retriever: Converts a vector store into a retriever
-  that performs similarity-based document retrieval.
+- create_retriever(vector_store, k=4, mode="vector", bm25_index=None, ...) -> Retriever: Converts a
+  vector store into a ScoredRetriever that performs similarity-based document retrieval, or
+  (mode="hybrid") into a HybridRetriever that also queries a BM25 index.
+- ScoredRetriever: Dense retrieval with a minimum-similarity threshold and adaptive k.
+- HybridRetriever: Runs dense and lexical search in parallel and merges them with
+  reciprocal-rank fusion.
+- gate_by_score(scored_docs, k, min_score, max_score_gap) -> List: Applies the threshold and adaptive k.
+- reciprocal_rank_fusion(rankings, k, rrf_k=60) -> List[Document]: Merges ranked lists of documents.
+- embed_query(embeddings, query) -> List[float]: Query embedding under the deadline
+  policy, serving CachedEmbeddings hits without a remote call.
 
 Key considerations for developers:
 - The retriever uses the underlying vector store's similarity search mechanism.
@@ -14,16 +22,263 @@ Key considerations for developers:
   relevant context before passing it to a language model.
 - Different vector stores (Pinecone, FAISS, Chroma, etc.) can be converted to retrievers
   using this same pattern.
+- Scores are raw cosine similarities (Pinecone cosine index, LocalVectorStore and
+  InMemoryVectorStore all return them), so min_score means the same on every backend.
+  Each returned document carries its similarity in metadata["score"].
+- When no document reaches min_score the retriever returns [], and the agent
+  answers "insufficient context" without calling the LLM.
+- Query embeddings and vector queries run through src.helper.deadline.call_remote:
+  per-attempt timeouts (settings.embed_timeout_seconds / vector_search_timeout_seconds)
+  bounded by the request budget, retries, and hedging after the recent p95 latency.
+  Embedding-cache hits bypass call_remote, so the "embed" latency tracker (and
+  the hedge delay derived from it) only sees real embedding calls.
+- Every search accepts an optional metadata filter (src.rag.filters syntax, e.g.
+  from the query API's `filters`). It is pushed down into the vector store
+  (Pinecone's `filter`, LocalVectorStore's cached row mask, a predicate for
+  InMemoryVectorStore) and the BM25 lookup, so scoped queries rank only the
+  matching chunks instead of filtering a global top-k.
+- Reciprocal-rank fusion only uses ranks, so cosine similarities and BM25 scores
+  never need to be calibrated against each other. Documents are matched across
+  the two lists by ID (deterministic chunk IDs, see src.rag.manifest).
 """
 
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
+from src.config import settings
+from src.helper.deadline import call_remote
+from src.helper.metrics import stage_timer
+from src.helper.utils import normalize_query
+from src.rag.bm25 import BM25Index
+from src.rag.embedding_cache import CachedEmbeddings
+from src.rag.filters import matches_filter
 
-def create_retriever(vector_store, k:int=4):
+
+async def embed_query(embeddings, query: str) -> List[float]:
+    """
+    Embed a query with the deadline, retry and hedging policy of the "embed"
+    stage, timed as that stage. This is the only place a single query is
+    embedded, so each query records one "embed" timing.
+
+    A hit in the query-embedding cache is returned directly; only misses go
+    through call_remote. Timing hits together with remote calls would collapse
+    the stage's p95, and then nearly every real call would be hedged.
+    """
+    with stage_timer("embed"):
+        if isinstance(embeddings, CachedEmbeddings):
+            vector = embeddings.lookup(query)
+            if vector is None:
+                remote = embeddings.embeddings
+                vector = await call_remote(
+                    "embed", lambda: remote.aembed_query(normalize_query(query)), settings.embed_timeout_seconds,
+                    hedge=True
+                )
+                embeddings.remember(query, vector)
+            return vector
+        return await call_remote(
+            "embed", lambda: embeddings.aembed_query(query), settings.embed_timeout_seconds, hedge=True
+        )
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.id or doc.page_content
+
+
+def _with_score(doc: Document, score: float) -> Document:
+    return Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, "score": score})
+
+
+def gate_by_score(
+    scored_docs: List[Tuple[Document, float]], k: int, min_score: float = 0.0, max_score_gap: float = 0.0
+) -> List[Tuple[Document, float]]:
+    """
+    Keep the best results that are actually relevant.
+
+    - Drops results whose similarity is below `min_score`.
+    - Adaptive k: cuts the list at the first drop of more than `max_score_gap`
+      between consecutive scores (0 disables the cut), then keeps at most `k`.
+    """
+    ranked = sorted((pair for pair in scored_docs if pair[1] >= min_score), key=lambda pair: pair[1], reverse=True)
+
+    kept = ranked[:1]
+    for previous, current in zip(ranked, ranked[1:k]):
+        if max_score_gap and previous[1] - current[1] > max_score_gap:
+            break
+        kept.append(current)
+    return kept
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Merge ranked document lists: score(d) = sum over lists of 1 / (rrf_k + rank(d)).
+
+    Returns the top-k documents by fused score (ties keep first-seen order).
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked[:k]]
+
+
+class ScoredRetriever(BaseRetriever):
+    """
+    Dense retriever with score-threshold gating and adaptive k.
+
+    Attributes:
+    - vector_store: Vector store used for the dense search.
+    - k (int): Maximum number of documents returned.
+    - min_score (float): Minimum cosine similarity for a document to be returned.
+    - max_score_gap (float): Cut the results at a larger drop between consecutive scores (0 = off).
+    """
+
+    vector_store: VectorStore
+    k: int = 4
+    min_score: float = 0.0
+    max_score_gap: float = 0.0
+
+    @property
+    def search_k(self) -> int:
+        return self.k
+
+    def _store_filter(self, metadata_filter: Optional[dict]) -> Dict[str, Any]:
+        # InMemoryVectorStore filters with a predicate over Documents; Pinecone and
+        # LocalVectorStore take the metadata filter dict itself.
+        if not metadata_filter:
+            return {}
+        if isinstance(self.vector_store, InMemoryVectorStore):
+            return {"filter": lambda doc: matches_filter(doc.metadata, metadata_filter)}
+        return {"filter": metadata_filter}
+
+    def _search_by_vector(self, query_vector: List[float], metadata_filter: Optional[dict] = None):
+        # Pinecone and LocalVectorStore name this *_by_vector_with_score;
+        # InMemoryVectorStore only has a synchronous *_with_score_by_vector.
+        kwargs = self._store_filter(metadata_filter)
+        if hasattr(self.vector_store, "asimilarity_search_by_vector_with_score"):
+            return self.vector_store.asimilarity_search_by_vector_with_score(query_vector, k=self.search_k, **kwargs)
+        return run_in_executor(
+            None, lambda: self.vector_store.similarity_search_with_score_by_vector(query_vector, self.search_k, **kwargs)
+        )
+
+    async def _asearch_by_vector(
+        self, query_vector: List[float], metadata_filter: Optional[dict] = None
+    ) -> List[Tuple[Document, float]]:
+        with stage_timer("vector_search"):
+            return await call_remote(
+                "vector_search", lambda: self._search_by_vector(query_vector, metadata_filter),
+                settings.vector_search_timeout_seconds, hedge=True
+            )
+
+    def _select(
+        self, query: str, scored_docs: List[Tuple[Document, float]], metadata_filter: Optional[dict] = None
+    ) -> List[Document]:
+        gated = gate_by_score(scored_docs, self.k, self.min_score, self.max_score_gap)
+        return [_with_score(doc, score) for doc, score in gated]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, filter: Optional[dict] = None
+    ) -> List[Document]:
+        scored_docs = self.vector_store.similarity_search_with_score(query, k=self.search_k, **self._store_filter(filter))
+        return self._select(query, scored_docs, filter)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, filter: Optional[dict] = None
+    ) -> List[Document]:
+        query_vector = await embed_query(self.vector_store.embeddings, query)
+        return await self.aget_relevant_documents_by_vector(query, query_vector, filter)
+
+    async def aget_relevant_documents_by_vector(
+        self, query: str, query_vector: List[float], filter: Optional[dict] = None
+    ) -> List[Document]:
+        """
+        Retrieval for a query whose embedding was already computed (batch queries),
+        optionally restricted to chunks matching the metadata `filter`.
+        """
+        return self._select(query, await self._asearch_by_vector(query_vector, filter))
+
+
+class HybridRetriever(ScoredRetriever):
+    """
+    Dense + BM25 retriever with reciprocal-rank fusion.
+
+    The dense results decide whether the query is answerable at all: if none
+    reaches min_score, nothing is returned. Otherwise the gated dense results
+    are fused with the BM25 ranking.
+
+    Attributes (in addition to ScoredRetriever's):
+    - bm25_index: Lexical index built from the same chunks.
+    - fetch_k (int): Candidates taken from each search before fusion.
+    - rrf_k (int): RRF damping constant (60 in the original paper).
+    """
+
+    bm25_index: Any
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    @property
+    def search_k(self) -> int:
+        return max(self.fetch_k, self.k)
+
+    def _lexical(self, query: str, metadata_filter: Optional[dict] = None) -> List[Document]:
+        with stage_timer("lexical_search"):
+            return [doc for doc, _ in self.bm25_index.search(query, k=self.fetch_k, filter=metadata_filter)]
+
+    def _fuse(self, scored_docs: List[Tuple[Document, float]], lexical: List[Document]) -> List[Document]:
+        dense = gate_by_score(scored_docs, self.search_k, self.min_score, self.max_score_gap)
+        if not dense:
+            return []
+        return reciprocal_rank_fusion(
+            [[_with_score(doc, score) for doc, score in dense], lexical], k=self.k, rrf_k=self.rrf_k
+        )
+
+    def _select(
+        self, query: str, scored_docs: List[Tuple[Document, float]], metadata_filter: Optional[dict] = None
+    ) -> List[Document]:
+        return self._fuse(scored_docs, self._lexical(query, metadata_filter))
+
+    async def aget_relevant_documents_by_vector(
+        self, query: str, query_vector: List[float], filter: Optional[dict] = None
+    ) -> List[Document]:
+        # Yield once so the dense request is sent before the in-memory lexical
+        # lookup runs; the lookup then overlaps the dense round trip.
+        dense = asyncio.ensure_future(self._asearch_by_vector(query_vector, filter))
+        await asyncio.sleep(0)
+        lexical = self._lexical(query, filter)
+        return self._fuse(await dense, lexical)
+
+
+def create_retriever(
+    vector_store,
+    k:int=4,
+    mode: str = "vector",
+    bm25_index: BM25Index = None,
+    fetch_k: int = 20,
+    rrf_k: int = 60,
+    min_score: float = 0.0,
+    max_score_gap: float = 0.0,
+):
     """
     Create and return a retriever object for the given vector store.
 
     Parameters:
     - vector_store: Vector store instance (e.g., PineconeVectorStore) to use for retrieval.
     - k (int): Number of top similar documents to retrieve (default: 4).
+    - mode (str): "vector" (dense only) or "hybrid" (dense + BM25 with reciprocal-rank fusion).
+    - bm25_index (BM25Index): Lexical index; required for mode="hybrid".
+    - fetch_k (int): Hybrid only; candidates taken from each search before fusion.
+    - rrf_k (int): Hybrid only; reciprocal-rank fusion constant.
+    - min_score (float): Minimum cosine similarity; weaker results are dropped (default: keep all).
+    - max_score_gap (float): Adaptive k; cut at a larger score drop (default: 0, disabled).
 
     Returns:
     - Retriever: A retriever object configured to query the provided vector store.
@@ -32,5 +287,13 @@ def create_retriever(vector_store, k:int=4):
     - The retriever will use the specified vector store to perform similarity search.
     - Adjust 'k' based on the desired number of results and application needs.
     """
-    retriever=vector_store.as_retriever(search_kwargs={"k": k})
-    return retriever
\ No newline at end of file
+    if mode == "hybrid":
+        if bm25_index is None:
+            raise ValueError("Hybrid retrieval requires a BM25 index. Run ingestion (src.helper.store_index) first.")
+        return HybridRetriever(
+            vector_store=vector_store, bm25_index=bm25_index, k=k, fetch_k=fetch_k, rrf_k=rrf_k,
+            min_score=min_score, max_score_gap=max_score_gap
+        )
+
+    retriever=ScoredRetriever(vector_store=vector_store, k=k, min_score=min_score, max_score_gap=max_score_gap)
+    return retriever
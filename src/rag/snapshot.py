@@ -0,0 +1,340 @@
+"""
+snapshot.py
+
+Compact, memory-mappable snapshot of the embedded corpus.
+
+Without it, the only copy of the chunk vectors lives inside the vector store,
+so rebuilding an index, switching backends or running offline experiments
+means paying to re-embed everything. Ingestion writes a snapshot of every chunk
+(ID, text, metadata and vector) after each run; src.helper.restore_snapshot
+loads any vector store from it without calling the embedding endpoint.
+
+File layout (little-endian, one file per index):
+- 8 bytes: magic b"RAGSNAP1"
+- 8 bytes: header length (uint64)
+- header: UTF-8 JSON with format_version, index_version, embedding_model,
+  dimension, count, dtype, created_at, the vectors/scales offsets (relative to
+  the data section), and the ids, texts and metadatas lists in row order
+- data section (64-byte aligned): the (count, dimension) vector matrix, then
+  for dtype "int8" one float32 scale per row
+
+This module provides:
+- quantize(vectors, dtype) -> (data, scales) / dequantize(data, scales) -> float32.
+- write_snapshot(path, ids, texts, metadatas, vectors, dtype, ...) -> dict: Writes a snapshot atomically,
+  streaming rows into a memory-mapped file.
+- EmbeddingSnapshot: Opens a snapshot; vectors are numpy.memmap views (no copy, no read until used).
+- VectorStage: Spills the vectors embedded during an ingestion run to disk
+  until the snapshot is written.
+- snapshot_path(index_name) -> str: Default snapshot location for an index.
+
+Key considerations for developers:
+- "float16" halves the size of float32 vectors, and "int8" (symmetric,
+  per-row scale) quarters it. Both lose far less precision than cosine ranking
+  needs; vectors are dequantized to float32 only for the rows being read.
+- The snapshot is backend-independent (the file name carries no backend), so
+  it can seed a local index from a Pinecone ingestion and vice versa.
+- Restoring checks the embedding model recorded in the header; vectors from a
+  different model are useless for queries embedded with the configured one.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from src.config import settings
+
+MAGIC = b"RAGSNAP1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+DTYPES = ("float16", "int8")
+WRITE_BLOCK_ROWS = 1024  # Rows quantized and written per step by write_snapshot()
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def snapshot_path(index_name: str) -> str:
+    """
+    Return the default snapshot file for an index.
+    """
+    return os.path.join(settings.local_index_dir, f"{index_name}.snapshot")
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert float vectors to the snapshot dtype.
+
+    Returns:
+    - (data, scales): scales is None for "float16"; for "int8" it holds one
+      float32 factor per row (row ~= data * scale).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.empty(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        data = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return data, scales
+    raise ValueError(f"Unknown snapshot dtype '{dtype}' (expected one of {', '.join(DTYPES)})")
+
+
+def dequantize(data: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Convert snapshot rows back to float32.
+    """
+    vectors = np.asarray(data, dtype=np.float32)
+    if scales is not None:
+        vectors = vectors * np.asarray(scales, dtype=np.float32)[:, None]
+    return vectors
+
+
+def write_snapshot(
+    path: str,
+    ids: List[str],
+    texts: List[str],
+    metadatas: List[dict],
+    vectors: Iterable,
+    dtype: str = "float16",
+    embedding_model: str = "",
+    index_version: str = "",
+    dimension: Optional[int] = None,
+) -> Dict:
+    """
+    Atomically write a snapshot of `len(ids)` chunks to `path`.
+
+    `vectors` is either a (len(ids), dimension) array or, with `dimension`
+    given, any iterable of len(ids) float vectors in row order. Rows are
+    quantized in blocks of WRITE_BLOCK_ROWS straight into a memory-mapped output
+    file, so the full float32 matrix never has to exist in memory.
+
+    Returns:
+    - dict: The header written (without the ids/texts/metadatas lists).
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown snapshot dtype '{dtype}' (expected one of {', '.join(DTYPES)})")
+    count = len(ids)
+    if not count:
+        dimension = 0
+    elif dimension is None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(count, -1)
+        dimension = int(vectors.shape[1])
+
+    data_dtype = np.dtype(dtype).newbyteorder("<")
+    data_nbytes = count * dimension * data_dtype.itemsize
+    scales_offset = _align(data_nbytes) if dtype == "int8" else None
+    header = {
+        "format_version": FORMAT_VERSION,
+        "index_version": index_version,
+        "embedding_model": embedding_model,
+        "dimension": dimension,
+        "count": count,
+        "dtype": dtype,
+        "created_at": time.time(),
+        "vectors_offset": 0,
+        "scales_offset": scales_offset,
+    }
+    encoded = json.dumps({**header, "ids": ids, "texts": texts, "metadatas": metadatas}, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(encoded))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        f.truncate(data_start + (scales_offset + 4 * count if scales_offset is not None else data_nbytes))
+
+    try:
+        if count and dimension:
+            data = np.memmap(tmp_path, dtype=data_dtype, mode="r+", offset=data_start, shape=(count, dimension))
+            scales = None
+            if scales_offset is not None:
+                scales = np.memmap(tmp_path, dtype="<f4", mode="r+", offset=data_start + scales_offset, shape=(count,))
+
+            row, block = 0, []
+
+            def flush_block():
+                block_data, block_scales = quantize(np.stack(block), dtype)
+                data[row:row + len(block)] = block_data
+                if scales is not None:
+                    scales[row:row + len(block)] = block_scales
+
+            for vector in vectors:
+                if row + len(block) == count:
+                    raise ValueError(f"More than {count} vectors given for {count} snapshot rows.")
+                block.append(np.asarray(vector, dtype=np.float32).reshape(dimension))
+                if len(block) == WRITE_BLOCK_ROWS:
+                    flush_block()
+                    row, block = row + len(block), []
+            if block:
+                flush_block()
+                row += len(block)
+            if row != count:
+                raise ValueError(f"Got {row} vectors for {count} snapshot rows.")
+            data.flush()
+            if scales is not None:
+                scales.flush()
+            del data, scales
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return header
+
+
+class EmbeddingSnapshot:
+    """
+    Read-only view of a snapshot file.
+
+    The header (IDs, texts, metadata) is parsed on open; the vector matrix and
+    scales are memory-mapped, so opening is O(header) and rows are paged in on use.
+
+    Parameters:
+    - path (str): Snapshot file written by write_snapshot().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an embedding snapshot.")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+
+        if header["format_version"] > FORMAT_VERSION:
+            raise ValueError(f"Snapshot format {header['format_version']} is newer than this code supports.")
+
+        self.ids: List[str] = header.pop("ids")
+        self.texts: List[str] = header.pop("texts")
+        self.metadatas: List[dict] = header.pop("metadatas")
+        self.header: Dict = header
+
+        count, dimension = header["count"], header["dimension"]
+        data_start = _align(len(MAGIC) + 8 + header_length)
+        if count:
+            self.data = np.memmap(
+                path, dtype=np.dtype(header["dtype"]).newbyteorder("<"), mode="r",
+                offset=data_start + header["vectors_offset"], shape=(count, dimension)
+            )
+        else:
+            self.data = np.empty((0, dimension), dtype=header["dtype"])
+        self.scales = None
+        if header["scales_offset"] is not None and count:
+            self.scales = np.memmap(path, dtype="<f4", mode="r", offset=data_start + header["scales_offset"], shape=(count,))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def embedding_model(self) -> str:
+        return self.header["embedding_model"]
+
+    @property
+    def dtype(self) -> str:
+        return self.header["dtype"]
+
+    def vectors(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """
+        Return rows [start, end) as float32.
+        """
+        scales = self.scales[start:end] if self.scales is not None else None
+        return dequantize(self.data[start:end], scales)
+
+    def documents(self, start: int = 0, end: Optional[int] = None) -> List[Document]:
+        """
+        Return rows [start, end) as Documents (with IDs).
+        """
+        return [
+            Document(id=doc_id, page_content=text, metadata=dict(metadata))
+            for doc_id, text, metadata in zip(self.ids[start:end], self.texts[start:end], self.metadatas[start:end])
+        ]
+
+    def batches(self, size: int) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """
+        Yield (documents, float32 vectors) in batches of `size` rows.
+        """
+        for start in range(0, len(self), size):
+            yield self.documents(start, start + size), self.vectors(start, start + size)
+
+    def rows_by_id(self) -> Dict[str, int]:
+        """
+        Map every chunk ID to its row (used to carry unchanged chunks over to
+        the next snapshot one row at a time).
+        """
+        return {doc_id: row for row, doc_id in enumerate(self.ids)}
+
+
+class VectorStage:
+    """
+    Append-only float32 file holding the vectors upserted during one run.
+
+    Ingestion hands every embedded batch to add() (from its worker threads);
+    only the ID -> row map stays in memory, and rows are read back through a
+    memmap when the snapshot is written.
+
+    Parameters:
+    - path (str): Staging file; truncated on open and removed by close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "wb+")
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._dimension: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def add(self, ids: List[str], vectors) -> None:
+        """
+        Append one batch of vectors (a later row for the same ID wins).
+        """
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype="<f4").reshape(len(ids), -1)
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = matrix.shape[1]
+            elif matrix.shape[1] != self._dimension:
+                raise ValueError(f"Expected {self._dimension}-dimensional vectors, got {matrix.shape[1]}.")
+            self._file.write(matrix.tobytes())
+            self._rows.update((doc_id, self._count + row) for row, doc_id in enumerate(ids))
+            self._count += len(ids)
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def __getitem__(self, doc_id: str) -> np.ndarray:
+        with self._lock:
+            if self._matrix is None:
+                self._file.flush()
+                self._matrix = np.memmap(self.path, dtype="<f4", mode="r", shape=(self._count, self._dimension))
+            return self._matrix[self._rows[doc_id]]
+
+    def close(self) -> None:
+        """
+        Close and delete the staging file.
+        """
+        self._matrix = None
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
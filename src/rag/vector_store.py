@@ -1,7 +1,7 @@
 """
 vector_store.py
 
-Pinecone vector store initialization and management utilities.
+Vector store initialization and management utilities.
 
 This module provides functions to:
 - Initialize a Pinecone client with API credentials.
@@ -9,24 +9,44 @@ This module provides functions to:
 - Create a vector store from document chunks and embeddings.
 - Access an existing vector store by index name.
 
+The backend is selected with settings.vector_store_backend:
+- "pinecone" (default): Remote Pinecone serverless index.
+- "local": In-process memory-mapped NumPy index (see local_vector_store.py),
+  stored under settings.local_index_dir/<index_name>.
+
 Key considerations for developers:
 - Pinecone API key should be passed as a parameter (avoid hardcoding).
 - Dimension and metric parameters must match your embedding model's output.
 - ServerlessSpec is optional; use it to configure serverless deployment settings.
+- The Pinecone SDKs are imported inside the functions that use them, so the
+  local backend (and app startup) never pays for importing them.
 - Error handling: functions raise ValueError if indexes don't exist or credentials are invalid.
 """
 
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
-from pinecone import ServerlessSpec 
+from typing import TYPE_CHECKING, Iterable
 from ..config import settings
+from .local_vector_store import LocalVectorStore
+from .ingestion import IngestionCheckpoint, IngestionEngine
+from .index_version import get_index_version
+import os
+
+if TYPE_CHECKING:
+    from pinecone import Pinecone, ServerlessSpec
+
+def local_index_path(index_name: str) -> str:
+    """
+    Return the directory of the local index named `index_name`.
+    """
+    return os.path.join(settings.local_index_dir, index_name)
 
-def init_pinecone(pinecone_api_key: str) -> Pinecone:
+def init_pinecone(pinecone_api_key: str, pool_threads: int = None) -> "Pinecone":
     """
     Initialize and return a Pinecone client instance.
 
     Parameters:
     - pinecone_api_key (str): API key for authentication with Pinecone service.
+    - pool_threads (int): Optional size of the client's request thread pool
+      (Pinecone defaults to 5 * CPU count).
 
     Returns:
     - Pinecone: Client instance ready to interact with Pinecone indexes.
@@ -37,10 +57,12 @@ def init_pinecone(pinecone_api_key: str) -> Pinecone:
     Notes:
     - Store API key securely (e.g., environment variable) and do not hardcode in source.
     """
-    pc=Pinecone(api_key=pinecone_api_key)
+    from pinecone import Pinecone  # Imported on use: only the "pinecone" backend needs the SDK
+
+    pc=Pinecone(api_key=pinecone_api_key, pool_threads=pool_threads)
     return pc
 
-def create_pinecone_index(pc:Pinecone, index_name:str, dimension:int, metric:str="cosine", serverless_spec:ServerlessSpec=None) -> None:
+def create_pinecone_index(pc:"Pinecone", index_name:str, dimension:int, metric:str="cosine", serverless_spec:"ServerlessSpec"=None) -> None:
     """
     Create a Pinecone index if it does not already exist.
 
@@ -85,68 +107,99 @@ def create_pinecone_index(pc:Pinecone, index_name:str, dimension:int, metric:str
     index=pc.Index(index_name)
 
 
-def create_vector_store(text_chunks:list, embeddings, index_name:str):
+def create_vector_store(text_chunks:Iterable, embeddings, index_name:str, checkpoint:IngestionCheckpoint=None, vector_sink=None):
     """
-    Create a new vector store from document chunks and embeddings.
+    Create (or update) a vector store from document chunks and embeddings.
 
     Parameters:
-    - text_chunks (list): List of text chunks (LangChain Document objects) to embed and store.
+    - text_chunks (Iterable): Text chunks (LangChain Document objects) to embed and store.
+      May be a generator; it is consumed lazily, batch by batch.
+      Chunks with an `id` are upserted under that ID (see src.rag.manifest.assign_chunk_ids),
+      so re-ingesting the same chunk overwrites its vector instead of duplicating it.
     - embeddings: Embedding model/client instance (e.g., HuggingFaceEndpointEmbeddings).
     - index_name (str): Name of the Pinecone index to create/use.
+    - checkpoint (IngestionCheckpoint): Optional record of already-committed chunk IDs;
+      pass a file-backed checkpoint to make an interrupted run resumable.
+    - vector_sink (callable): Optional `sink(chunks, vectors)` receiving every upserted batch.
 
     Returns:
-    - PineconeVectorStore: Vector store instance ready for similarity searches.
+    - PineconeVectorStore | LocalVectorStore: Vector store instance ready for similarity searches.
 
     Notes:
-    - This function initializes Pinecone, creates the index, and populates it with vectors.
-    - Currently passes None for pinecone_api_key and dimension — update to pass actual values.
-    - The embedding model will compute vectors for all text_chunks before storing.
+    - Chunks are embedded and upserted by the IngestionEngine in concurrent batches
+      with retries (batch sizes and concurrency come from settings).
+    - With the "local" backend the chunks are embedded and upserted into the
+      memory-mapped index under settings.local_index_dir.
+    - With the "pinecone" backend this initializes Pinecone, creates the index if needed,
+      and populates it with vectors.
+    - An empty `text_chunks` list only ensures the index exists (no embedding calls).
     """
-    # Initialize Pinecone and ensure index exists
-    pc = init_pinecone(settings.pinecone_api_key)
-    create_pinecone_index(
-        pc=pc, 
-        index_name=index_name, 
-        dimension=settings.vector_dimension, 
-        metric="cosine", 
-        serverless_spec=ServerlessSpec(cloud="aws", region="us-east-1")
-    )
-
-    vector_store=PineconeVectorStore.from_documents(
-        documents=text_chunks, 
-        embedding=embeddings, 
-        index_name=index_name,
-        pinecone_api_key=settings.pinecone_api_key
-    )
-
+    if settings.vector_store_backend == "local":
+        vector_store = LocalVectorStore(local_index_path(index_name), embeddings)
+    else:
+        from pinecone import ServerlessSpec
+
+        # Initialize Pinecone and ensure index exists
+        pc = init_pinecone(settings.pinecone_api_key)
+        create_pinecone_index(
+            pc=pc, 
+            index_name=index_name, 
+            dimension=settings.vector_dimension, 
+            metric="cosine", 
+            serverless_spec=ServerlessSpec(cloud="aws", region="us-east-1")
+        )
+        vector_store = get_existing_vector_store(index_name, embeddings, pc=pc)
+
+    if text_chunks:
+        IngestionEngine(vector_store, embeddings, checkpoint=checkpoint, vector_sink=vector_sink).run(text_chunks)
 
     return vector_store
 
 
-def get_existing_vector_store(index_name:str, embeddings):
+def get_existing_vector_store(index_name:str, embeddings, pc:"Pinecone"=None):
     """
     Retrieve an existing vector store by index name.
 
     Parameters:
     - index_name (str): Name of the existing Pinecone index.
     - embeddings: Embedding model/client instance (must match the one used when creating the store).
+    - pc (Pinecone): Optional shared Pinecone client. When given, the index handle is opened
+      from it with the configured thread and connection pool sizes, so the host lookup and
+      HTTP connections are reused by every store created from the same client.
 
     Returns:
-    - PineconeVectorStore: Vector store instance connected to the existing Pinecone index.
+    - PineconeVectorStore | LocalVectorStore: Vector store instance connected to the existing index.
 
     Raises:
-    - ValueError: If the specified index does not exist in Pinecone.
+    - ValueError: If the specified index does not exist in Pinecone (or on disk for the "local" backend).
 
     Notes:
     - This function does not create or modify the index; it only creates a client reference.
     - The embeddings parameter is required for performing similarity searches on stored vectors.
-    - Currently passes None for pinecone_api_key — update to pass actual API key.
+    - Without `pc`, a fresh Pinecone client (and index description lookup) is created per call.
     """
-    
+
+    if settings.vector_store_backend == "local":
+        index_dir = local_index_path(index_name)
+        if not LocalVectorStore.exists(index_dir):
+            raise ValueError(f"Local index '{index_name}' not found in {settings.local_index_dir}. Run ingestion first.")
+        # Serving processes pick up a re-ingested index once its version is bumped.
+        return LocalVectorStore(index_dir, embeddings, index_version=get_index_version)
+
+    from langchain_pinecone import PineconeVectorStore
+
+    if pc is not None:
+        index = pc.Index(
+            index_name,
+            pool_threads=settings.pinecone_pool_threads,
+            connection_pool_maxsize=settings.http_pool_maxsize
+        )
+        return PineconeVectorStore(index=index, embedding=embeddings)
+
     vector_store=PineconeVectorStore(
         embedding=embeddings, 
         index_name=index_name,
         pinecone_api_key=settings.pinecone_api_key
     )
 
-    return vector_store
\ No newline at end of file
+    return vector_store
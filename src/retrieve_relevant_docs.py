@@ -6,11 +6,9 @@ the details of embeddings, Pinecone connections, and LangChain retrievers
 to provide a simple interface for the agent to fetch relevant context.
 """
 
-from src.rag.vector_store import get_existing_vector_store
-from src.rag.embeddings import get_embeddings
-from typing import Dict, List
-from src.rag.retriever import create_retriever
-from src.config import settings
+from typing import Dict, List, Optional
+from src.clients import get_clients
+from src.helper.metrics import stage_timer
 import logging
 
 # Configure logging
@@ -18,31 +16,49 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 
-def retrieve_relevant_docs(query: str) -> List[Dict]:
+async def retrieve_relevant_docs(query: str, metadata_filter: Optional[dict] = None) -> List[Dict]:
     """
-    Connects to the vector store and retrieves documents relevant to the query.
+    Retrieves documents relevant to the query from the vector store.
     
     Workflow:
-    1. Loads the embedding model specified in settings.
-    2. Connects to the existing Pinecone index.
-    3. Creates a retriever with the configured Top-K value.
-    4. Invokes the retriever to get relevant documents.
+    1. Borrows the shared retriever from the client registry (embeddings,
+       Pinecone connection and retriever are created once per process).
+    2. Awaits the retriever's async API so the event loop stays free while
+       the embedding endpoint and Pinecone respond.
+
+    `metadata_filter` (src.rag.filters.build_filter) restricts the search to
+    matching chunks; it is pushed down into the vector search.
+
+    Returns [] when no document reaches settings.retrieval_min_score.
     """
 
-    # 1. Initialize Embeddings
-    logger.info(f"1. Initializing embeddings: {settings.embedding_model_name}...")
-    embeddings = get_embeddings(settings.embedding_model_name)
-        
-    # 2. Access existing Vector Store
-    logger.info(f"2. Connecting to Pinecone index: {settings.pinecone_index_name}...")
-    vector_store = get_existing_vector_store(settings.pinecone_index_name, embeddings)
-        
-    # 3. Create Retriever
-    logger.info(f"3. Creating retriever (top_k={settings.top_k})...")
-    retriever = create_retriever(vector_store, k=settings.top_k)
+    retriever = get_clients().retriever
         
     # Perform retrieval
-    retrieved_docs = retriever.invoke(query)
+    with stage_timer("retrieve"):
+        if metadata_filter:
+            retrieved_docs = await retriever.ainvoke(query, filter=metadata_filter)
+        else:
+            retrieved_docs = await retriever.ainvoke(query)
+    logger.info(f"✓ Retrieved {len(retrieved_docs)} documents.")
+
+    return retrieved_docs
+
+
+async def retrieve_by_vector(query: str, query_vector: List[float], metadata_filter: Optional[dict] = None) -> List[Dict]:
+    """
+    Retrieves documents for an already-embedded query.
+
+    Used by batch queries, which embed every query in a single request and
+    then search the vector store with the precomputed vectors, and on a
+    response-cache miss, which searches with the lookup vector. The same score
+    gating applies; in hybrid mode the query text is also used for the BM25 lookup.
+    """
+
+    retriever = get_clients().retriever
+
+    with stage_timer("retrieve"):
+        retrieved_docs = await retriever.aget_relevant_documents_by_vector(query, query_vector, metadata_filter)
     logger.info(f"✓ Retrieved {len(retrieved_docs)} documents.")
 
-    return retrieved_docs
\ No newline at end of file
+    return retrieved_docs
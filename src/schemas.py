@@ -6,16 +6,40 @@ API request and response validation. It ensures a strict contract between
 the client and the AI agent.
 """
 
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 
 
+class QueryFilters(BaseModel):
+    sources: Optional[List[str]] = Field(
+        default=None,
+        description="Only search these documents (titles such as 'rag_overview' or file names)"
+    )
+    sections: Optional[List[str]] = Field(
+        default=None,
+        description="Only search chunks under any of these headings"
+    )
+    tags: Optional[List[str]] = Field(
+        default=None,
+        description="Only search documents with any of these tags"
+    )
+    updated_after: Optional[datetime] = Field(
+        default=None,
+        description="Only search documents updated at or after this time (UTC if no timezone is given)"
+    )
+
+
 class AgentQueryRequest(BaseModel):
     query: str = Field(
         min_length=1,
         description="User question to be processed by the AI agent"
     )
+    filters: Optional[QueryFilters] = Field(
+        default=None,
+        description="Restrict retrieval to matching documents (pushed down into the vector search)"
+    )
 
 
 class AgentQueryResponse(BaseModel):
@@ -29,3 +53,29 @@ class AgentQueryResponse(BaseModel):
     agent_decision: str = Field(
         description="Decision taken by the agent to produce the answer"
     )
+    cached: bool = Field(
+        default=False,
+        description="True if the response was served from the semantic response cache"
+    )
+    degraded: bool = Field(
+        default=False,
+        description="True if generation was shed under load and `answer` holds the retrieved context instead"
+    )
+
+
+
+class AgentBatchItem(BaseModel):
+    response: Optional[AgentQueryResponse] = Field(
+        default=None,
+        description="Agent response for this query (null if it failed)"
+    )
+    error: Optional[str] = Field(
+        default=None,
+        description="Why this query failed (null on success)"
+    )
+
+
+class AgentBatchResponse(BaseModel):
+    results: List[AgentBatchItem] = Field(
+        description="One entry per submitted query, in request order"
+    )
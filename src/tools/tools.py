@@ -7,6 +7,8 @@ after the initial vector search.
 """
 
 from typing import List, Dict
+from src.helper.utils import get_title
+from src.rag.bm25 import tokenize
 
 def search_docs(query: str, retrieve_documents: List[Dict]) -> List[str]:
     """
@@ -25,36 +27,29 @@ def search_docs(query: str, retrieve_documents: List[Dict]) -> List[str]:
         List[str]: A list of clean document titles (filenames).
     """
 
-    # 1. Prepare query words for matching
-    query_words = set(query.lower().split()) 
+    # 1. Prepare query words for matching (whole tokens, stopwords removed, so
+    #    "vs" no longer matches inside "canvas")
+    query_words = set(tokenize(query))
     selected_titles = []
 
     # 2. Iterate through documents to extract titles and verify relevance
     for doc in retrieve_documents:
-        # Extract title from 'source' metadata (handling both Windows and Unix paths)
-        # Example: "data\rag_overview.md" -> "rag_overview"
-        source = doc.metadata.get("source", "Unknown")
-        title = source.split("\\")[-1].split("/")[-1].replace(".md", "")
-        
+        # Title precomputed at ingestion (e.g. "rag_overview" for data/rag_overview.md)
+        title = get_title(doc)
+
         # Combine title and content for broader keyword matching
-        content = doc.page_content.lower()
-        combined_text = (title + " " + content).lower()
+        combined_tokens = set(tokenize(title + " " + doc.page_content))
 
         # 3. Simple keyword relevance check
-        # If any word from the query is found in the title or content, we include it.
-        for word in query_words:
-            if word in combined_text:
-                selected_titles.append(title)
-                break # Move to next document after first keyword match
+        # If any word from the query is a token of the title or content, we include it.
+        if not query_words.isdisjoint(combined_tokens):
+            selected_titles.append(title)
 
     # 4. Fallback Logic:
     # If no documents matched the specific keywords (e.g., query uses synonyms),
     # we return the titles of all retrieved documents as a baseline.
     if not selected_titles:
-        for doc in retrieve_documents:
-            source = doc.metadata.get("source", "Unknown")
-            title = source.split("\\")[-1].split("/")[-1].replace(".md", "")
-            selected_titles.append(title)
+        selected_titles = [get_title(doc) for doc in retrieve_documents]
 
     return selected_titles
 
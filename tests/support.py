@@ -0,0 +1,48 @@
+"""
+support.py
+
+Shared helpers for the verification scripts in tests/.
+
+This module provides:
+- OFFLINE_SETTINGS: Settings that swap every remote service for the local
+  stand-ins in src/fakes.py (fake embeddings and LLM, in-memory index built
+  from data/) with no artificial latency and no background warmup.
+- override_settings(**overrides): Context manager that sets settings fields and
+  restores their previous values on exit.
+- offline_settings(**overrides): override_settings(**OFFLINE_SETTINGS, **overrides).
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator
+from src.config import settings
+
+OFFLINE_SETTINGS = {
+    "embedding_backend": "fake",
+    "vector_store_backend": "memory",
+    "llm_backend": "fake",
+    "fake_embedding_latency_seconds": 0.0,
+    "fake_llm_latency_seconds": 0.0,
+    "startup_warmup": False,
+}
+
+
+@contextmanager
+def override_settings(**overrides: Any) -> Iterator[None]:
+    """
+    Set the given settings fields for the duration of the block.
+    """
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+def offline_settings(**overrides: Any):
+    """
+    Run the block with the offline stand-ins (OFFLINE_SETTINGS plus `overrides`).
+    """
+    return override_settings(**{**OFFLINE_SETTINGS, **overrides})
@@ -0,0 +1,146 @@
+"""
+test_admission.py
+
+Verification script for admission control around generation.
+This script:
+1. Checks the controller admits up to its concurrency, queues in FIFO order,
+   rejects a full queue immediately and times out long waits.
+2. Checks a cancelled waiter leaves the queue without leaking its slot.
+3. Overloads the app (offline stand-ins, one generation slot) and checks the
+   429/503 responses carry Retry-After, and that degraded mode answers with
+   the retrieved context instead.
+
+How to run:
+python -m tests.test_admission
+"""
+
+import asyncio
+import logging
+import time
+import httpx
+from src.helper.admission import AdmissionController, Overloaded
+from tests.support import offline_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+OVERLOAD_SETTINGS = {
+    "fake_llm_latency_seconds": 0.3,
+    "retrieval_min_score": 0.0,
+    "retrieval_max_score_gap": 0.0,
+    "response_cache_size": 0,
+    "embedding_cache_size": 0,
+    "llm_max_concurrency": 1,
+    "llm_max_queue": 1,
+    "llm_max_queue_seconds": 5.0,
+    "degraded_mode": False,
+}
+
+
+async def _hold(controller: AdmissionController, seconds: float, order: list, name: str):
+    async with controller.slot():
+        order.append(name)
+        await asyncio.sleep(seconds)
+
+
+def test_queue_full_and_fifo():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=2, max_queue_seconds=5.0)
+        order = []
+        tasks = [asyncio.create_task(_hold(controller, 0.05, order, name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        assert controller.in_flight == 1 and controller.queued == 2
+
+        started = time.perf_counter()
+        try:
+            await controller.acquire()
+            raise AssertionError("expected Overloaded")
+        except Overloaded as e:
+            assert e.status_code == 429 and e.reason == "queue_full" and e.retry_after >= 1
+        assert time.perf_counter() - started < 0.01
+
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b", "c"]
+        assert controller.in_flight == 0 and controller.queued == 0
+        assert controller.stats()["admitted"] == 3 and controller.stats()["rejected_queue_full"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_and_cancellation():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, max_queue_seconds=0.05)
+        holder = asyncio.create_task(_hold(controller, 0.3, [], "holder"))
+        await asyncio.sleep(0)
+
+        try:
+            await controller.acquire()
+            raise AssertionError("expected Overloaded")
+        except Overloaded as e:
+            assert e.status_code == 503 and e.reason == "queue_timeout"
+
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.queued == 0
+
+        await holder
+        assert controller.in_flight == 0
+        async with controller.slot():
+            assert controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+async def _post_concurrently(overrides: dict, queries: int):
+    from app import app
+
+    with offline_settings(**{**OVERLOAD_SETTINGS, **overrides}):
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+                return await asyncio.gather(*(
+                    client.post("/agent/query", json={"query": f"What is RAG? (request {i})"})
+                    for i in range(queries)
+                ))
+
+
+def test_app_sheds_load_with_retry_after():
+    responses = asyncio.run(_post_concurrently({}, queries=3))
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 200, 429], statuses
+    rejected = next(response for response in responses if response.status_code == 429)
+    assert int(rejected.headers["Retry-After"]) >= 1
+
+    responses = asyncio.run(_post_concurrently({"llm_max_queue_seconds": 0.05}, queries=2))
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 503], statuses
+    assert "Retry-After" in next(response for response in responses if response.status_code == 503).headers
+
+
+def test_degraded_mode_returns_context():
+    responses = asyncio.run(_post_concurrently({"degraded_mode": True}, queries=3))
+    assert all(response.status_code == 200 for response in responses)
+    bodies = [response.json() for response in responses]
+    degraded = [body for body in bodies if body["degraded"]]
+    assert len(degraded) == 1
+    assert degraded[0]["agent_decision"] == "degraded_context_only"
+    assert degraded[0]["answer"] and degraded[0]["documents_used"]
+
+
+def main():
+    logger.info("--- Admission Control Test Started ---")
+    for test in (
+        test_queue_full_and_fifo,
+        test_queue_timeout_and_cancellation,
+        test_app_sheds_load_with_retry_after,
+        test_degraded_mode_returns_context,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Admission Control Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,16 @@ This script:
 1. Initializes the agent.
 2. Detected intent and agent decisions.
 3. Performs a grounded Q&A using the RAG pipeline.
-4. Logs the entire process with timestamps.
+4. Streams one answer token by token (stream_agent).
+5. Logs the entire process with timestamps.
 
 How to run:
 python -m tests.test_agent
 """
 
+import asyncio
 import logging
-from src.agent.agent import run_agent
+from src.agent.agent import run_agent, stream_agent
 from dotenv import load_dotenv
 
 load_dotenv() # Load environment variables from .env file
@@ -25,7 +27,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+async def main():
     logger.info("--- AI Agent Orchestration Test Started ---")
     
     # Sample queries to test different intents
@@ -40,7 +42,7 @@ def main():
             logger.info(f"\n>>> Running Agent for Query: '{query}'")
             
             # Run the agent
-            result = run_agent(query)
+            result = await run_agent(query)
             
             # Log agent decisions and metadata
             logger.info(f"Agent Decision: {result['agent_decision']}")
@@ -50,10 +52,18 @@ def main():
             print(f"\nANSWER:\n{result['answer']}")
             print("-" * 50)
 
+        # Stream a single query and log each event as it arrives
+        logger.info("\n>>> Streaming Agent for Query: 'What is RAG?'")
+        async for event, data in stream_agent("What is RAG?"):
+            if event == "token":
+                print(data["text"], end="", flush=True)
+            else:
+                logger.info(f"[{event}] {data}")
+
     except Exception as e:
         logger.error(f"An error occurred during agent test: {e}", exc_info=True)
         
     logger.info("--- AI Agent Orchestration Test Finished ---")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,204 @@
+"""
+test_api.py
+
+Verification script for the HTTP API (offline stand-ins, no network access).
+This script:
+1. Sends concurrent /agent/query requests and checks they overlap on one event
+   loop, and that the loop keeps ticking while they run (no blocking work on it).
+2. Streams /agent/query/stream and checks the SSE framing, the event order
+   (retrieval, token..., done), the final event's metadata, the cached replay,
+   and the error events sent when generation fails or is shed.
+3. Posts /agent/query/batch and checks the 413 above batch_max_queries, that
+   results come back in request order, and that a failing query only fails
+   its own entry.
+
+How to run:
+python -m tests.test_api
+"""
+
+import asyncio
+import gc
+import json
+import logging
+import time
+import httpx
+from fastapi.testclient import TestClient
+from src.helper.admission import Overloaded
+from tests.support import offline_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+API_SETTINGS = {
+    "fake_embedding_latency_seconds": 0.05,
+    "fake_llm_latency_seconds": 0.3,
+    "retrieval_min_score": 0.0,
+    "response_cache_size": 0,
+    "embedding_cache_size": 0,
+    "llm_max_concurrency": 0,
+}
+
+
+async def _heartbeat(gaps: list, stop: asyncio.Event) -> None:
+    # Any blocking call on the loop shows up as a long gap between ticks.
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.005)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+def test_concurrent_queries_overlap_on_the_loop():
+    from app import app
+
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+                # Move everything allocated so far (including pytest's own heap) out of the
+                # collector's reach, so a full collection cannot pass for a blocking call.
+                gc.collect()
+                gc.freeze()
+                try:
+                    gaps, stop = [], asyncio.Event()
+                    ticker = asyncio.create_task(_heartbeat(gaps, stop))
+                    started = time.perf_counter()
+                    responses = await asyncio.gather(*(
+                        client.post("/agent/query", json={"query": f"What is RAG? (request {i})"}) for i in range(8)
+                    ))
+                    elapsed = time.perf_counter() - started
+                    stop.set()
+                    await ticker
+                finally:
+                    gc.unfreeze()
+                return responses, elapsed, gaps
+
+    with offline_settings(**API_SETTINGS):
+        responses, elapsed, gaps = asyncio.run(scenario())
+
+    assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+    assert all(response.json()["answer"] for response in responses)
+    # Eight 0.3 s generations one after another would take 2.4 s.
+    assert elapsed < 1.2, elapsed
+    assert gaps and max(gaps) < 0.1, max(gaps)
+
+
+def _sse_events(body: str) -> list:
+    """
+    Parse a text/event-stream body into (event, data) pairs, checking the framing.
+    """
+    assert body.endswith("\n\n"), body[-40:]
+    events = []
+    for frame in body[:-2].split("\n\n"):
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: "), frame
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_stream_events():
+    from app import app
+    from src.agent import agent
+
+    query = {"query": "What is Retrieval-Augmented Generation?"}
+    with offline_settings(**{**API_SETTINGS, "response_cache_size": 16, "fake_llm_latency_seconds": 0.05}):
+        with TestClient(app) as client:
+            response = client.post("/agent/query/stream", json=query)
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert response.headers["cache-control"] == "no-cache"
+
+            events = _sse_events(response.text)
+            names = [event for event, _ in events]
+            assert names[0] == "retrieval" and names[-1] == "done", names
+            assert set(names[1:-1]) == {"token"} and len(names) > 3
+            retrieval, done = events[0][1], events[-1][1]
+            assert done["answer"] == "".join(data["text"] for event, data in events if event == "token")
+            assert done["documents_used"] == retrieval["documents_used"] and done["documents_used"]
+            assert done["agent_decision"] == retrieval["agent_decision"]
+            assert done["cached"] is False
+
+            replay = _sse_events(client.post("/agent/query/stream", json=query).text)
+            assert [event for event, _ in replay] == ["retrieval", "token", "done"]
+            assert replay[-1][1]["cached"] is True and replay[-1][1]["answer"] == done["answer"]
+
+            assert client.post("/agent/query/stream", json={"query": "  "}).status_code == 400
+
+            async def failing_stream(**kwargs):
+                yield "Partial"
+                raise RuntimeError("Gemini connection reset")
+
+            async def shed_stream(**kwargs):
+                raise Overloaded("queue_full", 3)
+                yield
+
+            original = agent.stream_answer
+            try:
+                agent.stream_answer = failing_stream
+                failed = _sse_events(client.post("/agent/query/stream", json={"query": "How do AI agents plan?"}).text)
+                assert [event for event, _ in failed] == ["retrieval", "token", "error"]
+                assert failed[-1][1] == {"detail": "Failed to generate an answer"}
+
+                agent.stream_answer = shed_stream
+                shed = _sse_events(client.post("/agent/query/stream", json={"query": "What is BM25?"}).text)
+                assert [event for event, _ in shed] == ["retrieval", "error"]
+                assert shed[-1][1]["retry_after"] == 3 and "queue_full" in shed[-1][1]["detail"]
+            finally:
+                agent.stream_answer = original
+
+
+def test_batch_order_limit_and_failures():
+    from app import app
+    from src.agent import agent
+
+    sources = ["ai_agents", "rag_overview", "vector_databases", "prompt_engineering"]
+    batch = [{"query": "Summarize this document", "filters": {"sources": [source]}} for source in sources]
+    batch.insert(2, {"query": "Summarize this document (fail)"})
+    batch.insert(4, {"query": "   "})
+
+    original = agent.retrieve_by_vector
+
+    async def flaky_retrieve(query, query_vector, metadata_filter=None):
+        if "(fail)" in query:
+            raise ConnectionError("Pinecone unavailable")
+        # Earlier queries finish last, so request order differs from completion order.
+        await asyncio.sleep(0.05 * (len(sources) - sources.index(metadata_filter["title"]["$in"][0])))
+        return await original(query, query_vector, metadata_filter)
+
+    with offline_settings(**{**API_SETTINGS, "batch_max_queries": 6, "fake_llm_latency_seconds": 0.0}):
+        with TestClient(app) as client:
+            too_large = client.post("/agent/query/batch", json=batch + [{"query": "What is RAG?"}])
+            assert too_large.status_code == 413 and "6" in too_large.json()["detail"]
+            assert client.post("/agent/query/batch", json=[]).status_code == 400
+
+            agent.retrieve_by_vector = flaky_retrieve
+            try:
+                response = client.post("/agent/query/batch", json=batch)
+            finally:
+                agent.retrieve_by_vector = original
+
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert len(results) == len(batch)
+    assert results[2] == {"response": None, "error": "Failed to answer query (ConnectionError)"}
+    assert results[4] == {"response": None, "error": "Query cannot be empty"}
+    answered = [result for i, result in enumerate(results) if i not in (2, 4)]
+    assert [result["error"] for result in answered] == [None] * len(sources)
+    assert [result["response"]["documents_used"] for result in answered] == [[source] for source in sources]
+
+
+def main():
+    logger.info("--- API Test Started ---")
+    for test in (
+        test_concurrent_queries_overlap_on_the_loop,
+        test_stream_events,
+        test_batch_order_limit_and_failures,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- API Test Finished ---")
+
+if __name__ == "__main__":
+    main()
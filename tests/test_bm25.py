@@ -0,0 +1,148 @@
+"""
+test_bm25.py
+
+Verification script for the BM25 index and hybrid retrieval.
+This script:
+1. Checks exact-term queries rank the chunk containing the term first.
+2. Checks the index survives a save/load round trip.
+3. Checks reciprocal-rank fusion of dense and lexical results.
+4. Checks search_docs matches whole words only ("vs" does not match "canvas").
+5. Re-runs ingestion under a running client registry (local backend, hybrid
+   mode) and checks its hybrid results reflect the new corpus.
+
+How to run:
+python -m tests.test_bm25
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+from src.rag.bm25 import BM25Index, ReloadingBM25Index, tokenize
+from src.rag.retriever import create_retriever, reciprocal_rank_fusion
+from src.tools.tools import search_docs
+from tests.support import offline_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CHUNKS = [
+    ("c1", "RAG combines retrieval with generation to ground answers.", "data/rag_overview.md"),
+    ("c2", "Pinecone uses an HNSW graph for approximate nearest neighbour search.", "data/vector_databases.md"),
+    ("c3", "FastAPI endpoints can be declared with async def.", "data/fastapi_basics.md"),
+    ("c4", "Agents plan, call tools and reflect on the results.", "data/ai_agents.md"),
+]
+
+
+def _index():
+    index = BM25Index()
+    for doc_id, text, source in CHUNKS:
+        index.add(doc_id, text, {"source": source})
+    return index
+
+
+def test_exact_term_ranks_first():
+    results = _index().search("What is HNSW?", k=2)
+
+    assert [doc.id for doc, _ in results] == ["c2"]
+    assert results[0][0].metadata["source"] == "data/vector_databases.md"
+    assert tokenize("rag_overview top-k") == ["rag", "overview", "top", "k"]
+
+
+def test_save_load_round_trip():
+    index = _index()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bm25.json")
+        index.save(path)
+        loaded = BM25Index.load(path)
+
+    assert len(loaded) == len(index)
+    assert loaded.search("async endpoints", k=1) == index.search("async endpoints", k=1)
+
+
+def test_hybrid_retriever_fuses_rankings():
+    a, b, c = (Document(id=i, page_content=i) for i in "abc")
+    fused = reciprocal_rank_fusion([[a, b, c], [b]], k=2)
+    assert [doc.id for doc in fused] == ["b", "a"]
+
+    store = InMemoryVectorStore(DeterministicFakeEmbedding(size=16))
+    store.add_documents([Document(id=i, page_content=t, metadata={"source": s}) for i, t, s in CHUNKS])
+    retriever = create_retriever(store, k=2, mode="hybrid", bm25_index=_index())
+
+    docs = asyncio.run(retriever.ainvoke("HNSW"))
+    assert len(docs) == 2
+    assert "c2" in [doc.id for doc in docs]
+
+
+def test_search_docs_matches_whole_words():
+    docs = [
+        Document(page_content="Drawing on a canvas.", metadata={"source": "data/canvas.md"}),
+        Document(page_content="RAG vs fine-tuning.", metadata={"source": "data/rag_overview.md"}),
+    ]
+
+    assert search_docs("vs", docs) == ["rag_overview"]
+
+
+def test_hybrid_results_follow_reingestion():
+    from src.clients import ClientRegistry
+    from src.helper import store_index
+
+    def ingest(files):
+        for name in os.listdir(data_dir):
+            os.remove(os.path.join(data_dir, name))
+        for name, text in files.items():
+            with open(os.path.join(data_dir, f"{name}.md"), "w", encoding="utf-8") as f:
+                f.write(text)
+        store_index.main()
+
+    def titles(query):
+        vector = registry.embeddings.embed_query(query)
+        docs = asyncio.run(registry.retriever.aget_relevant_documents_by_vector(query, vector))
+        return [doc.metadata["title"] for doc in docs]
+
+    with tempfile.TemporaryDirectory() as tmp, offline_settings(
+        data_path=os.path.join(tmp, "data"),
+        local_index_dir=os.path.join(tmp, "index"),
+        index_version_path=os.path.join(tmp, "index", "INDEX_VERSION"),
+        vector_store_backend="local",
+        retrieval_mode="hybrid",
+        retrieval_min_score=0.0,
+        embedding_cache_size=0,
+        response_cache_size=0,
+        ingestion_parse_workers=1,
+        snapshot_dtype="",
+    ):
+        data_dir = os.path.join(tmp, "data")
+        os.makedirs(data_dir)
+        ingest({"graphs": "# Graphs\n\nHNSW builds a layered proximity graph.\n"})
+        registry = ClientRegistry.create()
+        try:
+            assert isinstance(registry.retriever.bm25_index, ReloadingBM25Index)
+            assert titles("HNSW") == ["graphs"]
+
+            ingest({"lexical": "# Lexical\n\nBM25 scores exact terms such as Okapi.\n"})
+            assert titles("Okapi") == ["lexical"]
+            assert "graphs" not in titles("HNSW")
+        finally:
+            registry.close()
+
+
+def main():
+    logger.info("--- BM25 / Hybrid Retrieval Test Started ---")
+    for test in (
+        test_exact_term_ranks_first,
+        test_save_load_round_trip,
+        test_hybrid_retriever_fuses_rankings,
+        test_search_docs_matches_whole_words,
+        test_hybrid_results_follow_reingestion,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- BM25 / Hybrid Retrieval Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+test_context_builder.py
+
+Verification script for token-budgeted context packing.
+This script:
+1. Checks overlapping chunks from the same source are merged into one passage.
+2. Checks duplicate sentences across documents are removed.
+3. Checks the context respects the token budget and keeps the best-ranked text.
+
+How to run:
+python -m tests.test_context_builder
+"""
+
+import logging
+from langchain_core.documents import Document
+from src.helper.context_builder import build_context, estimate_tokens, merge_adjacent_chunks
+from src.helper.utils import get_retrive
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SOURCE_TEXT = "RAG retrieves documents. It then grounds the answer in them. Agents plan and act."
+
+
+def _chunk(start, end, source="data/rag_overview.md"):
+    return Document(page_content=SOURCE_TEXT[start:end], metadata={"source": source, "start_index": start})
+
+
+def test_overlapping_chunks_are_merged():
+    first, second = _chunk(0, 60), _chunk(25, len(SOURCE_TEXT))
+    passages = merge_adjacent_chunks([second, first])
+
+    assert len(passages) == 1
+    assert passages[0].page_content == SOURCE_TEXT
+
+    # Without offsets, the repeated text itself is detected.
+    for doc in (first, second):
+        del doc.metadata["start_index"]
+    assert [p.page_content for p in merge_adjacent_chunks([first, second])] == [SOURCE_TEXT]
+
+
+def test_duplicate_sentences_are_removed():
+    docs = [
+        Document(page_content="RAG retrieves documents. It is grounded.", metadata={"source": "data/a.md"}),
+        Document(page_content="RAG retrieves documents.\nAgents use tools.", metadata={"source": "data/b.md"}),
+    ]
+
+    assert get_retrive(docs, token_budget=0) == "RAG retrieves documents. It is grounded.\n\nAgents use tools."
+
+
+def test_token_budget_keeps_best_ranked_text():
+    best = Document(page_content="First sentence is kept. Second one too.", metadata={"source": "data/a.md"})
+    worse = Document(page_content="This lower-ranked passage does not fit.", metadata={"source": "data/b.md"})
+
+    context = build_context([best, worse], token_budget=10)
+
+    assert context == "First sentence is kept. Second one too."
+    assert estimate_tokens(context) <= 10
+
+
+def main():
+    logger.info("--- Context Builder Test Started ---")
+    for test in (
+        test_overlapping_chunks_are_merged,
+        test_duplicate_sentences_are_removed,
+        test_token_budget_keeps_best_ranked_text,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Context Builder Test Finished ---")
+
+if __name__ == "__main__":
+    main()
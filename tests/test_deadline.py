@@ -0,0 +1,188 @@
+"""
+test_deadline.py
+
+Verification script for request deadlines, retries and hedged remote calls.
+This script:
+1. Checks retryable errors and timed-out attempts are retried, and client
+   errors are not.
+2. Checks the request budget caps every attempt and raises DeadlineExceeded.
+3. Checks a call slower than the stage's p95 is hedged and the fast copy wins.
+4. Checks embedding-cache hits are not timed as remote calls, so mostly
+   repeated traffic keeps the hedge delay at the real embedding latency.
+5. Checks a slow stream is cut off at the deadline.
+6. Checks the API answers 504 when generation outlives the request budget.
+
+How to run:
+python -m tests.test_deadline
+"""
+
+import asyncio
+import logging
+import time
+from fastapi.testclient import TestClient
+from src.config import settings
+from src.fakes import HashingEmbeddings
+from src.helper.deadline import (
+    DeadlineExceeded, call_remote, hedge_delay, iter_with_deadline, latency_tracker, request_deadline
+)
+from src.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.rag.retriever import embed_query
+from tests.support import offline_settings, override_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _scripted(outcomes):
+    """
+    Coroutine factory: each call sleeps/raises/returns the next scripted outcome.
+    """
+    calls = []
+
+    def fn():
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(outcome)
+
+        async def run():
+            if isinstance(outcome, Exception):
+                raise outcome
+            if isinstance(outcome, float):
+                await asyncio.sleep(outcome)
+            return f"result {len(calls)}"
+        return run()
+
+    return fn, calls
+
+
+def test_retries():
+    async def scenario():
+        fn, calls = _scripted([HTTPStatusError(503), 0.0])
+        assert await call_remote("test_retry", fn, timeout=1.0, base_delay=0) == "result 2"
+
+        fn, calls = _scripted([1.0, 0.0])  # First attempt times out
+        assert await call_remote("test_retry", fn, timeout=0.05, base_delay=0) == "result 2"
+
+        fn, calls = _scripted([HTTPStatusError(400)])
+        try:
+            await call_remote("test_retry", fn, timeout=1.0, base_delay=0)
+            raise AssertionError("expected HTTPStatusError")
+        except HTTPStatusError:
+            assert len(calls) == 1
+
+        fn, calls = _scripted([1.0])
+        try:
+            await call_remote("test_retry", fn, timeout=0.02, max_retries=2, base_delay=0)
+            raise AssertionError("expected DeadlineExceeded")
+        except DeadlineExceeded:
+            assert len(calls) == 3
+
+    asyncio.run(scenario())
+
+
+def test_request_budget():
+    async def scenario():
+        fn, calls = _scripted([5.0])
+        started = time.perf_counter()
+        with request_deadline(0.1):
+            try:
+                await call_remote("test_budget", fn, timeout=10.0)
+                raise AssertionError("expected DeadlineExceeded")
+            except DeadlineExceeded as e:
+                assert e.stage == "test_budget"
+        assert time.perf_counter() - started < 0.5
+        assert len(calls) == 1  # No retry once the budget is spent
+
+    asyncio.run(scenario())
+
+
+def test_hedging_beats_a_stalled_call():
+    async def scenario():
+        tracker = latency_tracker("test_hedge")
+        for _ in range(settings.hedge_min_samples):
+            tracker.observe(0.01)
+
+        fn, calls = _scripted([2.0, 0.0])  # The first call stalls, its hedge is fast
+        started = time.perf_counter()
+        assert await call_remote("test_hedge", fn, timeout=5.0, hedge=True) == "result 2"
+        assert time.perf_counter() - started < 0.5
+        assert len(calls) == 2
+
+        fn, calls = _scripted([0.0])  # Fast calls are never duplicated
+        await call_remote("test_hedge", fn, timeout=5.0, hedge=True)
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_cache_hits_do_not_shrink_the_hedge_delay():
+    embeddings = CachedEmbeddings(HashingEmbeddings(latency_seconds=0.02), "model", EmbeddingCache(max_size=100))
+    tracker = latency_tracker("embed")
+    tracker._samples.clear()
+
+    async def scenario():
+        # 98% repeats: 10 distinct questions asked 50 times each.
+        for i in range(500):
+            await embed_query(embeddings, f"question {i % 10}")
+
+    with override_settings(hedge_min_samples=5, hedge_percentile=95):
+        asyncio.run(scenario())
+        assert len(tracker) == 10  # One sample per real embedding call
+        assert hedge_delay("embed") >= 0.015
+    assert embeddings.cache.stats()["hits"] == 490
+
+
+def test_stream_deadline():
+    async def slow_stream():
+        for i in range(10):
+            await asyncio.sleep(0.05)
+            yield i
+
+    async def scenario():
+        received = []
+        try:
+            async for item in iter_with_deadline(slow_stream(), "test_stream", timeout=0.12):
+                received.append(item)
+            raise AssertionError("expected DeadlineExceeded")
+        except DeadlineExceeded:
+            assert 1 <= len(received) < 10
+
+    asyncio.run(scenario())
+
+
+def test_api_returns_504():
+    from app import app
+
+    with offline_settings(
+        fake_llm_latency_seconds=1.0, retrieval_min_score=0.0, response_cache_size=0, request_budget_seconds=0.2
+    ):
+        with TestClient(app) as client:
+            started = time.perf_counter()
+            response = client.post("/agent/query", json={"query": "What is RAG?"})
+            assert response.status_code == 504, response.text
+            assert "llm" in response.json()["detail"]
+            assert time.perf_counter() - started < 1.0
+
+
+def main():
+    logger.info("--- Deadline Test Started ---")
+    for test in (
+        test_retries,
+        test_request_budget,
+        test_hedging_beats_a_stalled_call,
+        test_cache_hits_do_not_shrink_the_hedge_delay,
+        test_stream_deadline,
+        test_api_returns_504,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Deadline Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+test_doc_loader.py
+
+Verification script for the native markdown loader and heading-aware splitter.
+This script:
+1. Checks chunks record their heading path and never start mid-section when sections fit.
+2. Checks headings inside code fences are ignored.
+3. Checks oversized sections are split within chunk_size and keep their offsets.
+
+How to run:
+python -m tests.test_doc_loader
+"""
+
+import logging
+from langchain_core.documents import Document
+from src.rag.doc_loader import split_markdown
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _doc(text):
+    return Document(page_content=text, metadata={"source": "data/sample.md"})
+
+
+def test_sections_are_packed_with_heading_paths():
+    text = "# Guide\n\nIntro.\n\n## Setup\nInstall it.\n\n## Usage\nRun it.\n"
+    chunks = split_markdown(_doc(text), chunk_size=30, chunk_overlap=0)
+
+    assert [c.metadata["section"] for c in chunks] == ["Guide", "Guide > Setup", "Guide > Usage"]
+    assert chunks[1].page_content.startswith("## Setup")
+
+    packed = split_markdown(_doc(text), chunk_size=1000, chunk_overlap=0)
+    assert len(packed) == 1
+    assert packed[0].metadata["section"] == "Guide"
+
+
+def test_headings_in_code_fences_are_ignored():
+    text = "# Shell\n\n```bash\n# not a heading\necho hi\n```\n"
+    chunks = split_markdown(_doc(text), chunk_size=1000, chunk_overlap=0)
+
+    assert len(chunks) == 1
+    assert chunks[0].metadata["section"] == "Shell"
+
+
+def test_oversized_sections_respect_chunk_size():
+    text = "# Big\n\n" + "\n\n".join(f"Paragraph {i} " + "word " * 20 for i in range(20))
+    chunks = split_markdown(_doc(text), chunk_size=200, chunk_overlap=40)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk.page_content) <= 200
+        assert chunk.metadata["section"] == "Big"
+        start = chunk.metadata["start_index"]
+        assert text[start:start + len(chunk.page_content)] == chunk.page_content
+
+
+def main():
+    logger.info("--- Doc Loader Test Started ---")
+    for test in (
+        test_sections_are_packed_with_heading_paths,
+        test_headings_in_code_fences_are_ignored,
+        test_oversized_sections_respect_chunk_size,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Doc Loader Test Finished ---")
+
+if __name__ == "__main__":
+    main()
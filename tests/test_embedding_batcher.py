@@ -0,0 +1,96 @@
+"""
+test_embedding_batcher.py
+
+Verification script for query-embedding micro-batching.
+This script:
+1. Fires concurrent aembed_query calls and checks they share one embed request.
+2. Checks max_batch_size splits a burst and duplicates are embedded once.
+3. Checks a failed batch raises in every caller.
+
+How to run:
+python -m tests.test_embedding_batcher
+"""
+
+import asyncio
+import logging
+from typing import List
+from langchain_core.embeddings import Embeddings
+from src.rag.embedding_batcher import BatchingEmbeddings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class RecordingEmbeddings(Embeddings):
+    """
+    Returns [len(text)] vectors and records every batch it receives.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.calls: List[List[str]] = []
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+    async def aembed_documents(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise ConnectionError("endpoint down")
+        return self.embed_documents(texts)
+
+
+def test_concurrent_queries_share_one_request():
+    inner = RecordingEmbeddings()
+    batcher = BatchingEmbeddings(inner, window_seconds=0.01, max_batch_size=32)
+    queries = [f"query {'x' * i}" for i in range(10)]
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.aembed_query(query) for query in queries))
+
+    vectors = asyncio.run(scenario())
+    assert vectors == [[float(len(query))] for query in queries]
+    assert len(inner.calls) == 1 and len(inner.calls[0]) == 10
+    assert batcher.stats() == {"batches": 1, "queries": 10, "mean_batch_size": 10.0}
+
+
+def test_max_batch_size_and_duplicates():
+    inner = RecordingEmbeddings()
+    batcher = BatchingEmbeddings(inner, window_seconds=1.0, max_batch_size=4)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.aembed_query(query) for query in ["a", "a", "bb", "ccc"]))
+
+    vectors = asyncio.run(scenario())  # Full batch: sent without waiting for the 1 s window
+    assert vectors == [[1.0], [1.0], [2.0], [3.0]]
+    assert inner.calls == [["a", "bb", "ccc"]]
+
+
+def test_failed_batch_raises_in_every_caller():
+    batcher = BatchingEmbeddings(RecordingEmbeddings(fail=True), window_seconds=0.005)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.aembed_query(q) for q in ["a", "b"]), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def main():
+    logger.info("--- Embedding Batcher Test Started ---")
+    for test in (
+        test_concurrent_queries_share_one_request,
+        test_max_batch_size_and_duplicates,
+        test_failed_batch_raises_in_every_caller,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Embedding Batcher Test Finished ---")
+
+if __name__ == "__main__":
+    main()
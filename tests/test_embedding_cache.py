@@ -0,0 +1,113 @@
+"""
+test_embedding_cache.py
+
+Verification script for the query-embedding cache.
+This script:
+1. Wraps a counting fake embeddings client in CachedEmbeddings.
+2. Checks that normalized duplicates are served from memory.
+3. Checks LRU eviction, TTL expiry and the persistent SQLite tier.
+4. Checks put() returns while the disk writer is busy, and that the SQLite
+   file is capped at max_disk_rows (oldest rows pruned first).
+
+How to run:
+python -m tests.test_embedding_cache
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_normalized_queries_hit_the_cache():
+    inner = CountingEmbeddings(size=8)
+    cached = CachedEmbeddings(inner, "test-model", EmbeddingCache(max_size=10))
+
+    first = cached.embed_query("What is RAG?")
+    second = cached.embed_query("  what is   rag? ")
+
+    assert first == second
+    assert inner.calls == 1
+    assert cached.cache.stats()["hits"] == 1
+    assert cached.cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_and_ttl():
+    cache = EmbeddingCache(max_size=2, ttl_seconds=60)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")  # "a" becomes most recently used
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.stats()["evictions"] == 1
+
+    expired = EmbeddingCache(max_size=2, ttl_seconds=-1)
+    expired.put("a", [1.0])
+    assert expired.get("a") is None
+    assert expired.stats()["expirations"] == 1
+
+
+def test_persistent_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.sqlite")
+        cache = EmbeddingCache(max_size=10, path=path)
+        cache.put("key", [0.5, 0.25])
+        cache.close()
+
+        restarted = EmbeddingCache(max_size=10, path=path)
+        assert restarted.get("key") == [0.5, 0.25]
+        assert restarted.stats()["disk_hits"] == 1
+        restarted.close()
+
+
+def test_disk_writes_are_queued_and_capped():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.sqlite")
+        cache = EmbeddingCache(max_size=10, path=path, max_disk_rows=3)
+        release = threading.Event()
+        cache._writer.submit(release.wait)  # Hold the writer thread busy.
+
+        for i in range(5):
+            cache.put(f"key-{i}", [float(i)])
+        assert cache.get("key-4") == [4.0]
+        with sqlite3.connect(path) as db:
+            assert db.execute("SELECT COUNT(*) FROM embeddings").fetchone() == (0,)
+
+        release.set()
+        cache.close()
+        with sqlite3.connect(path) as db:
+            keys = sorted(key for (key,) in db.execute("SELECT key FROM embeddings"))
+        assert keys == ["key-2", "key-3", "key-4"], keys
+
+
+def main():
+    logger.info("--- Embedding Cache Test Started ---")
+    for test in (
+        test_normalized_queries_hit_the_cache,
+        test_lru_eviction_and_ttl,
+        test_persistent_tier_survives_restart,
+        test_disk_writes_are_queued_and_capped,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Embedding Cache Test Finished ---")
+
+if __name__ == "__main__":
+    main()
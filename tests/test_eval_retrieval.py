@@ -0,0 +1,69 @@
+"""
+test_eval_retrieval.py
+
+Verification script for the retrieval evaluation harness.
+This script:
+1. Checks relevance matching on source file plus section path or heading.
+2. Checks recall@k and MRR on hand-built results.
+3. Runs one grid configuration against data/ with the offline embeddings.
+
+How to run:
+python -m tests.test_eval_retrieval
+"""
+
+import asyncio
+import logging
+from langchain_core.documents import Document
+from benchmarks.eval_retrieval import evaluate, is_relevant, load_golden_set, score_results
+from src.fakes import HashingEmbeddings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ITEM = {"question": "What is cosine similarity?", "source": "vector_databases.md", "section": "Distance Metrics"}
+
+
+def test_relevance_matching():
+    by_path = Document(page_content="- Cosine", metadata={"source": "data/vector_databases.md",
+                                                         "section": "Vector Databases > Distance Metrics"})
+    by_heading = Document(page_content="# Vector Databases\n\n## Distance Metrics\n- Cosine",
+                          metadata={"source": "data/vector_databases.md", "section": "Vector Databases"})
+    wrong_section = Document(page_content="Pinecone", metadata={"source": "data/vector_databases.md",
+                                                                "section": "Vector Databases > Popular Providers"})
+    wrong_source = Document(page_content="## Distance Metrics", metadata={"source": "data/rag_overview.md"})
+    assert is_relevant(by_path, ITEM)
+    assert is_relevant(by_heading, ITEM)
+    assert not is_relevant(wrong_section, ITEM)
+    assert not is_relevant(wrong_source, ITEM)
+
+
+def test_recall_and_mrr():
+    hit = Document(page_content="", metadata={"source": "vector_databases.md", "section": "Distance Metrics"})
+    miss = Document(page_content="", metadata={"source": "rag_overview.md"})
+    scores = score_results([[hit], [miss, hit], [miss], []], [ITEM] * 4)
+    assert scores == {"recall_at_k": 0.5, "mrr": 0.375}
+
+
+def test_evaluate_grid_row():
+    golden = load_golden_set()
+    rows = asyncio.run(evaluate(HashingEmbeddings(), golden, chunk_size=600, chunk_overlap=100, top_ks=[1, 4]))
+    assert [row["top_k"] for row in rows] == [1, 4]
+    assert rows[0]["chunks"] == rows[1]["chunks"] > 0
+    assert rows[0]["recall_at_k"] <= rows[1]["recall_at_k"]
+    assert rows[0]["mean_context_tokens"] <= rows[1]["mean_context_tokens"]
+
+
+def main():
+    logger.info("--- Retrieval Evaluation Test Started ---")
+    for test in (
+        test_relevance_matching,
+        test_recall_and_mrr,
+        test_evaluate_grid_row,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Retrieval Evaluation Test Finished ---")
+
+if __name__ == "__main__":
+    main()
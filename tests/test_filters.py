@@ -0,0 +1,274 @@
+"""
+test_filters.py
+
+Verification script for metadata pre-filtering and scoped queries.
+This script:
+1. Checks chunks carry normalized metadata (title, headings, tags, updated_at),
+   with tags and the update date read from front matter that is not indexed.
+2. Re-ingests a file whose front matter alone changed and checks the vector
+   store and the BM25 index both get the new metadata; touching a file
+   without an `updated:` date only rewrites updated_at (no new chunks, no
+   embedding calls).
+3. Checks build_filter/matches_filter semantics (AND across fields, any-of
+   values, list-valued fields, missing fields).
+4. Checks LocalVectorStore and BM25Index search only the matching chunks, so a
+   scoped query finds results outside the global top-k.
+5. Sends scoped queries to the API (offline stand-ins) and checks the sources
+   used and that scoped and unscoped answers are cached apart.
+
+How to run:
+python -m tests.test_filters
+"""
+
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+import numpy as np
+from fastapi.testclient import TestClient
+from src.config import settings
+from src.helper.utils import get_title
+from src.rag.bm25 import BM25Index
+from src.rag.doc_loader import load_and_split_file
+from src.rag.filters import build_filter, filter_key, matches_filter
+from src.rag.local_vector_store import LocalVectorStore
+from tests.support import offline_settings, override_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FRONT_MATTER_DOC = """---
+tags: [Retrieval, rag]
+updated: 2024-05-01
+---
+# Guide
+
+## Setup
+
+Install the package.
+"""
+
+
+def test_chunk_metadata():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "guide.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(FRONT_MATTER_DOC)
+        chunks = load_and_split_file(path, chunk_size=20, chunk_overlap=0)
+
+        assert chunks and all("---" not in chunk.page_content for chunk in chunks)
+        setup = next(chunk for chunk in chunks if "Install" in chunk.page_content)
+        assert setup.metadata["title"] == "guide" and get_title(setup) == "guide"
+        assert setup.metadata["headings"] == ["Guide", "Setup"]
+        assert setup.metadata["section"] == "Guide > Setup"
+        assert setup.metadata["tags"] == ["rag", "retrieval"]
+        assert setup.metadata["updated_at"] == int(datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp())
+
+        plain = os.path.join(tmp, "plain.md")
+        with open(plain, "w", encoding="utf-8") as f:
+            f.write("# Plain\n\nNo front matter.\n")
+        os.utime(plain, (1_700_000_000, 1_700_000_000))
+        (chunk,) = load_and_split_file(plain)
+        assert chunk.metadata["tags"] == [] and chunk.metadata["updated_at"] == 1_700_000_000
+
+        # Small sections packed into one chunk keep every heading, not only their common ancestor.
+        (packed,) = load_and_split_file(path, chunk_size=1000, chunk_overlap=0)
+        assert packed.metadata["section"] == "Guide"
+        assert packed.metadata["headings"] == ["Guide", "Setup"]
+        assert matches_filter(packed.metadata, build_filter(sections=["Setup"]))
+
+
+def test_front_matter_edit_reaches_the_store():
+    from src.helper import store_index
+    from src.rag.bm25 import bm25_path
+    from src.rag.vector_store import local_index_path
+
+    with tempfile.TemporaryDirectory() as tmp, override_settings(
+        data_path=os.path.join(tmp, "data"),
+        local_index_dir=os.path.join(tmp, "index"),
+        index_version_path=os.path.join(tmp, "index", "INDEX_VERSION"),
+        vector_store_backend="local",
+        embedding_backend="fake",
+        fake_embedding_latency_seconds=0.0,
+        ingestion_parse_workers=1,
+        snapshot_dtype="",
+    ):
+        os.makedirs(os.path.join(tmp, "data"))
+        path = os.path.join(tmp, "data", "guide.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(FRONT_MATTER_DOC)
+        store_index.main()
+        store = LocalVectorStore(local_index_path(settings.pinecone_index_name), None)
+        first_ids = set(store._ids)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(FRONT_MATTER_DOC.replace("[Retrieval, rag]", "agents").replace("2024-05-01", "2024-06-01"))
+        store_index.main()
+
+        store = LocalVectorStore(local_index_path(settings.pinecone_index_name), None)
+        lexical = BM25Index.load(bm25_path(settings.pinecone_index_name))
+        assert store._ids and not first_ids & set(store._ids)
+        assert sorted(store._ids) == sorted(lexical.ids)
+        june = int(datetime(2024, 6, 1, tzinfo=timezone.utc).timestamp())
+        for metadatas in (store._metadatas, lexical.metadatas):
+            assert all(metadata["tags"] == ["agents"] and metadata["updated_at"] == june for metadata in metadatas)
+        assert store._rows_matching(build_filter(tags=["agents"])).tolist() == list(range(len(store)))
+
+
+def test_touch_only_updates_updated_at():
+    from src.helper import store_index
+    from src.rag.bm25 import bm25_path
+    from src.rag.vector_store import local_index_path
+
+    embedded = []
+    original_get_embeddings = store_index.get_embeddings
+
+    def counting_get_embeddings(model_name):
+        embeddings = original_get_embeddings(model_name)
+        embed_documents = embeddings.embed_documents
+
+        def counting_embed_documents(texts):
+            embedded.extend(texts)
+            return embed_documents(texts)
+
+        embeddings.embed_documents = counting_embed_documents
+        return embeddings
+
+    with tempfile.TemporaryDirectory() as tmp, override_settings(
+        data_path=os.path.join(tmp, "data"),
+        local_index_dir=os.path.join(tmp, "index"),
+        index_version_path=os.path.join(tmp, "index", "INDEX_VERSION"),
+        vector_store_backend="local",
+        embedding_backend="fake",
+        fake_embedding_latency_seconds=0.0,
+        ingestion_parse_workers=1,
+        snapshot_dtype="",
+    ):
+        os.makedirs(os.path.join(tmp, "data"))
+        for name in ("guide", "notes"):
+            with open(os.path.join(tmp, "data", f"{name}.md"), "w", encoding="utf-8") as f:
+                f.write(f"# {name.title()}\n\nSome text about {name}.\n")
+            os.utime(os.path.join(tmp, "data", f"{name}.md"), (1_700_000_000, 1_700_000_000))
+
+        store_index.get_embeddings = counting_get_embeddings
+        try:
+            store_index.main()
+            first_ids = sorted(LocalVectorStore(local_index_path(settings.pinecone_index_name), None)._ids)
+            assert len(embedded) == len(first_ids) == 2
+
+            embedded.clear()
+            os.utime(os.path.join(tmp, "data", "guide.md"), (1_800_000_000, 1_800_000_000))
+            store_index.main()
+        finally:
+            store_index.get_embeddings = original_get_embeddings
+
+        assert embedded == []
+        store = LocalVectorStore(local_index_path(settings.pinecone_index_name), None)
+        lexical = BM25Index.load(bm25_path(settings.pinecone_index_name))
+        assert sorted(store._ids) == first_ids and sorted(lexical.ids) == first_ids
+        assert not os.path.exists(store.pending_path)
+        for metadatas in (store._metadatas, lexical.metadatas):
+            by_title = {metadata["title"]: metadata["updated_at"] for metadata in metadatas}
+            assert by_title == {"guide": 1_800_000_000, "notes": 1_700_000_000}
+
+
+def test_filter_semantics():
+    metadata = {"title": "rag_overview", "headings": ["RAG Overview", "Lifecycle"], "tags": ["rag"], "updated_at": 100}
+
+    assert build_filter() is None and build_filter(sources=[], tags=None) is None
+    assert build_filter(sources=["data/rag_overview.md"]) == {"title": {"$in": ["rag_overview"]}}
+    assert matches_filter(metadata, build_filter(sources=["rag_overview", "ai_agents"], sections=["Lifecycle"]))
+    assert matches_filter(metadata, build_filter(tags=["agents", "rag"], updated_after=100))
+    assert not matches_filter(metadata, build_filter(sources=["rag_overview"], updated_after=101))
+    assert not matches_filter(metadata, build_filter(sections=["Overview"]))
+    assert not matches_filter({"source": "data/legacy.md"}, build_filter(tags=["rag"]))
+    assert matches_filter(metadata, {"$or": [{"title": "other"}, {"tags": {"$nin": ["agents"]}}]})
+
+    assert filter_key(build_filter(tags=["b", "a"])) == filter_key(build_filter(tags=["a", "b"]))
+    assert filter_key(None) == ""
+
+
+def test_scoped_search_prefilters():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16)).astype(np.float32)
+    query = vectors[0]
+    scoped_rows = {150, 151, 152}  # Far from the query, outside its global top-k
+    vectors[sorted(scoped_rows)] = -query + rng.normal(scale=0.1, size=(3, 16))
+    metadatas = [{"title": "scoped" if row in scoped_rows else "other"} for row in range(200)]
+    metadata_filter = build_filter(sources=["scoped"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalVectorStore(tmp, None)
+        store.add_embeddings([f"text {row}" for row in range(200)], vectors.tolist(), metadatas,
+                             ids=[f"id-{row}" for row in range(200)])
+
+        unscoped = store.similarity_search_by_vector_with_score(query.tolist(), k=10)
+        assert all(doc.metadata["title"] == "other" for doc, _ in unscoped)
+
+        scoped = store.similarity_search_by_vector_with_score(query.tolist(), k=10, filter=metadata_filter)
+        assert {doc.id for doc, _ in scoped} == {f"id-{row}" for row in scoped_rows}
+        scores = [score for _, score in scoped]
+        assert scores == sorted(scores, reverse=True)
+        assert list(store._rows_matching(metadata_filter)) == sorted(scoped_rows)
+
+        assert store.similarity_search_by_vector_with_score(query.tolist(), k=4, filter=build_filter(sources=["x"])) == []
+
+        # Writes reopen the index and drop the cached rows.
+        store.add_embeddings(["new"], [query.tolist()], [{"title": "scoped"}], ids=["id-new"])
+        scoped = store.similarity_search_by_vector_with_score(query.tolist(), k=1, filter=metadata_filter)
+        assert scoped[0][0].id == "id-new"
+
+    index = BM25Index()
+    index.add("a", "HNSW index tuning", {"title": "vector_databases"})
+    index.add("b", "HNSW graphs in agents", {"title": "ai_agents"})
+    assert {doc.id for doc, _ in index.search("HNSW", k=5)} == {"a", "b"}
+    assert [doc.id for doc, _ in index.search("HNSW", k=5, filter=build_filter(sources=["ai_agents"]))] == ["b"]
+
+
+def test_api_scoped_queries():
+    from app import app
+
+    with offline_settings(retrieval_min_score=0.0):
+        with TestClient(app) as client:
+            query = {"query": "How do vector databases compare to keyword search?"}
+            unscoped = client.post("/agent/query", json=query).json()
+
+            scoped = client.post("/agent/query", json={**query, "filters": {"sources": ["ai_agents.md"]}})
+            assert scoped.status_code == 200, scoped.text
+            assert scoped.json()["documents_used"] and set(scoped.json()["documents_used"]) == {"ai_agents"}
+            assert scoped.json()["cached"] is False  # Not served from the unscoped answer
+            assert unscoped["documents_used"] != scoped.json()["documents_used"]
+
+            lifecycle = client.post("/agent/query", json={
+                "query": "What are the steps of RAG?", "filters": {"sections": ["The RAG Lifecycle"]}
+            }).json()
+            assert lifecycle["documents_used"] == ["rag_overview"], lifecycle
+
+            empty = client.post("/agent/query", json={**query, "filters": {"sources": ["missing"]}}).json()
+            assert empty["agent_decision"] == "insufficient_context"
+
+            batch = client.post("/agent/query/batch", json=[
+                {**query, "filters": {"sources": ["rag_overview"]}},
+                {**query, "filters": {"updated_after": "2999-01-01T00:00:00Z"}},
+            ]).json()["results"]
+            assert set(batch[0]["response"]["documents_used"]) == {"rag_overview"}
+            assert batch[1]["response"]["agent_decision"] == "insufficient_context"
+
+
+def main():
+    logger.info("--- Filters Test Started ---")
+    for test in (
+        test_chunk_metadata,
+        test_front_matter_edit_reaches_the_store,
+        test_touch_only_updates_updated_at,
+        test_filter_semantics,
+        test_scoped_search_prefilters,
+        test_api_scoped_queries,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Filters Test Finished ---")
+
+if __name__ == "__main__":
+    main()
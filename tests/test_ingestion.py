@@ -0,0 +1,97 @@
+"""
+test_ingestion.py
+
+Verification script for the batched, resumable ingestion engine.
+This script:
+1. Ingests chunks into a local vector store in small batches.
+2. Checks that 429 responses are retried.
+3. Interrupts a run with a hard failure and checks the next run resumes
+   from the checkpoint instead of re-embedding committed batches.
+
+How to run:
+python -m tests.test_ingestion
+"""
+
+import logging
+import os
+import tempfile
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.rag.ingestion import IngestionCheckpoint, IngestionEngine
+from src.rag.local_vector_store import LocalVectorStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that raise the scripted errors on successive calls."""
+    errors: list = []
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        return super().embed_documents(texts)
+
+
+def _chunks(n):
+    return [Document(id=f"chunk-{i}", page_content=f"chunk text {i}", metadata={"source": "data/doc.md"}) for i in range(n)]
+
+
+def test_rate_limits_are_retried():
+    with tempfile.TemporaryDirectory() as tmp:
+        embeddings = ScriptedEmbeddings(size=16, errors=[HTTPStatusError(429), HTTPStatusError(503)])
+        store = LocalVectorStore(tmp, embeddings)
+        engine = IngestionEngine(store, embeddings, batch_size=4, max_concurrency=1, retry_base_delay=0)
+
+        stats = engine.run(_chunks(8))
+
+        assert stats.chunks == 8 and stats.batches == 2
+        assert embeddings.calls == 4
+        assert len(store) == 8
+
+
+def test_interrupted_run_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint")
+        # Batches 1 and 2 succeed, batch 3 fails with a non-retryable error.
+        embeddings = ScriptedEmbeddings(size=16, errors=[None, None, HTTPStatusError(400)])
+        store = LocalVectorStore(os.path.join(tmp, "index"), embeddings)
+
+        engine = IngestionEngine(store, embeddings, IngestionCheckpoint(path), batch_size=4, max_concurrency=1)
+        try:
+            engine.run(_chunks(16))
+            raise AssertionError("expected the run to fail")
+        except HTTPStatusError:
+            pass
+        assert len(IngestionCheckpoint(path)) == 8
+
+        embeddings.calls = 0
+        resumed = IngestionEngine(store, embeddings, IngestionCheckpoint(path), batch_size=4, max_concurrency=1)
+        stats = resumed.run(_chunks(16))
+
+        assert stats.resumed == 8 and stats.chunks == 8
+        assert embeddings.calls == 2
+        assert len(store) == 16
+
+
+def main():
+    logger.info("--- Ingestion Engine Test Started ---")
+    for test in (test_rate_limits_are_retried, test_interrupted_run_resumes_from_checkpoint):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Ingestion Engine Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+test_local_embeddings.py
+
+Verification script for the in-process sentence-transformers backend.
+This script:
+1. Checks an unknown runtime is rejected before any model is loaded.
+2. Loads sentence-transformers/all-MiniLM-L6-v2 locally (skipped when
+   sentence-transformers is not installed) and checks the vectors are
+   384-dimensional, unit length, identical through the sync and async paths,
+   and rank a related text above an unrelated one.
+
+How to run:
+python -m tests.test_local_embeddings
+"""
+
+import asyncio
+import importlib.util
+import logging
+import numpy as np
+from src.config import settings
+from src.rag.local_embeddings import LocalEmbeddings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def test_unknown_runtime_is_rejected():
+    try:
+        LocalEmbeddings(settings.embedding_model_name, runtime="tensorrt")
+    except ValueError as e:
+        assert "tensorrt" in str(e)
+    else:
+        raise AssertionError("Expected ValueError for an unknown runtime")
+
+
+def test_local_model_vectors():
+    if importlib.util.find_spec("sentence_transformers") is None:
+        logger.info("sentence-transformers is not installed; skipping the model check.")
+        return
+
+    embeddings = LocalEmbeddings(settings.embedding_model_name, dimension=settings.vector_dimension, threads=1)
+    rag, related, unrelated = embeddings.embed_documents([
+        "Retrieval-Augmented Generation grounds LLM answers in documents.",
+        "RAG retrieves documents to ground the model's answer.",
+        "FastAPI is a Python web framework.",
+    ])
+    assert len(rag) == settings.vector_dimension
+    assert abs(np.linalg.norm(rag) - 1.0) < 1e-4
+    assert np.dot(rag, related) > np.dot(rag, unrelated)
+
+    query = asyncio.run(embeddings.aembed_query("Retrieval-Augmented Generation grounds LLM answers in documents."))
+    assert np.allclose(query, rag, atol=1e-5)
+
+
+def main():
+    logger.info("--- Local Embeddings Test Started ---")
+    for test in (
+        test_unknown_runtime_is_rejected,
+        test_local_model_vectors,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Local Embeddings Test Finished ---")
+
+if __name__ == "__main__":
+    main()
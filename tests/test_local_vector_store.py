@@ -0,0 +1,137 @@
+"""
+test_local_vector_store.py
+
+Verification script for the memory-mapped local vector store backend.
+This script:
+1. Builds a small index from deterministic fake embeddings in a temp directory.
+2. Checks cosine top-k ordering, upserts by id and deletes.
+3. Re-opens the index from disk and checks it is memory-mapped.
+4. Checks batches are appended to the pending log (not rewritten), replayed
+   on open (a torn last batch is skipped) and compacted once.
+5. Checks a serving store reloads the index when the index version changes.
+
+How to run:
+python -m tests.test_local_vector_store
+"""
+
+import logging
+import os
+import tempfile
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.rag.local_vector_store import LocalVectorStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+embeddings = DeterministicFakeEmbedding(size=384)
+
+
+def _build(index_dir: str) -> LocalVectorStore:
+    docs = [
+        Document(id=f"chunk-{i}", page_content=f"document number {i}", metadata={"source": f"data/doc_{i}.md"})
+        for i in range(20)
+    ]
+    return LocalVectorStore.from_documents(docs, embeddings, index_dir=index_dir)
+
+
+def test_top_k_is_sorted_by_cosine():
+    with tempfile.TemporaryDirectory() as index_dir:
+        store = _build(index_dir)
+        results = store.similarity_search_with_score("document number 3", k=5)
+
+        assert len(results) == 5
+        assert results[0][0].id == "chunk-3"
+        assert np.isclose(results[0][1], 1.0, atol=1e-5)
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_upsert_and_delete_by_id():
+    with tempfile.TemporaryDirectory() as index_dir:
+        store = _build(index_dir)
+        store.add_texts(["rewritten chunk"], metadatas=[{"source": "data/doc_3.md"}], ids=["chunk-3"])
+        assert len(store) == 20
+        assert store.get_by_ids(["chunk-3"])[0].page_content == "rewritten chunk"
+
+        store.delete(ids=["chunk-0", "chunk-1", "missing"])
+        assert len(store) == 18
+        assert store.get_by_ids(["chunk-0"]) == []
+
+
+def test_reopen_is_memory_mapped():
+    with tempfile.TemporaryDirectory() as index_dir:
+        _build(index_dir)
+        reopened = LocalVectorStore(index_dir, embeddings)
+
+        assert isinstance(reopened._vectors, np.memmap)
+        assert reopened.similarity_search("document number 7", k=1)[0].id == "chunk-7"
+
+
+def _batch(start: int, count: int):
+    texts = [f"document number {i}" for i in range(start, start + count)]
+    return texts, embeddings.embed_documents(texts), [{"n": i} for i in range(start, start + count)], \
+        [f"chunk-{i}" for i in range(start, start + count)]
+
+
+def test_batches_append_then_compact():
+    with tempfile.TemporaryDirectory() as index_dir:
+        store = LocalVectorStore(index_dir, embeddings)
+        for start in range(0, 50, 10):
+            texts, vectors, metadatas, ids = _batch(start, 10)
+            store.add_embeddings(texts, vectors, metadatas, ids=ids)
+        assert not os.path.exists(store.metadata_path) and not os.path.exists(store.vectors_path)
+        with open(store.pending_path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 5
+        assert len(store) == 50
+        assert store.similarity_search("document number 42", k=1)[0].id == "chunk-42"
+
+        # A crash in the middle of a batch leaves a torn line; it is skipped and later batches still apply.
+        with open(store.pending_path, "a", encoding="utf-8") as f:
+            f.write('{"ids": ["chunk-torn"], "te')
+        store = LocalVectorStore(index_dir, embeddings)
+        assert len(store) == 50 and store.get_by_ids(["chunk-torn"]) == []
+        texts, vectors, metadatas, ids = _batch(3, 1)
+        store.add_embeddings(["rewritten chunk"], vectors, metadatas, ids=ids)
+
+        store.compact()
+        assert not os.path.exists(store.pending_path)
+        reopened = LocalVectorStore(index_dir, embeddings)
+        assert isinstance(reopened._vectors, np.memmap) and len(reopened) == 50
+        assert reopened.get_by_ids(["chunk-3"])[0].page_content == "rewritten chunk"
+        assert reopened.get_vectors(["chunk-7"]) == store.get_vectors(["chunk-7"])
+
+
+def test_reload_on_index_version_change():
+    version = {"value": "v1"}
+    with tempfile.TemporaryDirectory() as index_dir:
+        writer = _build(index_dir)
+        reader = LocalVectorStore(index_dir, embeddings, index_version=lambda: version["value"])
+
+        texts, vectors, metadatas, ids = _batch(20, 5)
+        writer.add_embeddings(texts, vectors, metadatas, ids=ids)
+        writer.compact()
+        assert reader.similarity_search("document number 22", k=1)[0].id != "chunk-22"
+
+        version["value"] = "v2"
+        assert reader.similarity_search("document number 22", k=1)[0].id == "chunk-22"
+        assert len(reader) == 25
+
+
+def main():
+    logger.info("--- Local Vector Store Test Started ---")
+    for test in (
+        test_top_k_is_sorted_by_cosine,
+        test_upsert_and_delete_by_id,
+        test_reopen_is_memory_mapped,
+        test_batches_append_then_compact,
+        test_reload_on_index_version_change,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Local Vector Store Test Finished ---")
+
+if __name__ == "__main__":
+    main()
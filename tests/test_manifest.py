@@ -0,0 +1,61 @@
+"""
+test_manifest.py
+
+Verification script for deterministic chunk IDs and the ingestion manifest.
+This script:
+1. Checks chunk IDs are stable across runs and path separators.
+2. Checks that editing or removing a chunk shows up in the manifest diff.
+
+How to run:
+python -m tests.test_manifest
+"""
+
+import logging
+import os
+import tempfile
+from langchain_core.documents import Document
+from src.rag.manifest import IndexManifest, assign_chunk_ids
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _chunks(texts, source="data/rag_overview.md"):
+    return [Document(page_content=text, metadata={"source": source}) for text in texts]
+
+
+def test_ids_are_deterministic():
+    first = assign_chunk_ids(_chunks(["alpha", "beta"]))
+    second = assign_chunk_ids(_chunks(["alpha", "beta"]))
+    windows = assign_chunk_ids(_chunks(["alpha", "beta"], source="data\\rag_overview.md"))
+
+    assert first == second == windows
+    assert len(set(first)) == 2
+
+
+def test_diff_finds_changed_and_removed_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "manifest.json")
+        original = _chunks(["alpha", "beta", "gamma"])
+        assign_chunk_ids(original)
+        manifest = IndexManifest(path)
+        manifest.replace(original)
+        manifest.save()
+
+        edited = _chunks(["alpha", "beta (fixed typo)"])
+        new_ids, stale_ids = IndexManifest.load(path).diff(assign_chunk_ids(edited))
+
+        assert new_ids == {edited[1].id}
+        assert stale_ids == {original[1].id, original[2].id}
+
+
+def main():
+    logger.info("--- Manifest Test Started ---")
+    for test in (test_ids_are_deterministic, test_diff_finds_changed_and_removed_chunks):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Manifest Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+test_metrics.py
+
+Verification script for pipeline metrics and the Server-Timing header.
+This script:
+1. Checks stage timings are recorded in the histogram and for the current request.
+2. Checks stage errors are counted.
+3. Checks token usage is read from LLM messages.
+4. Checks each query records the embed stage once (with and without the
+   response cache, streamed, and once per batch).
+5. Checks a streamed response's HTTP latency is observed when the response
+   starts (first_byte) and again when the stream ends (complete).
+
+How to run:
+python -m tests.test_metrics
+"""
+
+import asyncio
+import logging
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from prometheus_client import REGISTRY
+from src.helper.metrics import record_token_usage, server_timing_header, stage_timer, start_request_timings
+from tests.support import offline_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stage_timings_feed_histogram_and_header():
+    before = _sample("rag_stage_duration_seconds_count", stage="test_stage")
+    timings = start_request_timings()
+
+    with stage_timer("test_stage"):
+        pass
+    with stage_timer("test_stage"):
+        pass
+
+    assert _sample("rag_stage_duration_seconds_count", stage="test_stage") == before + 2
+    assert [stage for stage, _ in timings] == ["test_stage", "test_stage"]
+    assert server_timing_header([("embed", 0.0012), ("llm", 0.5), ("embed", 0.001)]) == "embed;dur=2.2, llm;dur=500.0"
+
+
+def test_stage_errors_are_counted():
+    before = _sample("rag_stage_errors_total", stage="failing_stage")
+    try:
+        with stage_timer("failing_stage"):
+            raise TimeoutError("Pinecone timed out")
+    except TimeoutError:
+        pass
+
+    assert _sample("rag_stage_errors_total", stage="failing_stage") == before + 1
+
+
+def test_token_usage_is_recorded():
+    before = _sample("rag_llm_tokens_total", kind="completion")
+    message = AIMessage(content="RAG...", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+
+    record_token_usage(message)
+    record_token_usage(AIMessage(content="no usage reported"))
+
+    assert _sample("rag_llm_tokens_total", kind="completion") == before + 30
+
+
+def test_embed_is_timed_once_per_query():
+    from src.agent.agent import run_agent, run_agent_batch, stream_agent
+    from src.clients import close_clients, init_clients
+
+    async def embed_timings(run) -> int:
+        timings = start_request_timings()
+        await run()
+        return sum(1 for stage, _ in timings if stage == "embed")
+
+    async def stream(query):
+        async for _ in stream_agent(query):
+            pass
+
+    for response_cache_size in (0, 16):
+        with offline_settings(response_cache_size=response_cache_size, retrieval_min_score=0.0):
+            close_clients()
+            init_clients()
+            try:
+                query = "What is Retrieval-Augmented Generation?"
+                assert asyncio.run(embed_timings(lambda: run_agent(query))) == 1
+                assert asyncio.run(embed_timings(lambda: run_agent(query))) == 1  # Cache hit, if enabled
+                assert asyncio.run(embed_timings(lambda: stream("How do AI agents use tools?"))) == 1
+                assert asyncio.run(embed_timings(lambda: run_agent_batch(["What is RAG?", "What is BM25?"]))) == 1
+            finally:
+                close_clients()
+
+
+def test_stream_latency_is_recorded_when_the_body_ends():
+    from app import app
+
+    path = "/agent/query/stream"
+    before = {phase: _sample("rag_http_request_duration_seconds_sum", path=path, phase=phase)
+              for phase in ("first_byte", "complete")}
+    before_count = _sample("rag_http_request_duration_seconds_count", path=path, phase="complete")
+
+    with offline_settings(fake_llm_latency_seconds=0.3, retrieval_min_score=0.0, response_cache_size=0):
+        with TestClient(app) as client:
+            response = client.post(path, json={"query": "What is Retrieval-Augmented Generation?"})
+            assert response.status_code == 200 and "event: done" in response.text
+            assert "total;dur=" in response.headers["Server-Timing"]
+
+    first_byte = _sample("rag_http_request_duration_seconds_sum", path=path, phase="first_byte") - before["first_byte"]
+    complete = _sample("rag_http_request_duration_seconds_sum", path=path, phase="complete") - before["complete"]
+    assert _sample("rag_http_request_duration_seconds_count", path=path, phase="complete") == before_count + 1
+    assert complete >= 0.3 > first_byte, (first_byte, complete)
+
+
+def main():
+    logger.info("--- Metrics Test Started ---")
+    for test in (
+        test_stage_timings_feed_histogram_and_header,
+        test_stage_errors_are_counted,
+        test_token_usage_is_recorded,
+        test_embed_is_timed_once_per_query,
+        test_stream_latency_is_recorded_when_the_body_ends,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Metrics Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+test_response_cache.py
+
+Verification script for the semantic response cache.
+This script:
+1. Stores a response and looks it up with a near-identical vector.
+2. Checks that intent namespaces and index-version changes are respected.
+3. Checks LRU eviction when the cache is full.
+4. Checks a query that misses the cache is embedded once: retrieval reuses the
+   vector computed for the cache lookup.
+
+How to run:
+python -m tests.test_response_cache
+"""
+
+import asyncio
+import logging
+from src.agent.response_cache import SemanticResponseCache
+from tests.support import offline_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+response = {"answer": "RAG retrieves context.", "documents_used": ["rag_overview"], "agent_decision": "answered_using_retrieved_context"}
+
+
+def test_similar_query_hits_within_threshold():
+    cache = SemanticResponseCache(max_size=4, threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], response, "v1", namespace="explanation")
+
+    assert cache.lookup([0.99, 0.05, 0.0], "v1", namespace="explanation") == response
+    assert cache.lookup([0.0, 1.0, 0.0], "v1", namespace="explanation") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "v1", namespace="comparison") is None
+
+
+def test_index_version_change_invalidates():
+    cache = SemanticResponseCache(max_size=4)
+    cache.store([1.0, 0.0], response, "v1")
+
+    assert cache.lookup([1.0, 0.0], "v2") is None
+    assert cache.lookup([1.0, 0.0], "v1") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticResponseCache(max_size=2)
+    cache.store([1.0, 0.0, 0.0], {"answer": "a"}, "v1")
+    cache.store([0.0, 1.0, 0.0], {"answer": "b"}, "v1")
+    cache.lookup([1.0, 0.0, 0.0], "v1")
+    cache.store([0.0, 0.0, 1.0], {"answer": "c"}, "v1")
+
+    assert cache.lookup([0.0, 1.0, 0.0], "v1") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "v1") == {"answer": "a"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_miss_embeds_the_query_once():
+    from src.agent.agent import run_agent
+    from src.clients import close_clients, init_clients
+
+    for mode in ("vector", "hybrid"):
+        with offline_settings(
+            retrieval_mode=mode,
+            embedding_cache_size=0,
+            embedding_batch_window_ms=0,
+            response_cache_size=16,
+            retrieval_min_score=0.0,
+        ):
+            close_clients()
+            clients = init_clients()
+            try:
+                embeddings = clients.embeddings
+                calls = []
+                original = embeddings.aembed_query
+
+                async def counting_aembed_query(text):
+                    calls.append(text)
+                    return await original(text)
+
+                embeddings.aembed_query = counting_aembed_query
+                first = asyncio.run(run_agent("What is Retrieval-Augmented Generation?"))
+                assert first["cached"] is False and first["documents_used"]
+                assert len(calls) == 1, (mode, calls)
+
+                second = asyncio.run(run_agent("What is Retrieval-Augmented Generation?"))
+                assert second["cached"] is True and len(calls) == 2
+            finally:
+                close_clients()
+
+
+def main():
+    logger.info("--- Response Cache Test Started ---")
+    for test in (
+        test_similar_query_hits_within_threshold,
+        test_index_version_change_invalidates,
+        test_least_recently_used_entry_is_evicted,
+        test_cache_miss_embeds_the_query_once,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Response Cache Test Finished ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+test_singleflight.py
+
+Verification script for request coalescing.
+This script:
+1. Fires concurrent identical calls and checks they share one execution.
+2. Checks errors reach every waiter and the next call runs again.
+3. Checks cancelling the first caller does not cancel the shared execution.
+
+How to run:
+python -m tests.test_singleflight
+"""
+
+import asyncio
+import logging
+from src.helper.singleflight import SingleFlight
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def test_concurrent_duplicates_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"answer": "RAG"}
+
+        results = await asyncio.gather(*(flights.do("what is rag?", work) for _ in range(10)))
+        other = await flights.do("what are agents?", work)
+        return flights, calls, results, other
+
+    flights, calls, results, other = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(result == {"answer": "RAG"} for result in results)
+    assert other == {"answer": "RAG"}
+    assert flights.stats()["executed"] == 2
+    assert flights.stats()["coalesced"] == 9
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_errors_propagate_and_are_not_cached():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise TimeoutError("LLM timed out")
+
+        results = await asyncio.gather(*(flights.do("q", failing) for _ in range(3)), return_exceptions=True)
+
+        async def working():
+            return "ok"
+
+        return results, await flights.do("q", working)
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert retried == "ok"
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("q", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def main():
+    logger.info("--- Single-Flight Test Started ---")
+    for test in (
+        test_concurrent_duplicates_share_one_execution,
+        test_errors_propagate_and_are_not_cached,
+        test_cancelled_leader_does_not_cancel_waiters,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Single-Flight Test Finished ---")
+
+if __name__ == "__main__":
+    main()
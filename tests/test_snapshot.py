@@ -0,0 +1,204 @@
+"""
+test_snapshot.py
+
+Verification script for the embedding snapshot.
+This script:
+1. Round-trips float16 and int8 snapshots and checks size, precision and that
+   vectors are memory-mapped.
+2. Streams rows from a generator across several write blocks and checks the
+   result equals writing the whole array, and that a row-count mismatch fails.
+   Checks the on-disk VectorStage returns the last vector staged per ID.
+3. Runs store_index on a small corpus (local store, fake embeddings) and checks
+   the snapshot matches the stored vectors, that an unchanged re-run keeps it,
+   and that a run changing one file carries the other rows over.
+4. Restores the snapshot into an empty local store without any embedding call.
+
+How to run:
+python -m tests.test_snapshot
+"""
+
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src.config import settings
+import src.rag.snapshot as snapshot_module
+from src.rag.snapshot import EmbeddingSnapshot, VectorStage, write_snapshot
+from tests.support import override_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class FailingEmbeddings(Embeddings):
+    """Fails on any embedding call (restoring must not re-embed)."""
+
+    def embed_documents(self, texts):
+        raise AssertionError("restore re-embedded documents")
+
+    def embed_query(self, text):
+        raise AssertionError("restore re-embedded a query")
+
+
+@contextmanager
+def _offline_settings(tmp):
+    with override_settings(
+        data_path=os.path.join(tmp, "data"),
+        local_index_dir=os.path.join(tmp, "index"),
+        index_version_path=os.path.join(tmp, "index", "INDEX_VERSION"),
+        vector_store_backend="local",
+        embedding_backend="fake",
+        fake_embedding_latency_seconds=0.0,
+        ingestion_parse_workers=1,
+        snapshot_dtype="float16",
+    ):
+        os.makedirs(settings.data_path)
+        for i in range(3):
+            with open(os.path.join(settings.data_path, f"doc{i}.md"), "w", encoding="utf-8") as f:
+                f.write(f"# Doc {i}\n\n## Usage\n\nHow to use feature {i}.\n\n## Limits\n\nFeature {i} limits.\n")
+        yield
+
+
+def test_round_trip_precision():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"id-{i}" for i in range(50)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype, bytes_per_value, tolerance in (("float16", 2, 1e-3), ("int8", 1, 1e-2)):
+            path = os.path.join(tmp, f"{dtype}.snapshot")
+            write_snapshot(path, ids, [f"text {i}" for i in range(50)], [{"i": i} for i in range(50)], vectors,
+                           dtype=dtype, embedding_model="model")
+            snapshot = EmbeddingSnapshot(path)
+
+            assert isinstance(snapshot.data, np.memmap)
+            assert snapshot.data.nbytes == 50 * 384 * bytes_per_value
+            assert os.path.getsize(path) < vectors.nbytes * bytes_per_value / 4 + 8192
+            assert snapshot.ids == ids and snapshot.metadatas[3] == {"i": 3}
+            assert snapshot.embedding_model == "model" and snapshot.dtype == dtype
+
+            restored = snapshot.vectors()
+            assert np.abs(restored - vectors).max() < tolerance
+            cosine = (restored * vectors).sum(axis=1) / np.linalg.norm(restored, axis=1)
+            assert cosine.min() > 0.999
+            assert len(snapshot.documents(10, 20)) == 10
+
+
+def test_streamed_rows_match_array():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(70, 8)).astype(np.float32)
+    ids = [f"id-{i}" for i in range(70)]
+    texts, metadatas = [""] * 70, [{}] * 70
+
+    original_block = snapshot_module.WRITE_BLOCK_ROWS
+    snapshot_module.WRITE_BLOCK_ROWS = 16
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for dtype in ("float16", "int8"):
+                whole, streamed = os.path.join(tmp, f"whole-{dtype}"), os.path.join(tmp, f"streamed-{dtype}")
+                write_snapshot(whole, ids, texts, metadatas, vectors, dtype=dtype)
+                write_snapshot(streamed, ids, texts, metadatas, (row.tolist() for row in vectors), dtype=dtype, dimension=8)
+                assert np.array_equal(EmbeddingSnapshot(whole).vectors(), EmbeddingSnapshot(streamed).vectors())
+
+            for rows in (vectors[:69], np.concatenate([vectors, vectors[:1]])):
+                try:
+                    write_snapshot(os.path.join(tmp, "short"), ids, texts, metadatas, iter(rows), dimension=8)
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError("row-count mismatch was not detected")
+                assert not os.path.exists(os.path.join(tmp, "short")) and not os.path.exists(os.path.join(tmp, "short.tmp"))
+    finally:
+        snapshot_module.WRITE_BLOCK_ROWS = original_block
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stage = VectorStage(os.path.join(tmp, "run.staging"))
+        stage.add(ids[:40], vectors[:40])
+        assert np.array_equal(stage["id-3"], vectors[3])
+        stage.add(["id-3", "id-50"], [vectors[60].tolist(), vectors[50].tolist()])
+        assert len(stage) == 41 and "id-50" in stage and "id-51" not in stage
+        assert np.array_equal(stage["id-3"], vectors[60]) and np.array_equal(stage["id-39"], vectors[39])
+        assert os.path.getsize(stage.path) == 42 * 8 * 4
+        stage.close()
+        assert not os.path.exists(stage.path)
+
+
+def test_store_index_writes_snapshot():
+    from src.helper import store_index
+    from src.rag.local_vector_store import LocalVectorStore
+    from src.rag.snapshot import snapshot_path
+    from src.rag.vector_store import local_index_path
+
+    with tempfile.TemporaryDirectory() as tmp, _offline_settings(tmp):
+        store_index.main()
+        path = snapshot_path(settings.pinecone_index_name)
+        snapshot = EmbeddingSnapshot(path)
+        store = LocalVectorStore(local_index_path(settings.pinecone_index_name), None)
+
+        assert len(snapshot) == len(store) > 0
+        stored = store.get_vectors(snapshot.ids)
+        assert np.abs(snapshot.vectors() - np.array([stored[doc_id] for doc_id in snapshot.ids])).max() < 1e-3
+        assert not os.path.exists(path + ".staging")
+
+        # An unchanged corpus leaves the snapshot alone; a missing one is rebuilt from the store.
+        mtime = os.stat(path).st_mtime_ns
+        store_index.main()
+        assert os.stat(path).st_mtime_ns == mtime
+        os.remove(path)
+        store_index.main()
+        assert EmbeddingSnapshot(path).ids == snapshot.ids
+
+        # Changing one file re-embeds its chunks; the other rows come from the previous snapshot.
+        with open(os.path.join(settings.data_path, "doc1.md"), "a", encoding="utf-8") as f:
+            f.write("\nA new paragraph about feature 1.\n")
+        store_index.main()
+        snapshot = EmbeddingSnapshot(path)
+        store = LocalVectorStore(local_index_path(settings.pinecone_index_name), None)
+        stored = store.get_vectors(snapshot.ids)
+        assert sorted(snapshot.ids) == sorted(store._ids)
+        assert np.abs(snapshot.vectors() - np.array([stored[doc_id] for doc_id in snapshot.ids])).max() < 1e-3
+
+
+def test_restore_without_reembedding():
+    from src.helper import restore_snapshot, store_index
+    from src.rag.local_vector_store import LocalVectorStore
+    from src.rag.snapshot import snapshot_path
+    from src.rag.vector_store import local_index_path
+
+    with tempfile.TemporaryDirectory() as tmp, _offline_settings(tmp):
+        store_index.main()
+        path = snapshot_path(settings.pinecone_index_name)
+        settings.pinecone_index_name, original_name = "restored-index", settings.pinecone_index_name
+        original_get_embeddings = restore_snapshot.get_embeddings
+        restore_snapshot.get_embeddings = lambda model_name: FailingEmbeddings()
+        try:
+            count = restore_snapshot.restore(path)
+        finally:
+            settings.pinecone_index_name = original_name
+            restore_snapshot.get_embeddings = original_get_embeddings
+
+        store = LocalVectorStore(local_index_path("restored-index"), None)
+        snapshot = EmbeddingSnapshot(path)
+        assert count == len(store) == len(snapshot)
+        docs = store.get_by_ids(snapshot.ids[:2])
+        assert [doc.page_content for doc in docs] == snapshot.texts[:2]
+
+
+def main():
+    logger.info("--- Snapshot Test Started ---")
+    for test in (
+        test_round_trip_precision,
+        test_streamed_rows_match_array,
+        test_store_index_writes_snapshot,
+        test_restore_without_reembedding,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Snapshot Test Finished ---")
+
+if __name__ == "__main__":
+    main()
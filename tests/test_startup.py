@@ -0,0 +1,184 @@
+"""
+test_startup.py
+
+Verification script for fast startup and the warmup/readiness lifecycle.
+This script:
+1. Imports app in a fresh interpreter and checks no remote SDK was imported.
+2. Starts the app with the offline stand-ins and checks /health/ready is 503
+   while warmup runs and 200 once it has finished.
+3. Checks a query is answered by the warmed-up clients, and that queries sent
+   during warmup get 503 with Retry-After while /health/live stays up.
+4. Checks the clients are opened before serving when startup warmup is off,
+   and when a script builds them lazily.
+5. Checks the client registry is created once and reused by every request,
+   and closed on shutdown.
+6. Checks a failed warmup is reported by /health/ready and retried until ready.
+
+How to run:
+python -m tests.test_startup
+"""
+
+import asyncio
+import logging
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from benchmarks.bench_import_time import HEAVY_MODULES
+from tests.support import offline_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_app_import_skips_heavy_sdks():
+    code = f"import sys, app; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]", result.stdout
+
+
+def test_readiness_follows_warmup():
+    from app import app
+
+    with offline_settings(fake_embedding_latency_seconds=0.3, startup_warmup=True):
+        with TestClient(app) as client:
+            assert client.get("/health/live").json() == {"status": "alive"}
+            assert client.get("/health/ready").status_code == 503
+            early = client.post("/agent/query", json={"query": "What is RAG?"})
+            assert early.status_code == 503 and early.headers["Retry-After"] == "1"
+            assert client.post("/agent/query/stream", json={"query": "What is RAG?"}).status_code == 503
+
+            deadline = time.monotonic() + 30
+            while client.get("/health/ready").status_code != 200:
+                assert time.monotonic() < deadline, "warmup did not finish"
+                time.sleep(0.05)
+            ready = client.get("/health/ready").json()
+            assert ready["status"] == "ready" and ready["warmup_seconds"] >= 0.3
+
+            response = client.post("/agent/query", json={"query": "What is Retrieval-Augmented Generation?"})
+            assert response.status_code == 200
+            assert response.json()["answer"]
+
+
+def test_clients_open_without_startup_warmup():
+    from app import app
+    from src.clients import current_clients
+
+    with offline_settings(startup_warmup=False):
+        with TestClient(app) as client:
+            assert client.get("/health/ready").status_code == 200
+            registry = current_clients()
+            assert registry is not None and registry._opened
+        assert current_clients() is None
+
+
+def test_lazy_clients_are_opened():
+    from src.clients import aget_clients, close_clients, current_clients
+
+    with offline_settings():
+        close_clients()
+        try:
+            registry = asyncio.run(aget_clients())
+            assert registry._opened and current_clients() is registry
+            assert asyncio.run(aget_clients()) is registry
+        finally:
+            close_clients()
+
+
+@contextmanager
+def _counting_registry_creates(before_create=None):
+    """
+    Record every ClientRegistry.create() call; `before_create(attempt)` runs first.
+    """
+    from src.clients import ClientRegistry
+
+    original = ClientRegistry.create
+    attempts, created = [], []
+
+    def create(cls):
+        attempts.append(len(attempts))
+        if before_create is not None:
+            before_create(attempts[-1])
+        registry = original.__func__(cls)
+        created.append(registry)
+        return registry
+
+    ClientRegistry.create = classmethod(create)
+    try:
+        yield attempts, created
+    finally:
+        ClientRegistry.create = original
+
+
+def _wait_until_ready(client, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while client.get("/health/ready").status_code != 200:
+        assert time.monotonic() < deadline, "warmup did not finish"
+        time.sleep(0.02)
+
+
+def test_clients_are_created_once():
+    from app import app
+    from src.clients import current_clients
+
+    with offline_settings(startup_warmup=True, retrieval_min_score=0.0), _counting_registry_creates() as (_, created):
+        with TestClient(app) as client:
+            _wait_until_ready(client)
+            assert len(created) == 1
+
+            for query in ("What is RAG?", "How do AI agents use tools?", "What is BM25?"):
+                assert client.post("/agent/query", json={"query": query}).status_code == 200
+            assert client.post("/agent/query/batch", json=[{"query": "What is RAG?"}]).status_code == 200
+            assert client.post("/agent/query/stream", json={"query": "What is FastAPI?"}).status_code == 200
+
+            assert len(created) == 1
+            assert app.state.clients is created[0] and current_clients() is created[0]
+        assert current_clients() is None
+
+
+def test_failed_warmup_is_retried():
+    from app import app
+
+    second_attempt = threading.Event()
+
+    def flaky(attempt):
+        if attempt == 0:
+            raise ConnectionError("embedding endpoint unreachable")
+        second_attempt.wait(10)
+
+    with offline_settings(startup_warmup=True, warmup_retry_base_delay=0.01), \
+            _counting_registry_creates(flaky) as (attempts, created):
+        with TestClient(app) as client:
+            deadline = time.monotonic() + 10
+            while True:
+                ready = client.get("/health/ready")
+                if ready.json()["error"] is not None:
+                    break
+                assert time.monotonic() < deadline, "warmup error was not reported"
+                time.sleep(0.01)
+            assert ready.status_code == 503
+            assert ready.json() == {"status": "warming_up", "error": "ConnectionError: embedding endpoint unreachable"}
+
+            second_attempt.set()
+            _wait_until_ready(client)
+            assert len(attempts) == 2 and len(created) == 1
+
+
+def main():
+    logger.info("--- Startup Test Started ---")
+    for test in (
+        test_app_import_skips_heavy_sdks,
+        test_readiness_follows_warmup,
+        test_clients_open_without_startup_warmup,
+        test_lazy_clients_are_opened,
+        test_clients_are_created_once,
+        test_failed_warmup_is_retried,
+    ):
+        test()
+        logger.info(f"✓ {test.__name__}")
+    logger.info("--- Startup Test Finished ---")
+
+if __name__ == "__main__":
+    main()